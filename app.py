@@ -1,13 +1,141 @@
 import streamlit as st
-from PIL import Image, ImageDraw
+from PIL import Image
+import numpy as np
+import hashlib
 import os
+import shutil
 import sys
 import tempfile
-import cv2
+import time
+import uuid
 
 sys.path.insert(0, os.path.dirname(__file__))
-from scripts.detect import detect
-from scripts.detect_video import detect_video
+from scripts.detect import detect, preload_backends
+from scripts.jobs import JobManager, JobLimitError, ACTIVE_STATES, QUEUED, DONE, CANCELLED
+from scripts.output_server import start_output_server, output_url
+from config import UPLOAD_CHUNK_MB, OUTPUT_INLINE_MAX_MB, OUTPUT_SERVER_PORT
+
+# Detection results kept per session, so reruns caused by UI changes don't repeat inference
+MAX_SESSION_RESULTS = 8
+
+
+# Backends each detection method can use; only these are loaded on its first use
+METHOD_BACKENDS = {"auto": ("api", "local"), "race": ("api", "local"), "api": ("api",), "local": ("local",)}
+
+
+@st.cache_resource(show_spinner="Loading detection backends...")
+def load_backends(methods):
+    """
+    Loads the given backends once per server process, shared by all sessions and reruns.
+    An API-only session never imports ultralytics/torch.
+    """
+    return preload_backends(methods)
+
+
+@st.cache_resource
+def get_job_manager():
+    """The background video job queue, shared by all sessions."""
+    return JobManager()
+
+
+@st.cache_resource
+def get_output_server():
+    """
+    Starts the server streaming job outputs from disk, once per server process.
+    Returns None if OUTPUT_SERVER_PORT is not set or the port cannot be opened.
+    """
+    if not OUTPUT_SERVER_PORT:
+        return None
+    try:
+        return start_output_server(get_job_manager().output_dir)
+    except OSError as e:
+        print(f"Could not start the output server on port {OUTPUT_SERVER_PORT}: {e}")
+        return None
+
+
+def show_video_output(output_path):
+    """
+    Plays and offers the processed video for download.
+
+    With the output server running, the player and the download link fetch the file from it
+    in chunks (with range requests for seeking), so it is never loaded into memory. Otherwise
+    outputs up to OUTPUT_INLINE_MAX_MB are passed to the player and the download button as a file.
+    """
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    if get_output_server() is not None:
+        st.markdown(f'<video src="{output_url(output_path)}" controls style="width: 100%"></video>',
+                    unsafe_allow_html=True)
+        st.markdown(f'<a href="{output_url(output_path, download=True)}">⬇️ Download Detected Video '
+                    f'({size_mb:.1f} MB)</a>', unsafe_allow_html=True)
+    elif size_mb <= OUTPUT_INLINE_MAX_MB:
+        st.video(output_path)
+        with open(output_path, 'rb') as video_file:
+            st.download_button(
+                label="⬇️ Download Detected Video",
+                data=video_file,
+                file_name="snake_detected_video.mp4",
+                mime="video/mp4"
+            )
+    else:
+        st.warning(f"The processed video is {size_mb:.0f} MB, more than the {OUTPUT_INLINE_MAX_MB} MB "
+                   f"that are shown in the page without the output server. Set `OUTPUT_SERVER_PORT` "
+                   f"in `config.py` to stream it (see DEPLOYMENT.md).")
+        st.code(output_path, language=None)
+
+
+def session_owner():
+    """Returns an id for this browser session, used for the per-session job limit."""
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    return st.session_state['session_id']
+
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    """Polls a background video job and reruns the whole app once it has finished."""
+    job = get_job_manager().get(job_id)
+    if job is None or job.status not in ACTIVE_STATES:
+        st.rerun()
+    if job.status == QUEUED:
+        st.info("⏳ Video queued, waiting for a free worker...")
+    else:
+        st.progress(job.progress, text=f"Processing: {job.current}/{job.total} frames ({job.progress:.0%})")
+    if st.button("✖️ Cancel", key=f"cancel_{job_id}"):
+        get_job_manager().cancel(job_id)
+        st.rerun()
+
+
+def upload_digest(uploaded_file):
+    """
+    Returns a hash of an uploaded file's content.
+
+    The file is only hashed once per upload: the digest is remembered in this session
+    under the upload's file_id, so reruns caused by UI changes don't read it again.
+    """
+    digests = st.session_state.setdefault('upload_digests', {})
+    if uploaded_file.file_id not in digests:
+        h = hashlib.blake2b(digest_size=16)
+        uploaded_file.seek(0)
+        for chunk in iter(lambda: uploaded_file.read(1024 * 1024), b''):
+            h.update(chunk)
+        uploaded_file.seek(0)
+        digests.clear()  # Only the current upload is needed
+        digests[uploaded_file.file_id] = h.hexdigest()
+    return digests[uploaded_file.file_id]
+
+
+def get_result(key):
+    """Returns the detection result stored in this session for a key, or None."""
+    return st.session_state.get('detection_results', {}).get(key)
+
+
+def remember_result(key, result):
+    """Stores a detection result in this session, dropping the oldest ones beyond MAX_SESSION_RESULTS."""
+    results = st.session_state.setdefault('detection_results', {})
+    results.pop(key, None)
+    results[key] = result
+    while len(results) > MAX_SESSION_RESULTS:
+        results.pop(next(iter(results)))
 
 # Set API key from Streamlit secrets
 api_key_configured = False
@@ -362,6 +490,9 @@ with col2:
     if os.path.exists(os.path.join(os.path.dirname(__file__), "model", "best.pt")):
         detection_methods.append("💻 Local Model")
     
+    if len(detection_methods) == 2:
+        detection_methods.append("⚡ Race (Fastest Wins)")
+    
     if len(detection_methods) > 0:
         detection_methods.insert(0, "✨ Auto (Best Available)")
         detection_method = st.selectbox("🎯 Detection Method", detection_methods, index=0)
@@ -386,23 +517,31 @@ if uploaded_file is not None:
         method_param = "api"
     elif "Local" in detection_method:
         method_param = "local"
+    elif "Race" in detection_method:
+        method_param = "race"
     else:
         method_param = "auto"
     
+    # The model and API client are shared resources; results are keyed by upload content and method
+    load_backends(METHOD_BACKENDS[method_param])
+    result_key = (upload_digest(uploaded_file), file_type, method_param)
+    result = get_result(result_key)
+    
     if file_type == "Image":
         # ===== IMAGE PROCESSING =====
         # Load image with PIL
         img = Image.open(uploaded_file)
         st.image(img, caption="Uploaded Image", width="stretch")
         
-        # Save temporarily for detection using cross-platform temp directory
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            temp_path = tmp_file.name
-            img.save(temp_path)
-        
-        # Run detection with selected method
-        with st.spinner(f"Detecting snakes using {detection_method}..."):
-            predictions, method, error_msg = detect(temp_path, method_param)
+        # Run detection with selected method on the in-memory image, unless this
+        # session already has the result for this upload and method
+        if result is None:
+            with st.spinner(f"Detecting snakes using {detection_method}..."):
+                predictions, method, error_msg = detect(img, method_param)
+            if not error_msg:
+                remember_result(result_key, {'predictions': predictions, 'method': method})
+        else:
+            predictions, method, error_msg = result['predictions'], result['method'], None
         
         if error_msg:
             # Provide user-friendly error messages
@@ -444,76 +583,64 @@ if uploaded_file is not None:
                 st.error("❌ **Detection Failed**")
                 st.code(error_msg, language=None)
                 st.info("If you're deploying on Streamlit Cloud, make sure to configure your ROBOFLOW_API_KEY in the app secrets.")
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
         else:
             st.success(f"✅ Detection completed using {method}.")
             
-            # Create a copy for drawing
-            draw_img = img.copy()
-            draw = ImageDraw.Draw(draw_img)
-            
-            if method == "API":
-                # Draw boxes from API predictions
-                if 'predictions' in predictions and predictions['predictions']:
-                    for pred in predictions['predictions']:
-                        x_center = pred['x']
-                        y_center = pred['y']
-                        width = pred['width']
-                        height = pred['height']
-                        confidence = pred['confidence']
-                        class_name = pred['class']
-                        
-                        x1 = int(x_center - width / 2)
-                        y1 = int(y_center - height / 2)
-                        x2 = int(x_center + width / 2)
-                        y2 = int(y_center + height / 2)
-                        
-                        draw.rectangle([x1, y1, x2, y2], outline="green", width=2)
-                        label = f"{class_name} {confidence:.2f}"
-                        draw.text((x1, y1 - 10), label, fill="green")
-                    st.image(draw_img, caption="Detected Image", width="stretch")
-                else:
-                    st.info("No snake detected in the image.")
-                    st.image(img, caption="Uploaded Image (No Detection)", width="stretch")
-            elif method == "LOCAL":
-                # For local, plot returns numpy array, convert to PIL
-                plotted = predictions[0].plot()
-                # Convert BGR to RGB for proper display
-                plotted_rgb = cv2.cvtColor(plotted, cv2.COLOR_BGR2RGB)
-                draw_img = Image.fromarray(plotted_rgb)
+            # Both methods return the same Detections type, drawn on an RGB copy of the upload
+            if len(predictions) > 0:
+                draw_img = predictions.draw(np.array(img.convert('RGB')))
                 st.image(draw_img, caption="Detected Image", width="stretch")
-            
-            # Clean up
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            else:
+                st.info("No snake detected in the image.")
+                st.image(img, caption="Uploaded Image (No Detection)", width="stretch")
     
     else:  # file_type == "Video"
         # ===== VIDEO PROCESSING =====
-        st.video(uploaded_file)
-        
-        # Save uploaded video temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-            temp_video_path = tmp_file.name
-            tmp_file.write(uploaded_file.read())
-        
-        # Process video
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        def update_progress(current, total):
-            progress = int((current / total) * 100)
-            progress_bar.progress(progress)
-            status_text.text(f"Processing: {current}/{total} frames ({progress}%)")
-        
-        with st.spinner(f"Detecting snakes in video using {detection_method}..."):
-            output_path, method, error_msg, stats = detect_video(temp_video_path, update_progress, method_param)
-        
-        if error_msg:
+        # The preview is embedded in the page, so it is only shown for smaller uploads
+        if uploaded_file.size <= OUTPUT_INLINE_MAX_MB * 1024 * 1024:
+            st.video(uploaded_file)
+        
+        # Videos are processed by the background job queue shared by all sessions;
+        # this session only keeps the id of its job for each upload and method
+        job_manager = get_job_manager()
+        job = job_manager.get(result['job_id']) if result is not None else None
+        
+        if result is not None and job is None:
+            # The job was removed by the cleanup after JOB_RESULT_TTL; reruns (e.g. a theme
+            # toggle) must not submit the video again, only the button below does
+            st.warning("The processed video has expired. Use 'Process Again' to run detection again.")
+            if st.button("🔁 Process Again"):
+                st.session_state['detection_results'].pop(result_key, None)
+                st.rerun()
+        elif job is None:
+            # Copy the upload to a temp file in chunks (no second in-memory copy);
+            # the job removes it when it finishes
+            upload_start = time.perf_counter()
+            uploaded_file.seek(0)
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+                temp_video_path = tmp_file.name
+                shutil.copyfileobj(uploaded_file, tmp_file, UPLOAD_CHUNK_MB * 1024 * 1024)
+            upload_seconds = time.perf_counter() - upload_start
+            
+            try:
+                job = job_manager.submit(temp_video_path, method_param, owner=session_owner(), delete_input=True)
+                remember_result(result_key, {'job_id': job.id, 'upload_seconds': upload_seconds})
+                result = get_result(result_key)
+            except JobLimitError as e:
+                os.remove(temp_video_path)
+                st.warning(f"⏳ {e}")
+        
+        if job is None:
+            pass  # Expired, or refused by the job limits; the warning above says why
+        elif job.status in ACTIVE_STATES:
+            show_job_progress(job.id)
+        elif job.status != DONE:
+            error_msg = job.error_msg or "Video processing failed"
             # Same error handling as images
             error_lower = error_msg.lower()
-            if "api key" in error_lower or "oauthexception" in error_lower:
+            if job.status == CANCELLED:
+                st.info("✖️ Video processing was cancelled.")
+            elif "api key" in error_lower or "oauthexception" in error_lower:
                 st.error("❌ **API Authentication Failed**")
                 st.warning("Please configure your Roboflow API key in Streamlit Secrets.")
             elif "local model not found" in error_lower:
@@ -523,13 +650,11 @@ if uploaded_file is not None:
                 st.error("❌ **Video Detection Failed**")
                 st.code(error_msg, language=None)
             
-            # Clean up
-            if os.path.exists(temp_video_path):
-                os.remove(temp_video_path)
+            if st.button("🔁 Process Again"):
+                st.session_state['detection_results'].pop(result_key, None)
+                st.rerun()
         else:
-            status_text.empty()
-            progress_bar.empty()
-            
+            method, stats, output_path = job.method, job.stats, job.output_path
             st.success(f"✅ Video detection completed using {method}!")
             
             # Display stats
@@ -541,24 +666,22 @@ if uploaded_file is not None:
             with col3:
                 st.metric("FPS", stats['fps'])
             
+            # Where the time went: temp-file write, queue wait, then the stages timed by detect_video
+            with st.expander("⏱️ Stage Timings"):
+                st.caption(f"Processed at {stats['processing_fps']:.1f} frames/s")
+                rows = [
+                    {'stage': 'upload_write', 'count': 1, 'total_s': round(result['upload_seconds'], 4)},
+                    {'stage': 'queue_wait', 'count': 1, 'total_s': round(job.started_at - job.created_at, 4)},
+                ]
+                rows += [{'stage': stage, **timing} for stage, timing in stats['timings'].items()]
+                st.table(rows)
+            
             # Display processed video
             st.subheader("📹 Processed Video")
             if os.path.exists(output_path):
-                with open(output_path, 'rb') as video_file:
-                    video_bytes = video_file.read()
-                    st.video(video_bytes)
-                
-                # Download button
-                st.download_button(
-                    label="⬇️ Download Detected Video",
-                    data=video_bytes,
-                    file_name="snake_detected_video.mp4",
-                    mime="video/mp4"
-                )
-                
-                # Clean up output video after showing
-                os.remove(output_path)
-            
-            # Clean up temp video
-            if os.path.exists(temp_video_path):
-                os.remove(temp_video_path)
\ No newline at end of file
+                show_video_output(output_path)
+            else:
+                st.warning("The processed video has expired. Use 'Process Again' to run detection again.")
+                if st.button("🔁 Process Again"):
+                    st.session_state['detection_results'].pop(result_key, None)
+                    st.rerun()
@@ -5,9 +5,128 @@
 # Roboflow API Configuration
 ROBOFLOW_API_KEY = "69iblLFisbddbkiVO0wy"  # Replace with your actual Roboflow API key
 ROBOFLOW_MODEL_ID = "snake-detection-gat5j-nbtyc/1"  # Replace with your Roboflow model ID
+ROBOFLOW_API_URL = "https://detect.roboflow.com"  # Hosted inference endpoint
+
+# Roboflow HTTP Client Configuration
+API_CONNECT_TIMEOUT = 5.0  # Seconds to wait for a connection
+API_READ_TIMEOUT = 30.0  # Seconds to wait for a prediction response
+API_MAX_RETRIES = 2  # Retries for connection errors and 429/5xx responses
+API_RETRY_BACKOFF = 0.5  # Backoff factor in seconds (0.5, 1, 2, ...)
+API_POOL_SIZE = 8  # Keep-alive connections kept open to the API
+API_CONCURRENCY = 8  # API requests kept in flight for video frames and batches
+API_RATE_LIMIT = 20.0  # Maximum API requests started per second (0 = unlimited)
+API_JPEG_QUALITY = 90  # JPEG/WebP quality used when images are encoded for upload
+API_UPLOAD_MAX_SIZE = 640  # Longer side images are downscaled to before upload (the model's input size; 0 = send as is)
+API_UPLOAD_FORMAT = ".jpg"  # Encoding of downscaled uploads: ".jpg" or ".webp"
 
 # Local Model Configuration
 LOCAL_MODEL_PATH = "model/best.pt"
+LOCAL_DEVICE = "cpu"  # e.g. "cpu", "cuda:0" or "mps"
+
+# Local Inference Engine Configuration
+# Exported models are created once with `python engines.py export --engine onnx` and cached
+# in LOCAL_EXPORT_DIR; if the export for the chosen engine is missing, "pytorch" is used.
+LOCAL_ENGINE = "pytorch"  # "pytorch", "onnx", "openvino" or "torchscript"
+LOCAL_ENGINE_INT8 = False  # Use the dynamically quantized int8 export (onnx only)
+LOCAL_EXPORT_DIR = "model/exports"  # Cache of exported models, one folder per weights file version
+LOCAL_EXPORT_IMGSZ = 640  # Input size the models are exported with
+
+# Model Registry Configuration
+# Loaded models are kept in memory for the lifetime of the process and the
+# least recently used ones are evicted once this budget is exceeded.
+MODEL_MEMORY_BUDGET_MB = 1024
+MODEL_WARMUP = True  # Run a dummy inference right after loading a model
+
+# Race Mode Configuration (preferred_method="race")
+# The API request and local inference run concurrently and the first result wins.
+RACE_HEDGE_DELAY = 0.0  # Seconds to wait for the API before also starting local inference (0 = start both at once)
 
 # Detection Confidence Threshold
 CONF_THRESHOLD = 0.5
+
+# Tiled Inference Configuration (detect(..., tiled=True), --tiled)
+# Large images are cut into overlapping tiles that are detected as one batch, so small
+# objects keep their pixels instead of being shrunk to the model input size.
+TILED_INFERENCE = False  # Tile large images by default
+TILE_SIZE = 640  # Tile side in pixels (the model's input size)
+TILE_OVERLAP = 0.2  # Fraction of a tile shared with its neighbours
+TILE_MIN_IMAGE_SIZE = 1280  # Images whose longer side is smaller are detected whole
+TILE_MIN_STD = 4.0  # Tiles with a lower pixel standard deviation (blank sky, letterboxing) are skipped (0 = keep all)
+TILE_MERGE = "nms"  # How boxes from overlapping tiles are merged: "nms" or "wbf" (weighted box fusion)
+TILE_MERGE_IOU = 0.5  # Boxes of the same class overlapping above this IoU are merged
+TILE_FULL_IMAGE = True  # Also detect on the whole (downscaled) image, for objects larger than a tile
+
+# Result Cache Configuration
+# Detection results are cached by image content, backend, model and confidence threshold.
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_MAX_ENTRIES = 1024  # Results kept in memory (least recently used are dropped)
+RESULT_CACHE_DIR = None  # e.g. ".cache/detections" to also keep results on disk
+RESULT_CACHE_MAX_DISK_MB = 512  # Size of the on-disk tier before old entries are removed
+
+# Video Detection Configuration
+VIDEO_DETECTION_STRIDE = 5  # Run detection on the first frame and every Nth frame
+VIDEO_BATCH_SIZE = 0  # Sampled frames per local forward pass; 0 picks a size from available memory
+VIDEO_MAX_BATCH_SIZE = 32  # Upper bound for the automatic batch size
+VIDEO_PIPELINE = True  # Run decode, inference and annotate+encode as overlapping stages
+VIDEO_QUEUE_SIZE = 16  # Items buffered between two pipeline stages (bounds memory use)
+VIDEO_MAX_BUFFERED_FRAMES = 120  # Frames held while a detection batch fills up
+VIDEO_MEMORY_BUDGET_MB = 512  # Cap on decoded frames held at once per video job (queues and batch buffer shrink to fit)
+VIDEO_SAMPLING = "fixed"  # "fixed" (every VIDEO_DETECTION_STRIDE frames) or "motion"
+
+# Sharded Video Configuration
+# Long videos can be split into keyframe-aligned segments processed by a pool of worker
+# processes (see scripts/video_shards.py), each with its own model.
+VIDEO_SHARD_WORKERS = 0  # Worker processes for sharded video detection (0 = one per CPU core)
+VIDEO_SHARD_MIN_FRAMES = 1800  # Smallest segment; shorter videos use fewer workers
+
+# Motion-Gated Sampling Configuration (VIDEO_SAMPLING = "motion")
+MOTION_DENSE_STRIDE = 2  # Stride while something moves
+MOTION_IDLE_STRIDE = 150  # Keep-alive stride while the scene is static
+MOTION_THRESHOLD = 0.002  # Fraction of changed pixels that counts as motion
+MOTION_PIXEL_DELTA = 25  # Grey-level change for a pixel to count as changed
+MOTION_HOLD_FRAMES = 30  # Keep sampling densely this long after motion stops
+MOTION_DOWNSCALE_WIDTH = 160  # Frames are compared at this width
+MOTION_BACKGROUND_RATE = 0.05  # Learning rate of the background model
+
+# Video Tracking Configuration
+# With tracking enabled, boxes are propagated to the frames between sampled frames,
+# so VIDEO_DETECTION_STRIDE can be raised to 15-30 while overlays stay continuous.
+VIDEO_TRACKING = False
+TRACK_IOU_THRESHOLD = 0.3  # Minimum IoU to associate a detection with a track
+TRACK_MAX_AGE = 60  # Frames a track survives without a matching detection
+TRACK_VELOCITY_SMOOTHING = 0.6  # Weight of the newest motion measurement (0-1)
+
+# Metrics Configuration
+# Stage timings, cache hits, API fallbacks and frame rates are recorded in-process (see scripts/metrics.py).
+METRICS_ENABLED = True
+METRICS_LOG = True  # Print one JSON log line per detection call and video job
+METRICS_PORT = None  # e.g. 9108 to serve Prometheus text format at http://host:9108/metrics
+METRICS_HOST = "127.0.0.1"
+
+# API Circuit Breaker Configuration
+# After repeated API failures, "auto" detection goes straight to the local model while
+# the API is probed in the background with exponential backoff (see scripts/circuit_breaker.py).
+CIRCUIT_BREAKER_ENABLED = True
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive API failures that open the circuit
+CIRCUIT_PROBE_INTERVAL = 5.0  # Seconds before the first background probe
+CIRCUIT_PROBE_MAX_INTERVAL = 300.0  # Upper bound of the doubling probe interval
+
+# Background Video Job Configuration (web app)
+# Video uploads are queued to a worker pool shared by all sessions (see scripts/jobs.py).
+JOB_MAX_WORKERS = 2  # Videos processed at the same time
+JOB_MAX_PENDING = 8  # Queued plus running jobs before new uploads are refused
+JOB_MAX_PER_OWNER = 2  # Queued plus running jobs per session
+JOB_RESULT_TTL = 3600  # Seconds finished job outputs are kept before cleanup
+JOB_OUTPUT_DIR = None  # Directory for job outputs; None uses a folder in the temp directory
+
+# Upload and Output Streaming Configuration (web app)
+UPLOAD_CHUNK_MB = 8  # Uploaded videos are copied to disk in chunks of this size
+OUTPUT_INLINE_MAX_MB = 50  # Without the output server, larger outputs are not loaded into memory for display
+OUTPUT_SERVER_PORT = None  # Port streaming job outputs from disk with range requests (see scripts/output_server.py and DEPLOYMENT.md); None embeds them in the page
+OUTPUT_SERVER_HOST = "127.0.0.1"  # Use "0.0.0.0" when the browser runs on another machine
+OUTPUT_SERVER_URL = None  # Public base URL of the output server (e.g. behind a reverse proxy); None uses http://localhost:<port>
+
+# Live Stream Configuration (scripts/detect_stream.py)
+STREAM_LATENCY_BUDGET = 1.0  # Seconds from capture to detections before a frame counts as late
+STREAM_RECONNECT_ATTEMPTS = 5  # Times a dropped camera/RTSP connection is reopened (0 = give up at once)
+STREAM_RECONNECT_DELAY = 2.0  # Seconds between reconnection attempts
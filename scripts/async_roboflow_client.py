@@ -0,0 +1,143 @@
+# scripts/async_roboflow_client.py
+# This script defines an asyncio front end to the pooled Roboflow client for video and
+# batch workloads. It keeps a configurable number of requests in flight, enforces a
+# client-side rate limit, and returns the results in input order.
+# Requests run on a thread pool over the shared keep-alive session from roboflow_client.py,
+# so no extra HTTP dependency is needed.
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import API_CONCURRENCY, API_RATE_LIMIT, CONF_THRESHOLD
+from image_io import encode_image
+from roboflow_client import get_client
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how many requests start per second.
+
+    Args:
+        rate (float): Requests per second. 0 or None disables the limit.
+        burst (int): Requests that may start back to back after an idle period.
+    """
+
+    def __init__(self, rate=API_RATE_LIMIT, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncRoboflowClient:
+    """
+    Sends many prediction requests concurrently.
+
+    Args:
+        client (RoboflowClient): The pooled client used for the requests. Defaults to the shared one.
+        concurrency (int): Maximum requests in flight.
+        rate_limit (float): Maximum requests started per second (0 disables the limit).
+        confidence (float): Minimum confidence of returned predictions.
+        encoder (callable): Turns an image into the bytes to upload. Defaults to encode_image().
+    """
+
+    def __init__(self, client=None, concurrency=API_CONCURRENCY, rate_limit=API_RATE_LIMIT,
+                 confidence=CONF_THRESHOLD, encoder=encode_image):
+        self.client = client or get_client()
+        self.concurrency = max(1, int(concurrency))
+        self.rate_limit = rate_limit
+        self.confidence = confidence
+        self.encoder = encoder
+
+    async def predict_many(self, images):
+        """
+        Predicts on all images with at most `concurrency` requests in flight.
+
+        Images are encoded on the worker threads, so encoding overlaps with network waits.
+
+        Returns:
+            list: The prediction JSON dicts, in input order.
+
+        Raises:
+            Exception: The first error raised by any request.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate_limit, burst=self.concurrency)
+
+        def request(image):
+            return self.client.predict(self.encoder(image), confidence=self.confidence)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="roboflow") as executor:
+            async def predict(image):
+                async with semaphore:
+                    await limiter.acquire()
+                    return await loop.run_in_executor(executor, request, image)
+
+            return await asyncio.gather(*(predict(image) for image in images))
+
+    def predict_all(self, images):
+        """
+        Blocking wrapper around predict_many() for synchronous callers.
+
+        Returns:
+            list: The prediction JSON dicts, in input order.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.predict_many(images))
+        # Called from inside a running event loop: run on a separate thread with its own loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.predict_many(images)).result()
+
+
+def main():
+    """
+    Shows throughput scaling with concurrency against a local stub server with added latency.
+    """
+    import argparse
+    from mock_roboflow_server import MockRoboflowServer
+    from roboflow_client import RoboflowClient
+
+    parser = argparse.ArgumentParser(description="Measure API throughput at several concurrency levels")
+    parser.add_argument('--frames', type=int, default=64, help="Requests per run")
+    parser.add_argument('--latency', type=float, default=0.1, help="Simulated server latency in seconds")
+    parser.add_argument('--concurrency', default="1,2,4,8,16", help="Comma-separated concurrency levels")
+    parser.add_argument('--rate-limit', type=float, default=0, help="Requests per second (0 = unlimited)")
+    args = parser.parse_args()
+
+    frames = [b'\xff\xd8' + os.urandom(30_000) for _ in range(args.frames)]
+    with MockRoboflowServer(latency=args.latency) as server:
+        for level in (int(c) for c in args.concurrency.split(',')):
+            with RoboflowClient(api_key='test', model_id="snake-detection/1", api_url=server.url,
+                                pool_size=level) as client:
+                async_client = AsyncRoboflowClient(client, concurrency=level, rate_limit=args.rate_limit)
+                start = time.perf_counter()
+                async_client.predict_all(frames)
+                elapsed = time.perf_counter() - start
+            print(f"concurrency {level:>3}: {args.frames / elapsed:7.1f} frames/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+# scripts/benchmark.py
+# This script is the reproducible performance benchmark of the detection paths.
+# It generates synthetic images and videos at several resolutions, runs them through
+# detect(), detect_batch() and detect_video() for each backend, and reports p50/p95
+# latency, throughput, peak RSS (and, per video job, the memory held compared with
+# VIDEO_MEMORY_BUDGET_MB) and model load time as JSON. The API backend talks to
+# the local stub server (mock_roboflow_server.py) with a configurable latency, so no
+# API key or network is needed.
+#
+# Compare a run against a saved baseline with --baseline; --fail-on-regression makes
+# the command exit with status 1 when a metric got worse by more than --threshold percent.
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import LOCAL_DEVICE, API_CONCURRENCY, VIDEO_DETECTION_STRIDE, VIDEO_MEMORY_BUDGET_MB
+
+# Metrics compared against a baseline, and whether a higher value is better
+COMPARED_METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'throughput': True,
+    'peak_rss_mb': False,
+    'rss_growth_mb': False,
+    'load_ms': False,
+}
+
+
+def percentile(values, q):
+    """Returns the q-th percentile (0-100) of values with linear interpolation."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def reset_peak_rss():
+    """Resets the kernel's peak RSS counter of this process (Linux only). Returns True on success."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident memory of this process in MB, or None if it cannot be read.
+
+    On Linux this is the peak since the last reset_peak_rss(); elsewhere it is the peak
+    since the process started.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def current_rss_mb():
+    """Returns the current resident memory of this process in MB, or None if it cannot be read."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def parse_resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def synthetic_image(width, height, seed):
+    """Returns a BGR image with a textured background and a few snake-like curves."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 160, width, dtype=np.float32)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    for channel in range(3):
+        noise = rng.normal(0, 18, (height, width)).astype(np.float32)
+        image[:, :, channel] = np.clip(gradient[None, :] * (0.7 + 0.15 * channel) + noise, 0, 255)
+    for _ in range(3):
+        points = np.cumsum(rng.normal(0, width / 40, (12, 2)), axis=0) + [width / 2, height / 2]
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.polylines(image, [points.astype(np.int32)], False, color, max(2, width // 100))
+    return image
+
+
+def generate_images(workdir, resolution, count, seed=0):
+    """Writes count distinct synthetic JPEG images at a resolution and returns their paths."""
+    import cv2
+
+    width, height = resolution
+    paths = []
+    for i in range(count):
+        path = os.path.join(workdir, f"image_{width}x{height}_{i}.jpg")
+        cv2.imwrite(path, synthetic_image(width, height, seed + i))
+        paths.append(path)
+    return paths
+
+
+def generate_video(workdir, resolution, frames, fps=30, seed=0):
+    """Writes a synthetic MP4 with a curve moving over a static background and returns its path."""
+    import cv2
+
+    width, height = resolution
+    path = os.path.join(workdir, f"video_{width}x{height}.mp4")
+    background = synthetic_image(width, height, seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    try:
+        for f in range(frames):
+            frame = background.copy()
+            x = int((f / max(1, frames - 1)) * (width * 0.6)) + width // 5
+            cv2.ellipse(frame, (x, height // 2), (width // 10, height // 20), 15, 0, 360,
+                        (40, 90, 40), max(2, width // 120))
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+@contextlib.contextmanager
+def measured(quiet=True):
+    """
+    Silences detection messages and records the wall time, peak RSS and RSS growth
+    (peak minus the RSS at the start) of a block.
+    """
+    result = {}
+    reset_peak_rss()
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+        yield result
+    result['seconds'] = time.perf_counter() - start
+    result['peak_rss_mb'] = peak_rss_mb()
+    if result['peak_rss_mb'] is not None and rss_before is not None:
+        result['rss_growth_mb'] = max(0.0, result['peak_rss_mb'] - rss_before)
+
+
+def latency_summary(latencies):
+    """Summarizes per-item latencies in seconds."""
+    total = sum(latencies)
+    return {
+        'count': len(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'mean_ms': total / len(latencies) * 1000,
+        'throughput': len(latencies) / total if total > 0 else None,
+    }
+
+
+def bench_model_load():
+    """Measures a cold load (including warmup) of the local model through the registry."""
+    from detect_local import get_local_model
+    from model_registry import get_registry
+
+    get_registry().clear()
+    with measured() as m:
+        get_local_model()
+    return {'load_ms': m['seconds'] * 1000, 'peak_rss_mb': m['peak_rss_mb']}
+
+
+def bench_images(paths, backend, repeats, quiet=True):
+    """Runs detect() on every image `repeats` times, after one untimed warmup call."""
+    from detect import detect
+
+    def run(path):
+        predictions, method, error_msg = detect(path, backend, use_cache=False)
+        if error_msg:
+            raise Exception(error_msg)
+
+    with measured(quiet):
+        run(paths[0])
+    latencies = []
+    with measured(quiet) as m:
+        for _ in range(repeats):
+            for path in paths:
+                start = time.perf_counter()
+                run(path)
+                latencies.append(time.perf_counter() - start)
+    return {**latency_summary(latencies), 'peak_rss_mb': m['peak_rss_mb']}
+
+
+def bench_batch(paths, backend, quiet=True):
+    """Runs detect_batch() once over all images."""
+    from detect import detect_batch
+
+    with measured(quiet) as m:
+        predictions, method, error_msg = detect_batch(paths, backend, use_cache=False)
+    if error_msg:
+        raise Exception(error_msg)
+    return {
+        'count': len(paths),
+        'seconds': m['seconds'],
+        'throughput': len(paths) / m['seconds'],
+        'peak_rss_mb': m['peak_rss_mb'],
+    }
+
+
+def bench_video(video_path, backend, output_path, stride, quiet=True):
+    """
+    Runs detect_video() on a video. Latency percentiles are taken over the intervals
+    between consecutive frames delivered to the progress callback. The memory held by
+    the job (RSS growth) is reported next to VIDEO_MEMORY_BUDGET_MB and the frame
+    buffer size detect_video() chose to stay within it.
+    """
+    from detect_video import detect_video
+
+    stamps = []
+    with measured(quiet) as m:
+        start = time.perf_counter()
+        _, method, error_msg, stats = detect_video(
+            video_path, lambda current, total: stamps.append(time.perf_counter()),
+            backend, output_path=output_path, stride=stride)
+    if error_msg:
+        raise Exception(error_msg)
+    intervals = [b - a for a, b in zip([start] + stamps, stamps)]
+    summary = latency_summary(intervals)
+    summary.update({
+        'seconds': m['seconds'],
+        'throughput': stats['processing_fps'],
+        'inference_frames': stats['inference_frames'],
+        'peak_rss_mb': m['peak_rss_mb'],
+        'rss_growth_mb': m.get('rss_growth_mb'),
+        'memory_budget_mb': VIDEO_MEMORY_BUDGET_MB,
+        'frame_buffer_mb': stats['frame_buffer_mb'],
+    })
+    return summary
+
+
+def run_benchmarks(args, workdir):
+    """Runs every selected case and returns the list of result dicts."""
+    from mock_roboflow_server import MockRoboflowServer
+    from roboflow_client import RoboflowClient, set_client
+
+    resolutions = [parse_resolution(r) for r in args.resolutions.split(',')]
+    backends = args.backends.split(',')
+    quiet = not args.verbose
+
+    print("Generating synthetic inputs...")
+    images = {res: generate_images(workdir, res, args.images, args.seed) for res in resolutions}
+    videos = {res: generate_video(workdir, res, args.video_frames, seed=args.seed) for res in resolutions}
+
+    results = []
+
+    def case(name, backend, resolution, fn, *fn_args):
+        print(f"  {name}...", flush=True)
+        record = {'name': name, 'backend': backend,
+                  'resolution': f"{resolution[0]}x{resolution[1]}" if resolution else None}
+        try:
+            record.update(fn(*fn_args))
+        except Exception as e:
+            record['error'] = str(e)
+            print(f"    failed: {e}")
+        results.append(record)
+
+    with MockRoboflowServer(latency=args.latency) as server:
+        set_client(RoboflowClient(api_key='benchmark', model_id="snake-detection/1", api_url=server.url))
+        try:
+            for backend in backends:
+                print(f"Backend: {backend}")
+                if backend == "local":
+                    case("model_load/local", backend, None, bench_model_load)
+                for res in resolutions:
+                    label = f"{res[0]}x{res[1]}"
+                    case(f"image/{backend}/{label}", backend, res, bench_images, images[res], backend,
+                         args.repeats, quiet)
+                    case(f"batch/{backend}/{label}", backend, res, bench_batch, images[res], backend, quiet)
+                    if not args.skip_video:
+                        output_path = os.path.join(workdir, f"out_{backend}_{label}.mp4")
+                        case(f"video/{backend}/{label}", backend, res, bench_video, videos[res], backend,
+                             output_path, args.stride, quiet)
+        finally:
+            set_client(None)
+    return results
+
+
+def run_metadata(args):
+    """Returns the environment and settings a result file was produced with."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {
+            'backends': args.backends,
+            'resolutions': args.resolutions,
+            'images': args.images,
+            'repeats': args.repeats,
+            'video_frames': args.video_frames,
+            'stride': args.stride,
+            'api_latency': args.latency,
+            'seed': args.seed,
+            'local_device': LOCAL_DEVICE,
+            'video_memory_budget_mb': VIDEO_MEMORY_BUDGET_MB,
+            'api_concurrency': API_CONCURRENCY,
+        },
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results with a baseline run, case by case.
+
+    Returns:
+        list: (case name, metric, baseline value, current value, change in percent, regressed) tuples.
+    """
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    rows = []
+    for record in results:
+        old = previous.get(record['name'])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = old.get(metric), record.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            rows.append((record['name'], metric, before, after, change, worse > threshold))
+    return rows
+
+
+def print_results(results):
+    print(f"\n{'case':<28} {'p50 ms':>9} {'p95 ms':>9} {'items/s':>9} {'peak MB':>9} {'+RSS MB':>9} {'load ms':>9}")
+
+    def fmt(value, spec=".1f"):
+        return format(value, spec) if value is not None else "-"
+
+    for r in results:
+        if 'error' in r:
+            print(f"{r['name']:<28} error: {r['error']}")
+            continue
+        print(f"{r['name']:<28} {fmt(r.get('p50_ms')):>9} {fmt(r.get('p95_ms')):>9} "
+              f"{fmt(r.get('throughput')):>9} {fmt(r.get('peak_rss_mb')):>9} {fmt(r.get('rss_growth_mb')):>9} "
+              f"{fmt(r.get('load_ms')):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image, batch and video detection for each backend")
+    parser.add_argument('--backends', default="api,local", help="Comma-separated backends: api, local")
+    parser.add_argument('--resolutions', default="640x480,1280x720,1920x1080",
+                        help="Comma-separated WIDTHxHEIGHT sizes of the synthetic inputs")
+    parser.add_argument('--images', type=int, default=8, help="Distinct synthetic images per resolution")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed passes over the images")
+    parser.add_argument('--video-frames', type=int, default=90, help="Frames of each synthetic video")
+    parser.add_argument('--stride', type=int, default=VIDEO_DETECTION_STRIDE, help="Video detection stride")
+    parser.add_argument('--skip-video', action='store_true', help="Skip the video cases")
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated API latency in seconds")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic inputs")
+    parser.add_argument('--output', default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0, help="Regression threshold in percent")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 if any metric regressed beyond the threshold")
+    parser.add_argument('--workdir', help="Directory for the generated inputs (default: a temporary one)")
+    parser.add_argument('--verbose', action='store_true', help="Show detection messages while measuring")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="snake_benchmark_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_benchmarks(args, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+    with open(args.output, 'w') as f:
+        json.dump({'meta': run_metadata(args), 'results': results}, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\nCompared with {args.baseline} (commit {baseline.get('meta', {}).get('commit')}):")
+        for name, metric, before, after, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<28} {metric:<12} {before:>10.2f} -> {after:>10.2f} ({change:+.1f}%){flag}")
+        regressions = [row for row in rows if row[5]]
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0f}%")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print("No regressions beyond the threshold.")
+
+
+if __name__ == "__main__":
+    main()
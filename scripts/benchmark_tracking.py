@@ -0,0 +1,175 @@
+# scripts/benchmark_tracking.py
+# This script measures what box propagation between sampled frames gains and costs.
+# For several detection strides it reports the reduction in detector calls (and the
+# resulting speedup) and how far the propagated boxes drift from per-frame detections.
+#
+# Reference boxes come either from a synthetic scene with known moving objects
+# (--synthetic, no model needed) or from running the local model on every frame of a video.
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+from tracking import BoxTracker, box_iou
+
+
+def synthetic_reference(num_frames=600, num_objects=3, width=1280, height=720, seed=0):
+    """
+    Builds per-frame reference detections for objects moving on smooth curved paths.
+
+    Returns:
+        list: One list of detections per frame (frame 1 first).
+    """
+    rng = random.Random(seed)
+    objects = []
+    for _ in range(num_objects):
+        objects.append({
+            'x': rng.uniform(0.2, 0.8) * width,
+            'y': rng.uniform(0.2, 0.8) * height,
+            'vx': rng.uniform(-3, 3),
+            'vy': rng.uniform(-2, 2),
+            'amp': rng.uniform(10, 60),
+            'period': rng.uniform(90, 240),
+            'w': rng.uniform(60, 200),
+            'h': rng.uniform(40, 120),
+        })
+
+    frames = []
+    for f in range(num_frames):
+        detections = []
+        for obj in objects:
+            cx = obj['x'] + obj['vx'] * f + obj['amp'] * math.sin(2 * math.pi * f / obj['period'])
+            cy = obj['y'] + obj['vy'] * f
+            cx = min(max(cx, obj['w'] / 2), width - obj['w'] / 2)
+            cy = min(max(cy, obj['h'] / 2), height - obj['h'] / 2)
+            detections.append({
+                'class': 'snake',
+                'confidence': 0.9,
+                'box': [cx - obj['w'] / 2, cy - obj['h'] / 2, cx + obj['w'] / 2, cy + obj['h'] / 2],
+            })
+        frames.append(detections)
+    return frames
+
+
+def video_reference(video_path):
+    """
+    Runs the local model on every frame of a video to build reference detections.
+
+    Returns:
+        tuple: (per-frame detections, seconds of inference per frame)
+    """
+    import cv2
+    from detect import detect_batch
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise Exception(f"Failed to open video file: {video_path}")
+    frames, seconds = [], 0.0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            start = time.perf_counter()
+            predictions, method, error_msg = detect_batch([frame], "local")
+            seconds += time.perf_counter() - start
+            if error_msg:
+                raise Exception(error_msg)
+            frames.append(predictions[0].to_records())
+    finally:
+        cap.release()
+    return frames, seconds / max(1, len(frames))
+
+
+def evaluate_stride(reference, stride, inference_seconds):
+    """
+    Feeds the reference detections of sampled frames to the tracker and compares
+    the propagated boxes with the reference on every other frame.
+
+    Returns:
+        dict: Detector calls, speedup, mean IoU, recall at IoU 0.5 and track count.
+    """
+    tracker = BoxTracker()
+    ious, matched, expected = [], 0, 0
+    detector_calls = 0
+    tracker_seconds = 0.0
+
+    for index, detections in enumerate(reference):
+        frame_number = index + 1
+        start = time.perf_counter()
+        if frame_number == 1 or frame_number % stride == 0:
+            detector_calls += 1
+            tracker.update(frame_number, detections)
+            tracker_seconds += time.perf_counter() - start
+            continue
+        propagated = tracker.predict(frame_number)
+        tracker_seconds += time.perf_counter() - start
+
+        expected += len(detections)
+        used = set()
+        for det in detections:
+            best, best_index = 0.0, None
+            for i, record in enumerate(propagated):
+                if i in used:
+                    continue
+                iou = box_iou(det['box'], record['box'])
+                if iou > best:
+                    best, best_index = iou, i
+            ious.append(best)
+            if best_index is not None:
+                used.add(best_index)
+            if best >= 0.5:
+                matched += 1
+
+    frames = len(reference)
+    baseline_seconds = frames * inference_seconds
+    strided_seconds = detector_calls * inference_seconds + tracker_seconds
+    return {
+        'stride': stride,
+        'detector_calls': detector_calls,
+        'call_reduction': frames / max(1, detector_calls),
+        'speedup': baseline_seconds / strided_seconds if strided_seconds > 0 else None,
+        'tracker_ms_per_frame': tracker_seconds / max(1, frames) * 1000,
+        'mean_iou': sum(ious) / len(ious) if ious else None,
+        'recall_at_0_5': matched / expected if expected else None,
+        'tracks': tracker.total_tracks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark box propagation at different detection strides")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', help="Video to run the local model on (every frame is the reference)")
+    source.add_argument('--synthetic', action='store_true', help="Use a synthetic scene with known motion")
+    parser.add_argument('--strides', default="1,5,10,15,30", help="Comma-separated strides to evaluate")
+    parser.add_argument('--frames', type=int, default=600, help="Synthetic scene length")
+    parser.add_argument('--inference-ms', type=float, default=50.0,
+                        help="Detector latency assumed for the synthetic scene")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.video:
+        reference, inference_seconds = video_reference(args.video)
+    else:
+        reference, inference_seconds = synthetic_reference(args.frames), args.inference_ms / 1000
+
+    results = [evaluate_stride(reference, int(s), inference_seconds) for s in args.strides.split(',')]
+
+    print(f"{'stride':>6} {'calls':>6} {'speedup':>8} {'mean IoU':>9} {'recall@.5':>10} {'tracks':>7}")
+    for r in results:
+        mean_iou = f"{r['mean_iou']:.3f}" if r['mean_iou'] is not None else "-"
+        recall = f"{r['recall_at_0_5']:.3f}" if r['recall_at_0_5'] is not None else "-"
+        print(f"{r['stride']:>6} {r['detector_calls']:>6} {r['speedup']:>7.1f}x {mean_iou:>9} {recall:>10} {r['tracks']:>7}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'inference_ms': inference_seconds * 1000, 'frames': len(reference), 'results': results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
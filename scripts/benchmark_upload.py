@@ -0,0 +1,108 @@
+# scripts/benchmark_upload.py
+# This script measures what client-side resizing and recompression saves on API uploads.
+# Synthetic camera-sized photos are sent to the local stub server (mock_roboflow_server.py)
+# twice: as the original files, and prepared by image_io.prepare_upload() at the given
+# size and format. The stub's simulated bandwidth makes transfer time grow with the bytes
+# sent, as on a real uplink. The report shows the bytes sent, the p50 latency (prepare plus
+# request) and the latency saved per resolution.
+#
+# Example:
+#   python benchmark_upload.py --resolutions 1920x1080,4032x3024 --bandwidth 2000000
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import API_UPLOAD_MAX_SIZE, API_UPLOAD_FORMAT, API_JPEG_QUALITY
+from benchmark import percentile, parse_resolution, generate_images
+from image_io import prepare_upload
+
+
+def run_case(client, paths, max_size, ext, quality):
+    """
+    Uploads every image once, prepared with the given settings.
+
+    Returns:
+        dict: bytes sent per image, p50 prepare and request latency in ms, and the last result's
+            (original size, sent size).
+    """
+    sent, prepare, request = [], [], []
+    info = None
+    for path in paths:
+        start = time.perf_counter()
+        data, info = prepare_upload(path, max_size, ext, quality)
+        prepare.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        client.predict(data)
+        request.append(time.perf_counter() - start)
+        sent.append(len(data))
+    return {
+        'bytes': sum(sent) / len(sent),
+        'prepare_ms': percentile(prepare, 50) * 1000,
+        'request_ms': percentile(request, 50) * 1000,
+        'total_ms': percentile([p + r for p, r in zip(prepare, request)], 50) * 1000,
+        'sizes': (info['original_size'], info['sent_size']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes and latency saved by preparing API uploads")
+    parser.add_argument('--resolutions', default="1280x720,1920x1080,4032x3024", help="Comma-separated WxH")
+    parser.add_argument('--images', type=int, default=5, help="Images per resolution")
+    parser.add_argument('--max-size', type=int, default=API_UPLOAD_MAX_SIZE or 640,
+                        help="Longer side of prepared uploads")
+    parser.add_argument('--format', default=API_UPLOAD_FORMAT, choices=[".jpg", ".webp"], help="Encoding of prepared uploads")
+    parser.add_argument('--quality', type=int, default=API_JPEG_QUALITY, help="JPEG/WebP quality")
+    parser.add_argument('--latency', type=float, default=0.05, help="Stub server latency per request in seconds")
+    parser.add_argument('--bandwidth', type=float, default=2_000_000,
+                        help="Simulated upload speed in bytes/s (0 = unlimited)")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    from mock_roboflow_server import MockRoboflowServer
+    from roboflow_client import RoboflowClient
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir, \
+            MockRoboflowServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+        client = RoboflowClient(api_key='benchmark', model_id="snake-detection/1", api_url=server.url)
+        try:
+            for resolution in args.resolutions.split(','):
+                paths = generate_images(workdir, parse_resolution(resolution), args.images)
+                original = run_case(client, paths, 0, args.format, args.quality)
+                prepared = run_case(client, paths, args.max_size, args.format, args.quality)
+                (width, height), sent_size = prepared['sizes']
+                rows.append({
+                    'resolution': f"{width}x{height}",
+                    'sent_size': f"{sent_size[0]}x{sent_size[1]}",
+                    'original_kb': original['bytes'] / 1024,
+                    'prepared_kb': prepared['bytes'] / 1024,
+                    'bytes_saved_pct': (1 - prepared['bytes'] / original['bytes']) * 100,
+                    'original_ms': original['total_ms'],
+                    'prepared_ms': prepared['total_ms'],
+                    'prepare_ms': prepared['prepare_ms'],
+                    'latency_saved_ms': original['total_ms'] - prepared['total_ms'],
+                })
+        finally:
+            client.close()
+
+    print(f"\n{'resolution':<11} {'sent as':<10} {'original KB':>11} {'prepared KB':>11} {'saved':>6} "
+          f"{'original ms':>11} {'prepared ms':>11} {'saved ms':>9}")
+    for r in rows:
+        print(f"{r['resolution']:<11} {r['sent_size']:<10} {r['original_kb']:>11.1f} {r['prepared_kb']:>11.1f} "
+              f"{r['bytes_saved_pct']:>5.0f}% {r['original_ms']:>11.1f} {r['prepared_ms']:>11.1f} "
+              f"{r['latency_saved_ms']:>9.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'max_size': args.max_size, 'format': args.format, 'quality': args.quality,
+                       'latency': args.latency, 'bandwidth': args.bandwidth, 'results': rows}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
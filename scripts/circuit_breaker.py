@@ -0,0 +1,151 @@
+# scripts/circuit_breaker.py
+# This script defines a circuit breaker for a detection backend.
+# It counts consecutive failures and, once a threshold is reached, "opens" so callers
+# can skip the backend instead of waiting for another failed request or timeout.
+# While open, the backend is probed on a background thread with exponential backoff
+# and the circuit closes again as soon as a probe succeeds. State changes are
+# recorded in the metrics registry and printed as structured log lines.
+
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import (CIRCUIT_BREAKER_ENABLED, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_PROBE_INTERVAL,
+                    CIRCUIT_PROBE_MAX_INTERVAL)
+from metrics import get_metrics, log_event
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of a backend.
+
+    Args:
+        name (str): Backend name used in metrics and log lines.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        probe_interval (float): Seconds before the first probe after the circuit opens.
+            The interval doubles after every failed probe.
+        max_probe_interval (float): Upper bound of the probe interval.
+        probe (callable): Called without arguments on a background thread to check
+            whether the backend is back; it should raise on failure. Without a probe,
+            the circuit goes half-open after the interval and lets one real call through.
+        enabled (bool): When False the circuit never opens.
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, probe_interval=CIRCUIT_PROBE_INTERVAL,
+                 max_probe_interval=CIRCUIT_PROBE_MAX_INTERVAL, probe=None, enabled=CIRCUIT_BREAKER_ENABLED):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.probe = probe
+        self.enabled = enabled
+        self.state = CLOSED
+        self.stats = {'failures': 0, 'successes': 0, 'opened': 0, 'probes': 0, 'probe_failures': 0,
+                      'short_circuited': 0}
+        self._consecutive_failures = 0
+        self._interval = probe_interval
+        self._retry_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._probe_thread = None
+
+    def allow(self):
+        """
+        Returns True if a call to the backend should be attempted. Calls that are
+        not allowed are counted as short-circuited.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.probe is None and time.monotonic() >= self._retry_at:
+                self._set_state(HALF_OPEN, "probe interval elapsed")
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.stats['short_circuited'] += 1
+        get_metrics().inc('circuit_short_circuited_total', breaker=self.name)
+        return False
+
+    def record_success(self):
+        """Records a successful call; closes the circuit if it was not closed."""
+        with self._lock:
+            self.stats['successes'] += 1
+            self._consecutive_failures = 0
+            self._trial_running = False
+            if self.state != CLOSED:
+                self._interval = self.probe_interval
+                self._set_state(CLOSED, "call succeeded")
+
+    def record_failure(self, error=None):
+        """Records a failed call; opens the circuit once the threshold is reached."""
+        with self._lock:
+            self.stats['failures'] += 1
+            self._consecutive_failures += 1
+            if not self.enabled:
+                return
+            if self.state == HALF_OPEN:
+                # The trial call failed: back off further before the next one
+                self._trial_running = False
+                self._interval = min(self._interval * 2, self.max_probe_interval)
+                self._open(f"trial call failed: {error}")
+            elif self.state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._interval = self.probe_interval
+                self._open(f"{self._consecutive_failures} consecutive failures, last: {error}")
+
+    def close(self):
+        """Stops the background probe."""
+        self._stop_event.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join(timeout=1.0)
+
+    def _open(self, reason):
+        self.stats['opened'] += 1
+        self._retry_at = time.monotonic() + self._interval
+        self._set_state(OPEN, reason)
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f"{self.name}-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _set_state(self, state, reason):
+        # Called with the lock held
+        previous, self.state = self.state, state
+        get_metrics().inc('circuit_transitions_total', breaker=self.name, state=state)
+        log_event('circuit', breaker=self.name, previous=previous, state=state, reason=reason)
+        print(f"Circuit for {self.name} is now {state}: {reason}")
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                if self.state == CLOSED:
+                    return
+                delay = max(0.0, self._retry_at - time.monotonic())
+            if self._stop_event.wait(delay):
+                return
+
+            with self._lock:
+                self.stats['probes'] += 1
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self.stats['probe_failures'] += 1
+                    self._interval = min(self._interval * 2, self.max_probe_interval)
+                    self._retry_at = time.monotonic() + self._interval
+                get_metrics().inc('circuit_probes_total', breaker=self.name, outcome="error")
+                print(f"Probe of {self.name} failed, next in {self._interval:.1f}s: {e}")
+                continue
+
+            get_metrics().inc('circuit_probes_total', breaker=self.name, outcome="ok")
+            with self._lock:
+                self._consecutive_failures = 0
+                self._interval = self.probe_interval
+                if self.state != CLOSED:
+                    self._set_state(CLOSED, "probe succeeded")
+            return
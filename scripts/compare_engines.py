@@ -0,0 +1,197 @@
+# scripts/compare_engines.py
+# This script compares the local inference engines (engines.py) with the PyTorch baseline.
+# Every engine runs the same images; the report shows p50/p95 latency and the speedup over
+# PyTorch, and how well the detections agree with the PyTorch ones: recall and precision of
+# the baseline boxes at IoU 0.5 (same class), the mean IoU of matched boxes and the mean
+# confidence difference. Use it to check an export or int8 quantization before switching
+# LOCAL_ENGINE in production.
+#
+# Example:
+#   python engines.py export --engine all --int8
+#   python compare_engines.py ../data/samples --repeats 5 --json engines.json
+
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import LOCAL_MODEL_PATH, LOCAL_DEVICE, CONF_THRESHOLD
+from engines import ENGINES, INT8_ENGINES, artifact_path, export_model
+from model_registry import get_model
+from detect_images import collect_images
+from benchmark import percentile
+from tracking import box_iou
+
+DEFAULT_ENGINES = "pytorch,onnx,onnx-int8,openvino,torchscript"
+
+
+def parse_engine(name):
+    """Splits "onnx-int8" into ("onnx", True)."""
+    if name.endswith("-int8"):
+        return name[:-len("-int8")], True
+    return name, False
+
+
+def match_detections(baseline, candidate, iou_threshold=0.5):
+    """
+    Greedily matches candidate boxes to baseline boxes of the same class, best IoU first.
+
+    Returns:
+        list: (baseline index, candidate index, IoU) for every matched pair.
+    """
+    pairs = []
+    for i in range(len(baseline)):
+        for j in range(len(candidate)):
+            if baseline.class_id[i] != candidate.class_id[j]:
+                continue
+            iou = box_iou(baseline.xyxy[i].tolist(), candidate.xyxy[j].tolist())
+            if iou >= iou_threshold:
+                pairs.append((iou, i, j))
+    pairs.sort(reverse=True)
+    used_i, used_j, matches = set(), set(), []
+    for iou, i, j in pairs:
+        if i in used_i or j in used_j:
+            continue
+        used_i.add(i)
+        used_j.add(j)
+        matches.append((i, j, iou))
+    return matches
+
+
+def agreement(baseline_results, candidate_results, iou_threshold=0.5):
+    """
+    Summarises how well an engine's detections agree with the baseline over all images.
+
+    Returns:
+        dict: recall and precision against the baseline, mean IoU and mean absolute
+            confidence difference of the matched boxes, and the detection counts.
+    """
+    matched, ious, conf_diffs = 0, [], []
+    baseline_total = candidate_total = 0
+    for baseline, candidate in zip(baseline_results, candidate_results):
+        baseline_total += len(baseline)
+        candidate_total += len(candidate)
+        for i, j, iou in match_detections(baseline, candidate, iou_threshold):
+            matched += 1
+            ious.append(iou)
+            conf_diffs.append(abs(float(baseline.confidence[i]) - float(candidate.confidence[j])))
+    return {
+        'baseline_detections': baseline_total,
+        'detections': candidate_total,
+        'recall': matched / baseline_total if baseline_total else None,
+        'precision': matched / candidate_total if candidate_total else None,
+        'mean_iou': sum(ious) / len(ious) if ious else None,
+        'mean_conf_diff': sum(conf_diffs) / len(conf_diffs) if conf_diffs else None,
+    }
+
+
+def run_engine(engine, int8, images, repeats, weights_path=LOCAL_MODEL_PATH):
+    """
+    Runs every image through one engine.
+
+    Returns:
+        tuple: (Detections per image from the first repeat, per-call latencies in seconds,
+            model load seconds)
+    """
+    from detections import Detections
+
+    path = artifact_path(engine, weights_path, int8)
+    settings = {} if engine == "pytorch" else {'task': "detect"}
+    start = time.perf_counter()
+    model = get_model(path, LOCAL_DEVICE, **settings)
+    load_seconds = time.perf_counter() - start
+
+    results, latencies = [], []
+    for repeat in range(repeats):
+        for image in images:
+            start = time.perf_counter()
+            output = model(image, conf=CONF_THRESHOLD, device=LOCAL_DEVICE, verbose=False)
+            latencies.append(time.perf_counter() - start)
+            if repeat == 0:
+                results.append(Detections.from_ultralytics(output[0]))
+    return results, latencies, load_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare local inference engines with the PyTorch baseline")
+    parser.add_argument('inputs', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('--engines', default=DEFAULT_ENGINES,
+                        help=f"Comma-separated engines to compare (default: {DEFAULT_ENGINES})")
+    parser.add_argument('--repeats', type=int, default=3, help="Times each image is run per engine")
+    parser.add_argument('--iou', type=float, default=0.5, help="IoU at which two boxes count as the same detection")
+    parser.add_argument('--export', action='store_true', help="Create missing exports instead of skipping them")
+    parser.add_argument('--recursive', action='store_true', help="Search directories recursively")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    import cv2
+
+    images = []
+    for path, _ in collect_images(args.inputs, args.recursive):
+        image = cv2.imread(path)
+        if image is not None:
+            images.append(image)
+    if not images:
+        print("Error: no images found")
+        sys.exit(1)
+
+    engines = [parse_engine(name.strip()) for name in args.engines.split(',') if name.strip()]
+    if ("pytorch", False) in engines:
+        engines.remove(("pytorch", False))
+    engines.insert(0, ("pytorch", False))
+
+    rows, baseline, baseline_p50 = [], None, None
+    for engine, int8 in engines:
+        name = f"{engine}-int8" if int8 else engine
+        if engine not in ENGINES or (int8 and engine not in INT8_ENGINES):
+            print(f"Skipping {name}: unknown engine")
+            continue
+        if not os.path.exists(artifact_path(engine, LOCAL_MODEL_PATH, int8)):
+            if not args.export:
+                print(f"Skipping {name}: not exported (run engines.py export or pass --export)")
+                continue
+            export_model(engine, LOCAL_MODEL_PATH, int8)
+
+        print(f"Running {name} on {len(images)} images x {args.repeats}...")
+        try:
+            results, latencies, load_seconds = run_engine(engine, int8, images, args.repeats)
+        except Exception as e:
+            if engine == "pytorch":
+                print(f"Error: the PyTorch baseline failed: {e}")
+                sys.exit(1)
+            print(f"Skipping {name}: {e}")
+            continue
+        p50 = percentile(latencies, 50)
+        if baseline is None:
+            baseline, baseline_p50 = results, p50
+        row = {
+            'engine': name,
+            'load_seconds': load_seconds,
+            'p50_ms': p50 * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'speedup': baseline_p50 / p50 if p50 else None,
+        }
+        row.update(agreement(baseline, results, args.iou))
+        rows.append(row)
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    print(f"\n{'engine':<12} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8} "
+          f"{'recall':>7} {'precision':>9} {'mean IoU':>9} {'conf diff':>9}")
+    for r in rows:
+        print(f"{r['engine']:<12} {r['load_seconds']:>7.2f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{fmt(r['speedup'], '.2f'):>7}x {fmt(r['recall'], '.3f'):>7} {fmt(r['precision'], '.3f'):>9} "
+              f"{fmt(r['mean_iou'], '.3f'):>9} {fmt(r['mean_conf_diff'], '.3f'):>9}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'images': len(images), 'repeats': args.repeats, 'device': LOCAL_DEVICE,
+                       'results': rows}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
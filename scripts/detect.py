@@ -2,34 +2,132 @@
 # This is the main entry point for the object detection system.
 # It orchestrates the detection process by first attempting to use the
 # Roboflow API and falling back to the local model if the API call fails.
+# Results are cached by image content, so repeated images skip both backends.
+# Durations, cache hits and API fallbacks are recorded in the metrics registry (see metrics.py).
+# In "auto" mode the API is skipped while its circuit breaker is open, so an outage
+# costs no more than local inference (see circuit_breaker.py).
+# The "race" mode runs both backends concurrently (optionally hedged: local inference
+# only starts if the API has not answered within RACE_HEDGE_DELAY) and returns the first result.
+# With tiled=True, large images are detected as overlapping tiles in one batch (see tiling.py).
 
 import os
 import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, os.path.dirname(__file__))
-from detect_api import detect_with_api
-from detect_local import detect_with_local_model
+from config import (RACE_HEDGE_DELAY, TILED_INFERENCE, TILE_SIZE, TILE_OVERLAP, TILE_MIN_IMAGE_SIZE, TILE_MERGE,
+                    TILE_MERGE_IOU, TILE_FULL_IMAGE)
+from detect_api import detect_with_api, detect_many_with_api, get_api_breaker
+from detect_local import detect_with_local_model, detect_batch_with_local_model, get_local_model
+from roboflow_client import get_client
+from image_io import is_image_path, decode_image
+from result_cache import get_cache, image_digest, backend_model_id
+from tiling import detect_tiled, needs_tiling
+from metrics import get_metrics, log_event
 
-def detect(image_path, preferred_method="auto"):
+# Backends whose cached results satisfy each detection method, in order of preference
+CACHE_BACKENDS = {"auto": ["api", "local"], "race": ["api", "local"], "api": ["api"], "local": ["local"]}
+
+_race_executor = None
+_race_lock = threading.Lock()
+
+def _cache_key(cache, digest, backend, variant=None):
+    if variant is None:
+        return cache.make_key(digest, backend)
+    return cache.make_key(digest, backend, f"{backend_model_id(backend)}|{variant}")
+
+def _cache_keys(cache, digest, preferred_method, variant=None):
+    return [_cache_key(cache, digest, backend, variant) for backend in CACHE_BACKENDS.get(preferred_method, [])]
+
+def _tile_variant():
+    # Tiled results depend on the tiling settings, so they are cached apart from whole-image ones
+    return f"tiles:{TILE_SIZE}/{TILE_OVERLAP}/{TILE_MIN_IMAGE_SIZE}/{TILE_MERGE}/{TILE_MERGE_IOU}/{TILE_FULL_IMAGE}"
+
+def detect(image, preferred_method="auto", use_cache=True, tiled=None):
     """
     Performs object detection on an image with specified method preference.
 
+    The image can be passed in memory, so callers never need to write it to disk first.
+    Results are looked up in the detection cache first (see result_cache.py).
+
     Args:
-        image_path (str): The path to the image file.
-        preferred_method (str): Detection method - "auto", "api", or "local"
+        image: The path to the image file, a BGR numpy array (e.g. a video frame),
+            a PIL image or encoded image bytes.
+        preferred_method (str): Detection method - "auto", "api", "local", or "race"
+            (both backends at once, first result wins).
+        use_cache (bool): Whether to use the detection result cache.
+        tiled (bool): Detect images larger than TILE_MIN_IMAGE_SIZE as overlapping tiles of
+            TILE_SIZE pixels, so small objects are not lost when the image is downscaled.
+            Tile counts and timings are reported in predictions.meta['tiles'].
+            Defaults to TILED_INFERENCE.
 
     Returns:
-        tuple: A tuple containing the predictions, the method used ('API' or 'LOCAL'), and error message (None if success).
+        tuple: A tuple containing the predictions (a Detections object, the same type for
+            both backends), the method used ('API' or 'LOCAL'), and error message (None if success).
     """
-    if not os.path.exists(image_path):
-        return None, "FAILED", f"Image not found at {image_path}"
+    if is_image_path(image) and not os.path.exists(image):
+        return None, "FAILED", f"Image not found at {image}"
 
     preferred_method = preferred_method.lower()
-    
-    # Try API first if preferred or auto
-    if preferred_method in ["auto", "api"]:
+    start = time.perf_counter()
+    cached = None
+    tiled = TILED_INFERENCE if tiled is None else tiled
+    variant = _tile_variant() if tiled else None
+
+    cache = get_cache() if use_cache else None
+    if cache is None:
+        predictions, method, error_msg = _detect_uncached(image, preferred_method, tiled)
+    else:
+        digest = image_digest(image)
+        cached = cache.get(*_cache_keys(cache, digest, preferred_method, variant))
+        get_metrics().inc('cache_lookups_total', result="hit" if cached is not None else "miss")
+        if cached is not None:
+            print("Detection result served from cache.")
+            predictions, method, error_msg = cached, cached.method, None
+        else:
+            predictions, method, error_msg = _detect_uncached(image, preferred_method, tiled)
+            if error_msg is None:
+                cache.put(_cache_key(cache, digest, method.lower(), variant), predictions)
+
+    _record_call('detect', preferred_method, method, error_msg, time.perf_counter() - start,
+                 images=1, cached=int(cached is not None),
+                 detections=len(predictions) if predictions is not None else 0)
+    return predictions, method, error_msg
+
+def _record_call(event, preferred_method, method, error_msg, seconds, **fields):
+    metrics = get_metrics()
+    metrics.inc('detect_calls_total', call=event, mode=preferred_method, method=method)
+    metrics.observe('detect_seconds', seconds, call=event, method=method)
+    log_event(event, mode=preferred_method, method=method, seconds=round(seconds, 4), error=error_msg, **fields)
+
+def _api_circuit_open(preferred_method):
+    if preferred_method != "auto" or get_api_breaker().allow():
+        return False
+    print("Roboflow API circuit is open, using local YOLOv8 model...")
+    return True
+
+def _detect_uncached(image, preferred_method, tiled=False):
+    if tiled:
+        try:
+            image = decode_image(image)
+        except Exception as e:
+            return None, "FAILED", str(e)
+        height, width = image.shape[:2]
+        if needs_tiling(width, height):
+            try:
+                return detect_tiled(image, lambda tiles: _detect_batch_uncached(tiles, preferred_method))
+            except Exception as e:
+                return None, "FAILED", f"Tiled detection error: {e}"
+
+    if preferred_method == "race":
+        return _race(lambda: detect_with_api(image), lambda: detect_with_local_model(image))
+
+    # Try API first if preferred or auto, unless recent failures opened its circuit
+    if preferred_method in ["auto", "api"] and not _api_circuit_open(preferred_method):
         try:
             print("Attempting detection with Roboflow API...")
-            predictions = detect_with_api(image_path)
+            predictions = detect_with_api(image)
             print("Inference successful with Roboflow API.")
             return predictions, "API", None
         except Exception as e:
@@ -38,12 +136,13 @@ def detect(image_path, preferred_method="auto"):
             if preferred_method == "api":
                 return None, "FAILED", str(e)
             # Otherwise continue to local model
+            get_metrics().inc('api_fallbacks_total')
             print("Falling back to local YOLOv8 model...")
     
     # Try local model
     if preferred_method in ["auto", "local"]:
         try:
-            predictions = detect_with_local_model(image_path)
+            predictions = detect_with_local_model(image)
             print("Inference successful with local model.")
             return predictions, "LOCAL", None
         except Exception as e:
@@ -52,6 +151,203 @@ def detect(image_path, preferred_method="auto"):
     
     return None, "FAILED", f"Invalid detection method: {preferred_method}"
 
+def detect_batch(images, preferred_method="auto", use_cache=True):
+    """
+    Performs object detection on several images with specified method preference.
+
+    The local model processes all images in one forward pass. The API is called
+    once per image with several requests in flight; if any API call fails in "auto" mode, the whole batch falls
+    back to the local model. Images found in the detection cache are not sent
+    to either backend.
+
+    Args:
+        images (list): Images of the same kind accepted by detect().
+        preferred_method (str): Detection method - "auto", "api", "local", or "race"
+        use_cache (bool): Whether to use the detection result cache.
+
+    Returns:
+        tuple: A tuple containing the list of Detections (in input order), the method used
+            ('API' or 'LOCAL'), and error message (None if success).
+    """
+    for image in images:
+        if is_image_path(image) and not os.path.exists(image):
+            return None, "FAILED", f"Image not found at {image}"
+
+    preferred_method = preferred_method.lower()
+    start = time.perf_counter()
+    hits = 0
+
+    cache = get_cache() if use_cache else None
+    if cache is None:
+        results, method, error_msg = _detect_batch_uncached(images, preferred_method)
+    else:
+        digests = [image_digest(image) for image in images]
+        results = [cache.get(*_cache_keys(cache, digest, preferred_method)) for digest in digests]
+        missing = [i for i, result in enumerate(results) if result is None]
+        hits = len(images) - len(missing)
+        metrics = get_metrics()
+        metrics.inc('cache_lookups_total', value=hits, result="hit")
+        metrics.inc('cache_lookups_total', value=len(missing), result="miss")
+        if not missing:
+            print(f"Detection results for {len(images)} image(s) served from cache.")
+            method, error_msg = results[0].method if results else None, None
+        else:
+            predictions, method, error_msg = _detect_batch_uncached([images[i] for i in missing], preferred_method)
+            if error_msg:
+                results = None
+            else:
+                for i, detections in zip(missing, predictions):
+                    results[i] = detections
+                    cache.put(cache.make_key(digests[i], method.lower()), detections)
+
+    _record_call('detect_batch', preferred_method, method, error_msg, time.perf_counter() - start,
+                 images=len(images), cached=hits,
+                 detections=sum(len(r) for r in results) if results is not None else 0)
+    return results, method, error_msg
+
+def _detect_batch_uncached(images, preferred_method):
+    if preferred_method == "race":
+        return _race(lambda: detect_many_with_api(images), lambda: detect_batch_with_local_model(images))
+
+    if preferred_method in ["auto", "api"] and not _api_circuit_open(preferred_method):
+        try:
+            print(f"Attempting detection of {len(images)} image(s) with Roboflow API...")
+            predictions = detect_many_with_api(images)
+            print("Inference successful with Roboflow API.")
+            return predictions, "API", None
+        except Exception as e:
+            print(f"Roboflow API failed: {e}")
+            if preferred_method == "api":
+                return None, "FAILED", str(e)
+            get_metrics().inc('api_fallbacks_total', value=len(images))
+            print("Falling back to local YOLOv8 model...")
+
+    if preferred_method in ["auto", "local"]:
+        try:
+            predictions = detect_batch_with_local_model(images)
+            print(f"Inference successful with local model ({len(images)} image(s) in one batch).")
+            return predictions, "LOCAL", None
+        except Exception as e:
+            print(f"Local model detection failed: {e}")
+            return None, "FAILED", str(e)
+
+    return None, "FAILED", f"Invalid detection method: {preferred_method}"
+
+def preload_backends(methods=("api", "local")):
+    """
+    Creates the shared API client and loads the local model ahead of the first detection.
+
+    Both are process-wide (see roboflow_client.py and model_registry.py), so long-running
+    callers such as the web app can prepare them once and share them between requests.
+
+    Args:
+        methods (tuple): Backends to prepare - "api" and/or "local".
+
+    Returns:
+        dict: {'api': RoboflowClient or None, 'local': model or None}. A backend that
+            cannot be prepared (e.g. the model file is missing) maps to None.
+    """
+    backends = {'api': None, 'local': None}
+    if "api" in methods:
+        try:
+            backends['api'] = get_client()
+        except Exception as e:
+            print(f"API client not preloaded: {e}")
+    if "local" in methods:
+        try:
+            backends['local'] = get_local_model()
+        except Exception as e:
+            print(f"Local model not preloaded: {e}")
+    return backends
+
+def _get_race_executor():
+    global _race_executor
+    if _race_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with _race_lock:
+            if _race_executor is None:
+                _race_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="race")
+    return _race_executor
+
+def _race(run_api, run_local, hedge_delay=RACE_HEDGE_DELAY):
+    """
+    Runs both backends concurrently and returns the first successful result.
+
+    The API call starts first; local inference starts after hedge_delay seconds unless
+    the API has answered by then (at once if the API fails or its circuit is open).
+    The slower backend is cancelled if it has not started, otherwise its result is
+    ignored. The winner and its lead over the loser are recorded in the metrics.
+
+    Returns:
+        tuple: (predictions, 'API' or 'LOCAL', None), or (None, "FAILED", message) if both fail.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    executor = _get_race_executor()
+    start = time.perf_counter()
+    finished_at = {}
+    futures = {}
+
+    def timed(method, fn):
+        def run():
+            try:
+                return fn()
+            finally:
+                finished_at[method] = time.perf_counter()
+        return run
+
+    if get_api_breaker().allow():
+        futures['API'] = executor.submit(timed('API', run_api))
+        done, _ = wait([futures['API']], timeout=hedge_delay)
+        if done and futures['API'].exception() is None:
+            _record_race('API', futures, finished_at, start, hedge_delay)
+            return futures['API'].result(), "API", None
+    else:
+        print("Roboflow API circuit is open, racing the local model alone...")
+    futures['LOCAL'] = executor.submit(timed('LOCAL', run_local))
+
+    methods = {future: method for method, future in futures.items()}
+    errors = {}
+    pending = set(futures.values())
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            method = methods[future]
+            if future.exception() is None:
+                print(f"Race won by {method} after {time.perf_counter() - start:.3f}s.")
+                _record_race(method, futures, finished_at, start, hedge_delay)
+                return future.result(), method, None
+            errors[method] = str(future.exception())
+            print(f"{method} failed in race: {errors[method]}")
+
+    get_metrics().inc('race_wins_total', winner="none")
+    return None, "FAILED", "; ".join(f"{method}: {error}" for method, error in errors.items())
+
+def _record_race(winner, futures, finished_at, start, hedge_delay):
+    metrics = get_metrics()
+    metrics.inc('race_wins_total', winner=winner)
+    loser = "LOCAL" if winner == "API" else "API"
+    event = {'winner': winner, 'loser': loser, 'hedge_delay': hedge_delay,
+             'winner_seconds': round(finished_at[winner] - start, 4)}
+
+    loser_future = futures.get(loser)
+    if loser_future is None or loser_future.cancel():
+        # The loser never ran (hedged out, circuit open or cancelled before starting)
+        log_event('race', **event, loser_started=False, margin_seconds=None)
+        return
+
+    def on_loser_done(future):
+        if future.exception() is not None:
+            # The loser failed, so the winner won by default and there is no margin
+            log_event('race', **event, loser_started=True, loser_ok=False, margin_seconds=None)
+            return
+        margin = finished_at[loser] - finished_at[winner]
+        metrics.observe('race_margin_seconds', margin, winner=winner)
+        log_event('race', **event, loser_started=True, loser_ok=True, margin_seconds=round(margin, 4))
+
+    loser_future.add_done_callback(on_loser_done)
+
 if __name__ == '__main__':
     # Example usage:
     # This block will run if the script is executed directly.
@@ -66,6 +362,5 @@ if __name__ == '__main__':
     else:
         print(f"\nDetection Method Used: {method}")
         print("Predictions:")
-        # The structure of 'predictions' will differ between the API and the local model.
-        print(predictions)
+        print(predictions.to_json())
 
@@ -1,23 +1,138 @@
 # scripts/detect_api.py
 # This script defines the function for running object detection using the Roboflow API.
-# It takes an image path and returns the prediction results.
+# It takes an image (path, numpy array, PIL image or encoded bytes) and returns the prediction results
+# as a Detections object.
 # It raises an exception if the API call fails for any reason.
+# Request outcomes feed a circuit breaker (see circuit_breaker.py), so "auto" detection
+# can skip the API while it is down.
+# Images are downscaled to API_UPLOAD_MAX_SIZE and recompressed before upload, and the
+# returned boxes are scaled back to the original resolution.
 
 import sys
 import os
+import threading
+import time
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from roboflow import Roboflow
+sys.path.insert(0, os.path.dirname(__file__))
 from config import ROBOFLOW_API_KEY, ROBOFLOW_MODEL_ID, CONF_THRESHOLD
+from roboflow_client import get_client, RoboflowAPIError
+from image_io import encode_image, prepare_upload
+from detections import Detections
+from metrics import get_metrics
+from circuit_breaker import CircuitBreaker
 
-def detect_with_api(image_path):
+class UploadEncodeError(Exception):
+    """An image could not be read or encoded for upload; the API itself was not involved."""
+
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+def _api_error(e):
+    """Turns an API failure into an exception with an informative message."""
+    if isinstance(e, UploadEncodeError):
+        return e
+    if isinstance(e, RoboflowAPIError):
+        if e.status_code in (401, 403):
+            return Exception(f"API authentication failed. Check your API key and model ID: {e}")
+        elif e.status_code == 404:
+            return Exception(f"Model not found. Verify ROBOFLOW_MODEL_ID '{ROBOFLOW_MODEL_ID}' is correct: {e}")
+        return Exception(f"API detection error: {e}")
+
+    # Provide more informative error messages
+    error_msg = str(e)
+    if "OAuthException" in error_msg or "does not exist" in error_msg:
+        return Exception(f"API authentication failed. Check your API key and model ID: {error_msg}")
+    elif "model" in error_msg.lower() and "not found" in error_msg.lower():
+        return Exception(f"Model not found. Verify ROBOFLOW_MODEL_ID '{ROBOFLOW_MODEL_ID}' is correct: {error_msg}")
+    return Exception(f"API detection error: {error_msg}")
+
+def _is_outage(e):
+    """Whether an API error says the service is unusable, as opposed to a problem with one image."""
+    if isinstance(e, RoboflowAPIError):
+        return e.status_code is None or e.status_code in (401, 403, 404, 408, 429) or e.status_code >= 500
+    # Transport failures (requests' connection errors and timeouts are OSErrors). Anything
+    # else, such as an image that fails to encode, says nothing about the service.
+    return isinstance(e, OSError)
+
+def _probe_api():
+    """Sends a tiny image to the API; raises if the request fails."""
+    import numpy as np
+    get_client().predict(encode_image(np.zeros((32, 32, 3), dtype=np.uint8)), confidence=CONF_THRESHOLD)
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+def get_api_breaker():
+    """Returns the process-wide circuit breaker of the Roboflow API."""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker("roboflow_api", probe=_probe_api)
+    return _breaker
+
+def _record_outcome(error=None):
+    breaker = get_api_breaker()
+    if error is None:
+        breaker.record_success()
+    elif _is_outage(error):
+        breaker.record_failure(error)
+
+class _Upload:
+    """An image and, once prepared, what was sent for it."""
+
+    __slots__ = ('image', 'index', 'info')
+
+    def __init__(self, image, index=None):
+        self.image = image
+        self.index = index
+        self.info = None
+
+    def encode(self):
+        start = time.perf_counter()
+        try:
+            data, self.info = prepare_upload(self.image)
+        except Exception as e:
+            where = f"Image {self.index}" if self.index is not None else "Image"
+            raise UploadEncodeError(f"{where} could not be encoded for upload: {e}", self.index)
+        self.info['prepare_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return data
+
+def _to_detections(result, info):
+    """Parses a prediction and scales its boxes from the uploaded size back to the original one."""
+    detections = Detections.from_roboflow(result)
+    if info['sent_size'] is not None and info['sent_size'] != info['original_size']:
+        (width, height), (sent_width, sent_height) = info['original_size'], info['sent_size']
+        detections = detections.scale(width / sent_width, height / sent_height, image_size=(width, height))
+    elif info['original_size'] is not None:
+        detections.image_size = info['original_size']
+    detections.meta['upload'] = info
+
+    metrics = get_metrics()
+    metrics.inc('api_upload_bytes_total', info['sent_bytes'], kind="sent")
+    if info['source_bytes'] is not None:
+        info['bytes_saved'] = info['source_bytes'] - info['sent_bytes']
+        metrics.inc('api_upload_bytes_total', info['source_bytes'], kind="source")
+    return detections
+
+def detect_with_api(image):
     """
-    Performs object detection on a local image using the Roboflow API.
+    Performs object detection on an image using the Roboflow API.
+
+    The shared Roboflow client is reused across calls, so the model endpoint is
+    resolved once and predictions go over pooled keep-alive connections.
+    Images are downscaled to API_UPLOAD_MAX_SIZE and encoded in memory as
+    API_UPLOAD_FORMAT at API_JPEG_QUALITY before upload (see image_io.prepare_upload());
+    boxes are returned in the coordinates of the original image, and
+    Detections.meta['upload'] reports the sizes and bytes sent.
 
     Args:
-        image_path (str): The path to the image file.
+        image: The path to the image file, a BGR numpy array, a PIL image or encoded image bytes.
 
     Returns:
-        dict: The prediction results from the Roboflow API.
+        Detections: The prediction results from the Roboflow API. The original
+            JSON is available through Detections.to_json().
     
     Raises:
         Exception: For any errors during API inference.
@@ -25,31 +140,64 @@ def detect_with_api(image_path):
     if not ROBOFLOW_API_KEY:
         raise Exception("ROBOFLOW_API_KEY is not set. Please configure it in environment variables or Streamlit secrets.")
     
+    metrics = get_metrics()
+    try:
+        client = get_client()
+        upload = _Upload(image)
+        with metrics.time('stage_seconds', stage="encode"):
+            data = upload.encode()
+        try:
+            start = time.perf_counter()
+            with metrics.time('stage_seconds', stage="api_request"):
+                result = client.predict(data, confidence=CONF_THRESHOLD)
+            upload.info['request_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            _record_outcome(e)
+            raise
+        _record_outcome()
+        metrics.inc('api_requests_total', outcome="ok")
+        return _to_detections(result, upload.info)
+    except Exception as e:
+        metrics.inc('api_requests_total', outcome="error")
+        raise _api_error(e)
+
+def detect_many_with_api(images):
+    """
+    Performs object detection on several images using the Roboflow API concurrently.
+
+    Up to API_CONCURRENCY requests are kept in flight and at most API_RATE_LIMIT
+    requests are started per second (see async_roboflow_client.py).
+
+    Args:
+        images (list): Images accepted by detect_with_api().
+
+    Returns:
+        list: One Detections object per image, in input order.
+
+    Raises:
+        Exception: For any errors during API inference. An image that cannot be encoded
+            fails the batch with a message naming its index, without counting as an API outage.
+    """
+    if not ROBOFLOW_API_KEY:
+        raise Exception("ROBOFLOW_API_KEY is not set. Please configure it in environment variables or Streamlit secrets.")
+    if not images:
+        return []
+
+    # asyncio is only imported once a batch is actually sent
+    from async_roboflow_client import AsyncRoboflowClient
+
+    metrics = get_metrics()
+    uploads = [_Upload(image, i) for i, image in enumerate(images)]
     try:
-        rf = Roboflow(api_key=ROBOFLOW_API_KEY)
-        
-        # ROBOFLOW_MODEL_ID is expected to be in "workspace/project/version" format
-        parts = ROBOFLOW_MODEL_ID.split('/')
-        if len(parts) == 3:
-            workspace, project_id, version = parts
-            project = rf.workspace(workspace).project(project_id)
-        elif len(parts) == 2:
-            # Fallback to format "project/version"
-            project_id, version = parts
-            project = rf.workspace().project(project_id)
-        else:
-            raise Exception(f"Invalid ROBOFLOW_MODEL_ID format: {ROBOFLOW_MODEL_ID}. Expected 'workspace/project/version' or 'project/version'")
-        
-        model = project.version(version).model
-
-        result = model.predict(image_path, confidence=CONF_THRESHOLD).json()
-        return result
+        try:
+            with metrics.time('stage_seconds', stage="api_batch"):
+                results = AsyncRoboflowClient(get_client(), encoder=_Upload.encode).predict_all(uploads)
+        except Exception as e:
+            _record_outcome(e)
+            raise
+        _record_outcome()
+        metrics.inc('api_requests_total', value=len(images), outcome="ok")
+        return [_to_detections(result, upload.info) for result, upload in zip(results, uploads)]
     except Exception as e:
-        # Provide more informative error messages
-        error_msg = str(e)
-        if "OAuthException" in error_msg or "does not exist" in error_msg:
-            raise Exception(f"API authentication failed. Check your API key and model ID: {error_msg}")
-        elif "model" in error_msg.lower() and "not found" in error_msg.lower():
-            raise Exception(f"Model not found. Verify ROBOFLOW_MODEL_ID '{ROBOFLOW_MODEL_ID}' is correct: {error_msg}")
-        else:
-            raise Exception(f"API detection error: {error_msg}")
+        metrics.inc('api_requests_total', outcome="error")
+        raise _api_error(e)
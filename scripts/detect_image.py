@@ -4,42 +4,6 @@ import sys
 sys.path.insert(0, os.path.dirname(__file__))
 from detect import detect
 
-def draw_boxes_from_api(img, predictions):
-    """
-    Draw bounding boxes on the image from Roboflow API predictions.
-    
-    Args:
-        img: The image array.
-        predictions: The JSON predictions dict from Roboflow API.
-    
-    Returns:
-        The image with boxes drawn.
-    """
-    if 'predictions' not in predictions:
-        return img
-    
-    for pred in predictions['predictions']:
-        x_center = pred['x']
-        y_center = pred['y']
-        width = pred['width']
-        height = pred['height']
-        confidence = pred['confidence']
-        class_name = pred['class']
-        
-        x1 = int(x_center - width / 2)
-        y1 = int(y_center - height / 2)
-        x2 = int(x_center + width / 2)
-        y2 = int(y_center + height / 2)
-        
-        # Draw rectangle
-        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        
-        # Draw label
-        label = f"{class_name} {confidence:.2f}"
-        cv2.putText(img, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-    
-    return img
-
 def main():
     """
     Main function to run detection on a user-provided image path.
@@ -51,8 +15,14 @@ def main():
         print(f"Error: Image file '{image_path}' not found.")
         return
 
+    # Read image once; the decoded array is passed to detection in memory
+    img = cv2.imread(image_path)
+    if img is None:
+        print(f"Error: Could not load image from '{image_path}'.")
+        return
+
     # Run detection with API fallback to local
-    predictions, method, error_msg = detect(image_path)
+    predictions, method, error_msg = detect(img)
 
     if error_msg:
         print(f"Detection failed: {error_msg}")
@@ -60,26 +30,12 @@ def main():
 
     print(f"Detection completed using {method}.")
 
-    # Read image
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Error: Could not load image from '{image_path}'.")
-        return
-
-    # Annotate image based on method
-    if method == "API":
-        annotated_img = draw_boxes_from_api(img, predictions)
-        if 'predictions' in predictions and len(predictions['predictions']) > 0:
-            print(f"Detected {len(predictions['predictions'])} snake(s) in the image.")
-        else:
-            print("No snakes detected in the image.")
-    elif method == "LOCAL":
-        annotated_img = predictions[0].plot()
-        detection_count = len(predictions[0].boxes)
-        if detection_count > 0:
-            print(f"Detected {detection_count} snake(s) in the image.")
-        else:
-            print("No snakes detected in the image.")
+    # Annotate image (same result type for both methods)
+    annotated_img = predictions.draw(img)
+    if len(predictions) > 0:
+        print(f"Detected {len(predictions)} snake(s) in the image.")
+    else:
+        print("No snakes detected in the image.")
 
     # Save results
     output_path = image_path.replace('.png', '_detected.png').replace('.jpg', '_detected.jpg').replace('.jpeg', '_detected.jpeg')
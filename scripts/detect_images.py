@@ -0,0 +1,192 @@
+# scripts/detect_images.py
+# Non-interactive batch detection over directories, globs or image files.
+# Images are spread over a pool of worker processes, each holding its own loaded model,
+# and results are streamed as JSON Lines (one line per image) while the batch runs.
+# Optionally writes annotated images, and --resume skips images already in the output.
+# --tiled detects large drone/trail-camera stills as overlapping tiles (see tiling.py).
+#
+# Example:
+#   python detect_images.py /data/trailcam/2026-10-16 "/data/drone/*.jpg" -o results.jsonl --workers 8 --resume
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+sys.path.insert(0, os.path.dirname(__file__))
+from workers import init_worker
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp', '.tif', '.tiff')
+
+
+def collect_images(inputs, recursive=False):
+    """
+    Expands directories, glob patterns and file paths into image files.
+
+    Returns:
+        list: (absolute path, relative output name) pairs, sorted and without duplicates.
+            For files found in a directory the name keeps the path below that directory.
+    """
+    found = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            for path in glob.glob(pattern, recursive=recursive):
+                if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path):
+                    found.setdefault(os.path.abspath(path), os.path.relpath(path, item))
+        else:
+            matches = glob.glob(item, recursive=recursive) if glob.has_magic(item) else [item]
+            for path in matches:
+                if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path):
+                    found.setdefault(os.path.abspath(path), os.path.basename(path))
+    return sorted(found.items())
+
+
+def completed_paths(output_path):
+    """Returns the paths already processed successfully in an existing JSONL output."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by an interrupted run
+            if not record.get('error'):
+                done.add(record['path'])
+    return done
+
+
+def _process_image(path, name, method, annotate_dir, tiled=None):
+    """Runs detection on one image inside a worker process and returns its JSONL record."""
+    from detect import detect
+
+    start = time.perf_counter()
+    predictions, method_used, error_msg = detect(path, method, tiled=tiled)
+    record = {
+        'path': path,
+        'method': method_used,
+        'error': error_msg,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+    if error_msg:
+        return record
+
+    record['count'] = len(predictions)
+    record['image_size'] = predictions.image_size
+    record['detections'] = predictions.to_records()
+    if 'tiles' in predictions.meta:
+        record['tiles'] = predictions.meta['tiles']
+    if 'upload' in predictions.meta:
+        record['upload'] = predictions.meta['upload']
+
+    if annotate_dir:
+        import cv2
+        from image_io import decode_image
+        root, ext = os.path.splitext(name)
+        output_path = os.path.join(annotate_dir, f"{root}_detected{ext}")
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        cv2.imwrite(output_path, predictions.draw(decode_image(path)))
+        record['annotated'] = output_path
+    return record
+
+
+def run_batch(images, output_path, method="auto", workers=None, annotate_dir=None, max_pending=None,
+              verbose=False, tiled=None):
+    """
+    Processes images in a process pool and appends one JSON line per image to output_path.
+
+    Args:
+        images (list): (path, name) pairs from collect_images().
+        output_path (str): The JSONL file to append to.
+        method (str): Detection method - "auto", "api", "local", or "race"
+        workers (int): Number of worker processes. Defaults to the CPU count.
+        annotate_dir (str): Directory for annotated images, or None.
+        max_pending (int): Images submitted ahead of the results. Defaults to 4 per worker.
+        verbose (bool): Show the detection messages printed inside the workers.
+        tiled (bool): Detect large images as overlapping tiles. Defaults to TILED_INFERENCE.
+
+    Returns:
+        dict: Counts of processed and failed images and the elapsed time.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    stats = {'processed': 0, 'failed': 0, 'detections': 0}
+    start = time.perf_counter()
+
+    with open(output_path, 'a') as out, ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(method, workers, verbose)) as pool:
+        queue = iter(images)
+        pending = {}
+        while True:
+            # Keep a bounded number of images in flight so results stream out steadily
+            for path, name in queue:
+                pending[pool.submit(_process_image, path, name, method, annotate_dir, tiled)] = path
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # Keep the path, so the failed image can be found and is retried by --resume
+                    record = {'path': path, 'method': None, 'error': f"Worker error: {e}"}
+                out.write(json.dumps(record) + '\n')
+                stats['processed'] += 1
+                if record.get('error'):
+                    stats['failed'] += 1
+                else:
+                    stats['detections'] += record['count']
+            out.flush()
+            print(f"\rProcessed {stats['processed']}/{len(images)} images", end='')
+
+    stats['seconds'] = time.perf_counter() - start
+    print()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect snakes in many images using a pool of worker processes")
+    parser.add_argument('inputs', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('-o', '--output', default="detections.jsonl", help="JSON Lines output file")
+    parser.add_argument('--method', default="auto", choices=["auto", "api", "local", "race"], help="Detection method")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--annotate-dir', default=None, help="Also write annotated images to this directory")
+    parser.add_argument('--recursive', action='store_true', help="Search directories recursively")
+    parser.add_argument('--tiled', action='store_true', default=None,
+                        help="Detect large images as overlapping tiles (settings: TILE_* in config.py)")
+    parser.add_argument('--resume', action='store_true', help="Skip images already processed in the output file")
+    parser.add_argument('--verbose', action='store_true', help="Show per-image messages from the workers")
+    args = parser.parse_args()
+
+    images = collect_images(args.inputs, args.recursive)
+    if args.resume:
+        done = completed_paths(args.output)
+        skipped = len(images)
+        images = [(path, name) for path, name in images if path not in done]
+        skipped -= len(images)
+        print(f"Resuming: skipping {skipped} image(s) already in {args.output}")
+    elif os.path.exists(args.output):
+        os.remove(args.output)
+
+    if not images:
+        print("No images to process.")
+        return
+
+    print(f"Processing {len(images)} image(s) with {args.workers or os.cpu_count()} worker(s)...")
+    stats = run_batch(images, args.output, args.method, args.workers, args.annotate_dir, verbose=args.verbose,
+                      tiled=args.tiled)
+    rate = stats['processed'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    print(f"Done: {stats['processed']} image(s), {stats['failed']} failed, "
+          f"{stats['detections']} detection(s), {rate:.1f} images/s")
+    print(f"Results written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
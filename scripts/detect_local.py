@@ -1,22 +1,61 @@
 # scripts/detect_local.py
 # This script defines the function for running object detection using a local YOLOv8 model.
-# It loads the model from the path specified in the config file and performs inference
-# on a given image.
+# The model is taken from the process-wide model registry, so it is loaded from the path
+# specified in the config file only once per process, and then used for inference
+# on a given image (path, numpy array, PIL image or encoded bytes).
+# LOCAL_ENGINE selects the runtime (see engines.py): the PyTorch weights or an exported
+# ONNX Runtime / OpenVINO / TorchScript model.
+# The model instance is shared by all threads, so inference holds the model's lock.
 
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from config import LOCAL_MODEL_PATH, CONF_THRESHOLD
+sys.path.insert(0, os.path.dirname(__file__))
+from config import LOCAL_MODEL_PATH, LOCAL_DEVICE, LOCAL_ENGINE, LOCAL_ENGINE_INT8, CONF_THRESHOLD
+from model_registry import get_model_with_lock
+from engines import resolve_engine
+from image_io import to_model_input
+from detections import Detections
+from metrics import get_metrics
 
-def detect_with_local_model(image_path):
+
+def get_local_model(engine=LOCAL_ENGINE, int8=LOCAL_ENGINE_INT8):
+    """
+    Returns the local YOLOv8 model from the shared model registry, loading it on first use.
+
+    Args:
+        engine (str): Inference engine - "pytorch", "onnx", "openvino" or "torchscript".
+            Falls back to "pytorch" if the engine's export has not been created.
+        int8 (bool): Use the int8 quantized export (onnx only).
+
+    Raises:
+        Exception: If the model file does not exist.
+    """
+    return get_local_model_with_lock(engine, int8)[0]
+
+
+def get_local_model_with_lock(engine=LOCAL_ENGINE, int8=LOCAL_ENGINE_INT8):
     """
-    Performs object detection on a local image using a local YOLOv8 model.
+    Returns the local model and its inference lock (see ModelRegistry.get_with_lock()).
+
+    Raises:
+        Exception: If the model file does not exist.
+    """
+    if not os.path.exists(LOCAL_MODEL_PATH):
+        raise Exception(f"Local model not found at path: {LOCAL_MODEL_PATH}. Please ensure the model file exists.")
+    _, path, settings = resolve_engine(engine, LOCAL_MODEL_PATH, int8)
+    return get_model_with_lock(path, LOCAL_DEVICE, **settings)
+
+
+def detect_with_local_model(image):
+    """
+    Performs object detection on an image using a local YOLOv8 model.
 
     Args:
-        image_path (str): The path to the image file.
+        image: The path to the image file, a BGR numpy array, a PIL image or encoded image bytes.
 
     Returns:
-        list: The prediction results from the local model.
+        Detections: The prediction results from the local model.
     
     Raises:
         Exception: If model loading or inference fails.
@@ -25,10 +64,45 @@ def detect_with_local_model(image_path):
         raise Exception(f"Local model not found at path: {LOCAL_MODEL_PATH}. Please ensure the model file exists.")
     
     try:
-        from ultralytics import YOLO
-        model = YOLO(LOCAL_MODEL_PATH)
-        results = model(image_path, conf=CONF_THRESHOLD)
-        return results
+        model, lock = get_local_model_with_lock()
+        metrics = get_metrics()
+        with metrics.time('stage_seconds', stage="preprocess"):
+            model_input = to_model_input(image)
+        with lock, metrics.time('stage_seconds', stage="local_inference"):
+            results = model(model_input, conf=CONF_THRESHOLD, device=LOCAL_DEVICE)
+        return Detections.from_ultralytics(results[0])
+    except ImportError as e:
+        raise Exception(f"Failed to import YOLO from ultralytics. Ensure ultralytics is installed: {e}")
+    except Exception as e:
+        raise Exception(f"Local model detection error: {e}")
+
+
+def detect_batch_with_local_model(images):
+    """
+    Performs object detection on several images in a single forward pass of the local model.
+
+    Args:
+        images (list): Images of the same kind: paths, BGR numpy arrays, PIL images or encoded bytes.
+
+    Returns:
+        list: One Detections object per input image, in input order.
+
+    Raises:
+        Exception: If model loading or inference fails.
+    """
+    if not os.path.exists(LOCAL_MODEL_PATH):
+        raise Exception(f"Local model not found at path: {LOCAL_MODEL_PATH}. Please ensure the model file exists.")
+    if not images:
+        return []
+
+    try:
+        model, lock = get_local_model_with_lock()
+        metrics = get_metrics()
+        with metrics.time('stage_seconds', stage="preprocess"):
+            model_inputs = [to_model_input(image) for image in images]
+        with lock, metrics.time('stage_seconds', stage="local_batch_inference"):
+            results = model(model_inputs, conf=CONF_THRESHOLD, device=LOCAL_DEVICE)
+        return [Detections.from_ultralytics(result) for result in results]
     except ImportError as e:
         raise Exception(f"Failed to import YOLO from ultralytics. Ensure ultralytics is installed: {e}")
     except Exception as e:
@@ -0,0 +1,302 @@
+# scripts/detect_stream.py
+# Live detection on a webcam, RTSP/HTTP stream or a video file replayed as a stream.
+# A capture thread keeps reading frames and holds only the newest one; inference always
+# runs on that latest frame, so frames that arrive while the detector is busy are dropped
+# instead of queuing up. Every result carries its end-to-end latency (capture to detections)
+# so alerts can be checked against a latency budget.
+#
+# Examples:
+#   python detect_stream.py 0                                  # first webcam
+#   python detect_stream.py rtsp://camera.local/stream1 --method local
+#   python detect_stream.py --replay ../data/test.mp4          # file paced at its own frame rate
+
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import STREAM_LATENCY_BUDGET, STREAM_RECONNECT_ATTEMPTS, STREAM_RECONNECT_DELAY
+from detect import detect
+from metrics import get_metrics, log_event
+
+
+def open_capture(source):
+    """
+    Opens a camera index (int or digit string), stream URL or video file.
+
+    Raises:
+        Exception: If the source cannot be opened.
+    """
+    import cv2
+
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise Exception(f"Failed to open stream source: {source}")
+    if not isinstance(source, str) or "://" in source:
+        # Keep the driver's own buffer short so grabbed frames are as fresh as possible
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class LatestFrameGrabber:
+    """
+    Reads frames on a background thread and keeps only the most recent one.
+
+    Args:
+        source: Camera index, stream URL or video file path.
+        replay (bool): Pace reads at the source's frame rate, so a file behaves like a live camera.
+        reconnect_attempts (int): Times to reopen a live source after it stops delivering frames.
+        reconnect_delay (float): Seconds between reconnection attempts.
+
+    Attributes:
+        frames_read (int): Frames read from the source.
+        frames_dropped (int): Frames replaced by a newer one before they were taken.
+        fps (float): The source's reported frame rate (0 if unknown).
+    """
+
+    def __init__(self, source, replay=False, reconnect_attempts=STREAM_RECONNECT_ATTEMPTS,
+                 reconnect_delay=STREAM_RECONNECT_DELAY):
+        import cv2
+
+        self.source = source
+        self.replay = replay
+        self.reconnect_attempts = 0 if replay else reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self.cap = open_capture(source)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.finished = False
+        self.error = None
+        self._latest = None
+        self._taken = True
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stream-capture", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=5.0)
+        self.cap.release()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def latest(self, timeout=None):
+        """
+        Waits for a frame newer than the last one taken.
+
+        Returns:
+            tuple: (frame_number, frame, captured_at) with captured_at on the time.monotonic()
+                clock, or None once the stream has ended.
+        """
+        with self._condition:
+            ready = self._condition.wait_for(lambda: not self._taken or self.finished, timeout)
+            if not ready or self._taken:
+                return None
+            self._taken = True
+            return self._latest
+
+    def _run(self):
+        start = time.monotonic()
+        attempts = 0
+        try:
+            while not self._stop_event.is_set():
+                if self.replay and self.fps > 0:
+                    # Release frames no faster than the source would produce them live
+                    delay = start + self.frames_read / self.fps - time.monotonic()
+                    if delay > 0 and self._stop_event.wait(delay):
+                        break
+
+                ret, frame = self.cap.read()
+                if not ret:
+                    if attempts >= self.reconnect_attempts:
+                        break
+                    attempts += 1
+                    print(f"Stream {self.source} stopped delivering frames, reconnecting "
+                          f"({attempts}/{self.reconnect_attempts})...")
+                    if self._stop_event.wait(self.reconnect_delay):
+                        break
+                    self.cap.release()
+                    try:
+                        self.cap = open_capture(self.source)
+                    except Exception as e:
+                        print(e)
+                    continue
+                attempts = 0
+
+                captured_at = time.monotonic()
+                self.frames_read += 1
+                with self._condition:
+                    if not self._taken:
+                        self.frames_dropped += 1
+                    self._latest = (self.frames_read, frame, captured_at)
+                    self._taken = False
+                    self._condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._condition:
+                self.finished = True
+                self._condition.notify_all()
+
+
+def detect_stream(source, preferred_method="auto", callback=None, replay=False, max_frames=None,
+                  max_seconds=None, latency_budget=STREAM_LATENCY_BUDGET, stop_event=None):
+    """
+    Runs detection on the latest frame of a live source until it ends or is stopped.
+
+    Args:
+        source: Camera index, RTSP/HTTP URL or video file path.
+        preferred_method (str): Detection method - "auto", "api", "local", or "race"
+        callback (callable): Optional; called with each result dict as it is produced.
+        replay (bool): Replay a file at its own frame rate, dropping frames like a live source.
+        max_frames (int): Stop after this many frames have been run through detection.
+        max_seconds (float): Stop after this many seconds.
+        latency_budget (float): Results slower than this many seconds are marked late.
+        stop_event (threading.Event): Set it to stop the stream from another thread.
+
+    Yields:
+        dict: 'frame' (source frame number), 'image' (the BGR frame), 'predictions' (Detections or None on error),
+            'method', 'error', 'latency' (seconds from capture to detections),
+            'inference_seconds', 'late' (latency over budget), 'frames_read' and 'frames_dropped'.
+
+    Raises:
+        Exception: If the source cannot be opened.
+    """
+    metrics = get_metrics()
+    processed = 0
+    start = time.monotonic()
+
+    with LatestFrameGrabber(source, replay) as grabber:
+        last_dropped = 0
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if max_frames is not None and processed >= max_frames:
+                break
+            if max_seconds is not None and time.monotonic() - start >= max_seconds:
+                break
+
+            item = grabber.latest(timeout=1.0)
+            if item is None:
+                if grabber.finished:
+                    break
+                continue
+            frame_number, frame, captured_at = item
+
+            inference_start = time.monotonic()
+            predictions, method, error_msg = detect(frame, preferred_method, use_cache=False)
+            done_at = time.monotonic()
+            processed += 1
+
+            latency = done_at - captured_at
+            late = latency_budget is not None and latency > latency_budget
+            metrics.inc('stream_frames_total', outcome="error" if error_msg else "ok")
+            metrics.inc('stream_dropped_frames_total', grabber.frames_dropped - last_dropped)
+            last_dropped = grabber.frames_dropped
+            metrics.observe('stream_latency_seconds', latency)
+            if late:
+                metrics.inc('stream_late_frames_total')
+
+            result = {
+                'frame': frame_number,
+                'image': frame,
+                'predictions': predictions,
+                'method': method,
+                'error': error_msg,
+                'latency': latency,
+                'inference_seconds': done_at - inference_start,
+                'late': late,
+                'frames_read': grabber.frames_read,
+                'frames_dropped': grabber.frames_dropped,
+            }
+            if callback is not None:
+                callback(result)
+            yield result
+
+        if grabber.error is not None:
+            raise Exception(f"Stream capture error: {grabber.error}")
+
+
+def main():
+    """Command line interface for live stream detection"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect snakes on a live camera or stream")
+    parser.add_argument('source', nargs='?', default=None, help="Camera index (e.g. 0) or RTSP/HTTP URL")
+    parser.add_argument('--replay', default=None, help="Replay a video file as a live stream instead")
+    parser.add_argument('--method', default="auto", choices=["auto", "api", "local", "race"], help="Detection method")
+    parser.add_argument('--max-frames', type=int, default=None, help="Stop after this many detections")
+    parser.add_argument('--max-seconds', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--latency-budget', type=float, default=STREAM_LATENCY_BUDGET,
+                        help="Seconds from capture to detections before a frame counts as late")
+    parser.add_argument('--show', action='store_true', help="Show annotated frames in a window (q to quit)")
+    args = parser.parse_args()
+
+    if args.source is None and args.replay is None:
+        parser.error("Give a camera index / stream URL, or --replay with a video file")
+    source = args.replay if args.replay else args.source
+
+    stop_event = threading.Event()
+    latencies = []
+    late = 0
+    result = None
+
+    try:
+        for result in detect_stream(source, args.method, replay=args.replay is not None,
+                                    max_frames=args.max_frames, max_seconds=args.max_seconds,
+                                    latency_budget=args.latency_budget, stop_event=stop_event):
+            latencies.append(result['latency'])
+            late += result['late']
+            if args.show:
+                import cv2
+                from detect_video import annotate_frame
+
+                frame = result['image']
+                if result['predictions'] is not None:
+                    frame, _ = annotate_frame(frame, result['predictions'], result['method'])
+                cv2.imshow("Snake Detection", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    stop_event.set()
+            if result['error']:
+                print(f"Frame {result['frame']}: detection failed: {result['error']}")
+                continue
+            count = len(result['predictions'])
+            flag = "  LATE" if result['late'] else ""
+            print(f"Frame {result['frame']}: {count} snake(s) via {result['method']}, "
+                  f"latency {result['latency'] * 1000:.0f} ms, dropped {result['frames_dropped']}{flag}")
+            if count:
+                log_event('stream_alert', source=str(source), frame=result['frame'], detections=count,
+                          latency=round(result['latency'], 3))
+    except KeyboardInterrupt:
+        stop_event.set()
+    finally:
+        if args.show:
+            import cv2
+            cv2.destroyAllWindows()
+
+    if not latencies:
+        print("No frames were processed.")
+        return
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"\nProcessed {len(latencies)} of {result['frames_read']} frames "
+          f"({result['frames_dropped']} dropped), latency p50 {p50 * 1000:.0f} ms, "
+          f"p95 {p95 * 1000:.0f} ms, {late} over the {args.latency_budget:.2f}s budget")
+
+
+if __name__ == "__main__":
+    main()
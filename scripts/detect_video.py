@@ -1,151 +1,576 @@
 # scripts/detect_video.py
 # Video detection script for snake detection
-# Processes video frame by frame and creates annotated output
+# Processes video frame by frame and creates annotated output.
+# Sampled frames are collected into batches so the local model can run
+# several frames in one forward pass. Decoding and inference run on their own
+# threads, joined to the annotate+encode stage by bounded queues.
+# With the "timeline" output only the detections are written (no video re-encode),
+# and frames that are not sampled are skipped without being decoded.
+# With tracking enabled, boxes are propagated to the frames between sampled frames.
+# Frames are sampled on a fixed stride or, with motion sampling, densely only
+# while something moves in the scene (see sampling.py).
+# Every stage is timed; the per-stage durations are returned in stats['timings']
+# and recorded in the metrics registry (see metrics.py).
+# A frame range (start_frame/end_frame) processes one segment of a video; video_shards.py
+# uses it to spread long videos over several processes.
 
-import cv2
 import os
 import sys
+import time
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from detect import detect
+sys.path.insert(0, os.path.dirname(__file__))
+from config import (VIDEO_DETECTION_STRIDE, VIDEO_BATCH_SIZE, VIDEO_MAX_BATCH_SIZE,
+                    VIDEO_PIPELINE, VIDEO_QUEUE_SIZE, VIDEO_TRACKING, VIDEO_SAMPLING,
+                    VIDEO_MAX_BUFFERED_FRAMES, VIDEO_MEMORY_BUDGET_MB)
+from detect import detect_batch
+from video_pipeline import Pipeline
+from timeline import write_timeline, default_timeline_path
+from tracking import BoxTracker, draw_tracks
+from sampling import FixedSampler, make_sampler
+from metrics import StageTimings, get_metrics, log_event
 import tempfile
 
-def detect_video(video_path, progress_callback=None, preferred_method="auto"):
+
+class FrameDetectionError(Exception):
+    """Raised when detection fails on a video frame."""
+
+    def __init__(self, message, method=None):
+        super().__init__(message)
+        self.method = method
+
+
+class VideoCancelledError(Exception):
+    """Raised inside detect_video() when its cancel event is set."""
+
+
+def available_memory_bytes():
+    """Returns the memory currently available to the process, or None if unknown."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def auto_batch_size(width, height, stride=VIDEO_DETECTION_STRIDE, max_batch_size=VIDEO_MAX_BATCH_SIZE):
+    """
+    Picks a batch size from the memory currently available.
+
+    Every sampled frame in a batch keeps up to `stride` decoded frames buffered until
+    its detections are drawn, plus the model's input tensor and activations. A quarter
+    of the available memory is budgeted for that.
+
+    Args:
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        stride (int): Detection stride (frames buffered per sampled frame).
+        max_batch_size (int): Upper bound for the batch size.
+
+    Returns:
+        int: The batch size, between 1 and max_batch_size.
+    """
+    available = available_memory_bytes()
+    if not available:
+        return 1
+    per_frame = width * height * 3 * stride + 64 * 1024 * 1024
+    return max(1, min(max_batch_size, int(available * 0.25 // per_frame)))
+
+
+def bounded_buffers(width, height, queue_size, max_buffered, budget_mb=VIDEO_MEMORY_BUDGET_MB):
+    """
+    Shrinks the pipeline queues and the batch buffer so the decoded frames held at
+    once fit in the memory budget.
+
+    Up to queue_size frames wait before inference, max_buffered inside it while a
+    batch fills up, and queue_size after it, so about 2 * queue_size + max_buffered
+    frames are alive at the same time.
+
+    Returns:
+        tuple: (queue_size, max_buffered), unchanged if they already fit or budget_mb is 0/None.
+    """
+    if not budget_mb:
+        return queue_size, max_buffered
+    frame_bytes = width * height * 3
+    max_frames = max(3, int(budget_mb * 1024 * 1024 // max(1, frame_bytes)))
+    total = 2 * queue_size + max_buffered
+    if total <= max_frames:
+        return queue_size, max_buffered
+    scale = max_frames / total
+    return max(1, int(queue_size * scale)), max(1, int(max_buffered * scale))
+
+
+class FrameReader:
+    """
+    Iterates over (frame_number, frame, sampled) tuples of an opened capture.
+
+    The sampler decides on this thread which frames detection runs on.
+
+    Args:
+        cap (cv2.VideoCapture): The opened capture.
+        sampler: A sampler from sampling.py.
+        sparse (str): None yields every frame. "grab" only yields sampled frames and
+            advances over the others with cap.grab(), which skips the colour conversion
+            and copy of cap.read(). "seek" jumps straight to each sampled frame, which
+            is faster than grabbing when the stride is long compared to the keyframe interval.
+            Samplers that look at the pixels (motion sampling) need every frame decoded,
+            so with them "grab" and "seek" only drop the unsampled frames after decoding.
+        timings (StageTimings): Receives the "decode", "grab", "seek" and "sample" durations.
+        first_frame (int): Number of the frame the capture is positioned at (1-based), so frame
+            numbers and sampling stay those of the whole video when reading a segment.
+        last_frame (int): Stop after this frame number. None reads to the end.
+
+    Attributes:
+        frames_read (int): Number of the last frame read (first_frame - 1 before the first one).
+    """
+
+    def __init__(self, cap, sampler=None, sparse=None, timings=None, first_frame=1, last_frame=None):
+        if sparse not in (None, "grab", "seek"):
+            raise Exception(f"Invalid sparse mode: {sparse}. Expected None, 'grab' or 'seek'")
+        self.cap = cap
+        self.sampler = sampler or FixedSampler()
+        self.sparse = sparse
+        self.timings = timings or StageTimings()
+        self.first_frame = first_frame
+        self.last_frame = last_frame
+        self.frames_read = first_frame - 1
+        self.frames_decoded = 0
+
+    def __iter__(self):
+        if self.sparse == "seek" and not self.sampler.needs_pixels:
+            yield from self._seek()
+            return
+        skip_decode = self.sparse is not None and not self.sampler.needs_pixels
+        while True:
+            frame_number = self.frames_read + 1
+            if self.last_frame is not None and frame_number > self.last_frame:
+                return
+            if skip_decode and not self.sampler.should_sample(frame_number):
+                with self.timings.time("grab"):
+                    grabbed = self.cap.grab()
+                if not grabbed:
+                    return
+                self.frames_read = frame_number
+                continue
+
+            with self.timings.time("decode"):
+                ret, frame = self.cap.read()
+            if not ret:
+                return
+            self.frames_read = frame_number
+            self.frames_decoded += 1
+            if skip_decode:
+                sampled = True
+            else:
+                with self.timings.time("sample"):
+                    sampled = self.sampler.should_sample(frame_number, frame)
+            if sampled or self.sparse is None:
+                yield frame_number, frame, sampled
+
+    def _seek(self):
+        import cv2
+
+        stride = self.sampler.stride
+        # The first sampled frame of the range: frame 1, or the next multiple of the stride
+        frame_number = self.first_frame
+        if frame_number > 1 and frame_number % stride:
+            frame_number += stride - frame_number % stride
+        while True:
+            if self.last_frame is not None and frame_number > self.last_frame:
+                return
+            if frame_number != self.frames_read + 1:
+                with self.timings.time("seek"):
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number - 1)
+            with self.timings.time("decode"):
+                ret, frame = self.cap.read()
+            if not ret:
+                return
+            self.frames_read = frame_number
+            self.frames_decoded += 1
+            self.sampler.sampled_frames += 1
+            yield frame_number, frame, True
+            if frame_number == 1 and stride > 1:
+                frame_number = stride
+            else:
+                frame_number += stride
+
+
+def detect_in_batches(frames, preferred_method="auto", batch_size=1, max_buffered=VIDEO_MAX_BUFFERED_FRAMES,
+                      timings=None):
+    """
+    Runs detection on the sampled frames, `batch_size` sampled frames at a time.
+
+    Frames between sampled frames are buffered so everything comes out in input order.
+    A batch is also sent early once `max_buffered` frames are waiting, which bounds
+    memory when sampled frames are far apart.
+
+    Args:
+        frames (iterable): (frame_number, frame, sampled) tuples.
+        preferred_method (str): Detection method - "auto", "api", or "local"
+        batch_size (int): Number of sampled frames per detection call.
+        max_buffered (int): Maximum frames held before a partial batch is sent.
+        timings (StageTimings): Receives the "inference" duration of each batch.
+
+    Yields:
+        tuple: (frame_number, frame, predictions, method). predictions and method
+            are None for frames that were not sampled.
+
+    Raises:
+        FrameDetectionError: If detection fails.
+    """
+    timings = timings or StageTimings()
+    pending = []
+    sampled_count = 0
+    for frame_number, frame, sampled in frames:
+        pending.append((frame_number, frame, sampled))
+        if sampled:
+            sampled_count += 1
+        if sampled_count == batch_size or (sampled_count and len(pending) >= max_buffered):
+            yield from _flush_batch(pending, preferred_method, timings)
+            pending = []
+            sampled_count = 0
+    if pending:
+        yield from _flush_batch(pending, preferred_method, timings)
+
+
+def _flush_batch(pending, preferred_method, timings):
+    sampled_frames = [frame for _, frame, sampled in pending if sampled]
+    predictions, method = [], None
+    if sampled_frames:
+        with timings.time("inference"):
+            # Video frames are almost never seen twice; hashing them would only push
+            # still-image results out of the cache
+            predictions, method, error_msg = detect_batch(sampled_frames, preferred_method, use_cache=False)
+        if error_msg:
+            raise FrameDetectionError(error_msg, method)
+
+    # Map the batch results back to their frame numbers
+    results = iter(predictions)
+    for frame_number, frame, sampled in pending:
+        if sampled:
+            yield frame_number, frame, next(results), method
+        else:
+            yield frame_number, frame, None, None
+
+
+def annotate_frame(frame, predictions, method=None):
+    """
+    Draws detections on a frame.
+
+    Returns:
+        tuple: (annotated frame, number of detections)
+    """
+    return predictions.draw(frame), len(predictions)
+
+
+def detect_video(video_path, progress_callback=None, preferred_method="auto", batch_size=None,
+                 pipelined=VIDEO_PIPELINE, queue_size=VIDEO_QUEUE_SIZE, output="video",
+                 sparse=None, timeline_format="json", output_path=None, stride=None,
+                 track=VIDEO_TRACKING, sampling=VIDEO_SAMPLING, cancel_event=None, start_frame=1, end_frame=None):
     """
     Detect snakes in a video file.
-    
+
     Args:
         video_path (str): Path to input video file
-        progress_callback (callable): Optional callback for progress updates
+        progress_callback (callable): Optional callback for progress updates. It is always
+            called from the calling thread, once per frame, in frame order.
         preferred_method (str): Detection method - "auto", "api", or "local"
-        
+        batch_size (int): Sampled frames per detection call. None uses VIDEO_BATCH_SIZE
+            from config; 0 picks a size from the available memory.
+        pipelined (bool): Run decoding and inference on background threads so they
+            overlap with annotation and encoding on the calling thread.
+        queue_size (int): Maximum items buffered between two pipeline stages. It is lowered
+            (together with VIDEO_MAX_BUFFERED_FRAMES) when the decoded frames held at once
+            would exceed VIDEO_MEMORY_BUDGET_MB (see bounded_buffers).
+        output (str): "video" writes an annotated MP4. "timeline" only writes the
+            per-frame detections (see timeline.py) and skips the video encoder.
+        sparse (str): None, "grab" or "seek" (see FrameReader). Only used for the
+            timeline output, which defaults to "grab"; the video output needs every frame.
+        timeline_format (str): "json" or "parquet".
+        output_path (str): Where to write the output. Defaults to a new, uniquely named
+            file in the temp directory, which is removed again if processing fails.
+        stride (int): Run detection on the first frame and every Nth frame.
+            None uses VIDEO_DETECTION_STRIDE from config.
+        track (bool): Associate detections across sampled frames and propagate the boxes
+            to the frames in between, with stable track IDs (see tracking.py).
+        sampling (str): "fixed" samples every `stride` frames. "motion" skips inference
+            while the scene is static and samples densely when motion appears (see sampling.py).
+        cancel_event (threading.Event): Checked before every frame; once set, processing
+            stops and the error message is "Video processing cancelled".
+        start_frame (int): First frame to process (1-based). Frame numbers, timestamps and
+            fixed-stride sampling stay those of the whole video.
+        end_frame (int): Last frame to process (inclusive). None runs to the end of the video.
+
     Returns:
-        tuple: (output_path, method, error_msg, stats)
+        tuple: (output_path, method, error_msg, stats). stats['timings'] maps each stage
+            (open, decode, grab, seek, sample, inference, track, annotate, encode,
+            timeline_write) to its call count, total seconds and mean/p50/p95/max milliseconds.
     """
+    # OpenCV is only imported when a video is processed, so importing this module stays cheap
+    import cv2
+
+    cap = None
+    out = None
+    # A default output file created here is removed again if processing fails or is cancelled
+    generated_path = None
+    finished = False
+    timings = StageTimings()
     try:
         # Open video
-        cap = cv2.VideoCapture(video_path)
+        with timings.time("open"):
+            cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             return None, None, "Failed to open video file", None
-        
+
         # Get video properties
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        # Create output video file
-        temp_dir = tempfile.gettempdir()
-        output_path = os.path.join(temp_dir, "detected_video.mp4")
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
+        start_frame = max(1, int(start_frame))
+        if start_frame > 1:
+            # Segments start on a keyframe (see video_shards.py), where seeking is exact and cheap
+            with timings.time("seek"):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame - 1)
+
+        if stride is None:
+            stride = VIDEO_DETECTION_STRIDE
+        if batch_size is None:
+            batch_size = VIDEO_BATCH_SIZE
+        if not batch_size:
+            batch_size = auto_batch_size(width, height, stride)
+        queue_size, max_buffered = bounded_buffers(width, height, queue_size, VIDEO_MAX_BUFFERED_FRAMES)
+        batch_size = min(batch_size, max_buffered)
+        tracker = BoxTracker() if track else None
+        sampler = make_sampler(sampling, stride)
+
+        if output == "timeline":
+            # Only the detections are needed, so unsampled frames don't have to be decoded
+            sparse = sparse or "grab"
+            timeline = []
+            if output_path is None:
+                output_path = generated_path = default_timeline_path(tempfile.gettempdir(), timeline_format)
+        elif output == "video":
+            sparse = None
+            timeline = None
+            # Create output video file
+            if output_path is None:
+                # A unique name, so concurrent callers never overwrite each other's output
+                with tempfile.NamedTemporaryFile(prefix="detected_video_", suffix=".mp4", delete=False) as f:
+                    output_path = generated_path = f.name
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        else:
+            return None, None, f"Invalid output type: {output}. Expected 'video' or 'timeline'", None
+
         frame_count = 0
         detection_count = 0
         method_used = None
-        
-        print(f"Processing video: {total_frames} frames at {fps} FPS")
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Save frame temporarily
-            temp_frame_path = os.path.join(temp_dir, "temp_frame.jpg")
-            cv2.imwrite(temp_frame_path, frame)
-            
-            # Detect on frame (every 5th frame to speed up processing)
-            if frame_count % 5 == 0 or frame_count == 1:
-                predictions, method, error_msg = detect(temp_frame_path, preferred_method)
-                
-                if error_msg:
-                    cap.release()
-                    out.release()
-                    if os.path.exists(temp_frame_path):
-                        os.remove(temp_frame_path)
-                    return None, method, error_msg, None
-                
-                method_used = method
-                
-                # Draw detections
-                if method == "API":
-                    if 'predictions' in predictions and predictions['predictions']:
-                        detection_count += len(predictions['predictions'])
-                        for pred in predictions['predictions']:
-                            x, y, w, h = pred['x'], pred['y'], pred['width'], pred['height']
-                            x1 = int(x - w/2)
-                            y1 = int(y - h/2)
-                            x2 = int(x + w/2)
-                            y2 = int(y + h/2)
-                            
-                            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                            label = f"{pred['class']} {pred['confidence']:.2f}"
-                            cv2.putText(frame, label, (x1, y1-10), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                
-                elif method == "LOCAL":
-                    if len(predictions[0].boxes) > 0:
-                        detection_count += len(predictions[0].boxes)
-                        frame = predictions[0].plot()
-            
-            # Write frame to output
-            out.write(frame)
-            
-            # Progress callback
-            if progress_callback:
-                progress_callback(frame_count, total_frames)
-            
-            # Clean up temp frame
-            if os.path.exists(temp_frame_path):
-                os.remove(temp_frame_path)
-        
-        # Release resources
-        cap.release()
-        out.release()
-        
+        start_time = time.perf_counter()
+
+        print(f"Processing video: {total_frames} frames at {fps} FPS (batch size {batch_size}, output {output})")
+
+        # Decode -> inference -> annotate+encode. The last stage runs on this thread
+        # so the progress callback keeps being called from the caller's thread.
+        reader = FrameReader(cap, sampler, sparse, timings, start_frame, end_frame)
+        with Pipeline(queue_size, enabled=pipelined) as pipeline:
+            frames = pipeline.stage(iter(reader), "decode")
+            results = pipeline.stage(detect_in_batches(frames, preferred_method, batch_size, max_buffered, timings),
+                                     "inference")
+            for frame_number, frame, predictions, method in results:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise VideoCancelledError("Video processing cancelled")
+                frame_count = frame_number
+
+                if predictions is not None:
+                    method_used = method
+                    records = predictions.to_records()
+                    if tracker is not None:
+                        # Associate detections with tracks so they carry stable IDs
+                        with timings.time("track"):
+                            records = tracker.update(frame_number, records)
+                    detection_count += len(records)
+
+                    if timeline is not None:
+                        # Record detections
+                        timeline.append({
+                            'frame': frame_number,
+                            'time': round((frame_number - 1) / fps, 3) if fps else None,
+                            'method': method,
+                            'detections': records,
+                        })
+                    elif tracker is not None:
+                        with timings.time("annotate"):
+                            frame = draw_tracks(frame, records)
+                    else:
+                        # Draw detections
+                        with timings.time("annotate"):
+                            frame, _ = annotate_frame(frame, predictions, method)
+                elif tracker is not None and out is not None:
+                    # Frame between sampled frames: draw the boxes propagated by the tracker
+                    with timings.time("track"):
+                        propagated = tracker.predict(frame_number)
+                    with timings.time("annotate"):
+                        frame = draw_tracks(frame, propagated)
+
+                # Write frame to output
+                if out is not None:
+                    with timings.time("encode"):
+                        out.write(frame)
+
+                # Progress callback
+                if progress_callback:
+                    progress_callback(frame_count, total_frames)
+
+        frame_count = max(frame_count, reader.frames_read)
+        if timeline is not None:
+            video_info = {
+                'source': os.path.basename(video_path),
+                'fps': fps,
+                'width': width,
+                'height': height,
+                'total_frames': total_frames,
+                'stride': stride,
+                'sampling': sampling,
+            }
+            with timings.time("timeline_write"):
+                write_timeline(output_path, video_info, timeline, timeline_format)
+
+        elapsed = time.perf_counter() - start_time
         stats = {
             'total_frames': total_frames,
-            'processed_frames': frame_count,
+            'processed_frames': frame_count - (start_frame - 1),
+            'decoded_frames': reader.frames_decoded,
+            'inference_frames': sampler.sampled_frames,
             'detections': detection_count,
-            'fps': fps
+            'fps': fps,
+            'batch_size': batch_size,
+            'queue_size': queue_size,
+            'max_buffered_frames': max_buffered,
+            'frame_buffer_mb': round((2 * queue_size + max_buffered) * width * height * 3 / (1024 * 1024), 1),
+            'pipelined': bool(pipelined),
+            'output': output,
+            'stride': stride,
+            'sampling': sampling,
+            'tracks': tracker.total_tracks if tracker is not None else None,
+            'processing_fps': (frame_count - (start_frame - 1)) / elapsed if elapsed > 0 else 0.0,
+            'elapsed_seconds': elapsed,
+            'timings': timings.summary(),
         }
-        
+        if start_frame > 1 or end_frame is not None:
+            stats['start_frame'] = start_frame
+            stats['end_frame'] = frame_count
+
+        metrics = get_metrics()
+        metrics.inc('video_jobs_total', outcome="ok")
+        metrics.inc('video_frames_total', stats['processed_frames'])
+        metrics.inc('video_inference_frames_total', sampler.sampled_frames)
+        metrics.observe('video_job_seconds', elapsed)
+        log_event('video', source=os.path.basename(video_path), method=method_used,
+                  frames=stats['processed_frames'], inference_frames=sampler.sampled_frames,
+                  processing_fps=round(stats['processing_fps'], 2), seconds=round(elapsed, 3),
+                  stages={stage: t['total_s'] for stage, t in stats['timings'].items()})
+
+        finished = True
         return output_path, method_used, None, stats
-        
+
+    except VideoCancelledError as e:
+        get_metrics().inc('video_jobs_total', outcome="cancelled")
+        return None, None, str(e), None
+    except FrameDetectionError as e:
+        get_metrics().inc('video_jobs_total', outcome="error")
+        return None, e.method, str(e), None
     except Exception as e:
+        get_metrics().inc('video_jobs_total', outcome="error")
         return None, None, f"Video processing error: {str(e)}", None
+    finally:
+        # Release resources
+        if cap is not None:
+            cap.release()
+        if out is not None:
+            out.release()
+        if generated_path is not None and not finished and os.path.exists(generated_path):
+            os.remove(generated_path)
 
 
 def main():
     """Command line interface for video detection"""
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: python detect_video.py <video_path>")
-        return
-    
-    video_path = sys.argv[1]
-    
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect snakes in a video file")
+    parser.add_argument('video_path', help="Path to the input video")
+    parser.add_argument('--method', default="auto", choices=["auto", "api", "local", "race"], help="Detection method")
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Sampled frames per local forward pass (0 = pick from available memory)")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Run decode, inference and encode one after another on one thread")
+    parser.add_argument('--timeline', choices=["json", "parquet"], default=None,
+                        help="Only write per-frame detections in this format instead of an annotated video")
+    parser.add_argument('--sparse', choices=["grab", "seek"], default=None,
+                        help="How to skip unsampled frames in timeline mode (default: grab)")
+    parser.add_argument('--output', default=None, help="Output file path")
+    parser.add_argument('--stride', type=int, default=None, help="Run detection on every Nth frame")
+    parser.add_argument('--sampling', choices=["fixed", "motion"], default=VIDEO_SAMPLING,
+                        help="Fixed stride, or skip inference while the scene is static")
+    parser.add_argument('--track', action='store_true',
+                        help="Propagate boxes between sampled frames with stable track IDs")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Split the video into segments processed by this many worker processes "
+                             "(0 = one per CPU core; see video_shards.py)")
+    args = parser.parse_args()
+
+    video_path = args.video_path
+
     if not os.path.exists(video_path):
         print(f"Error: Video file not found: {video_path}")
         return
-    
+
     print(f"Starting snake detection on video: {video_path}")
-    
+
     def progress(current, total):
         percent = (current / total) * 100
         print(f"\rProgress: {current}/{total} frames ({percent:.1f}%)", end='')
-    
-    output_path, method, error_msg, stats = detect_video(video_path, progress)
-    
+
+    if args.workers is not None:
+        from video_shards import detect_video_sharded
+
+        output_path, method, error_msg, stats = detect_video_sharded(
+            video_path, progress, args.method, args.workers, args.batch_size,
+            output="timeline" if args.timeline else "video",
+            timeline_format=args.timeline or "json",
+            output_path=args.output,
+            stride=args.stride,
+            track=args.track,
+            sampling=args.sampling,
+        )
+    else:
+        output_path, method, error_msg, stats = detect_video(
+            video_path, progress, args.method, args.batch_size,
+            pipelined=not args.sequential,
+            output="timeline" if args.timeline else "video",
+            sparse=args.sparse,
+            timeline_format=args.timeline or "json",
+            output_path=args.output,
+            stride=args.stride,
+            track=args.track,
+            sampling=args.sampling,
+        )
+
     if error_msg:
         print(f"\n\nError: {error_msg}")
         return
-    
+
     print(f"\n\nDetection completed using {method}")
     print(f"Total detections: {stats['detections']}")
+    print(f"Processing speed: {stats['processing_fps']:.1f} frames/s (batch size {stats['batch_size']}, "
+          f"{stats['decoded_frames']} frames decoded, {stats['inference_frames']} frames inferred)")
+    print("Stage timings:")
+    for stage, t in sorted(stats['timings'].items(), key=lambda item: -item[1]['total_s']):
+        print(f"  {stage:<15} {t['total_s']:8.2f}s total  {t['mean_ms']:8.2f} ms mean  "
+              f"{t['p95_ms']:8.2f} ms p95  ({t['count']} calls)")
     print(f"Output saved to: {output_path}")
 
 
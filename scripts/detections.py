@@ -0,0 +1,256 @@
+# scripts/detections.py
+# This script defines the detection result type shared by every backend.
+# Boxes, scores and class ids are held as contiguous NumPy arrays (boxes in
+# xyxy pixel format), so consumers can filter, run NMS and draw without walking
+# per-detection Python dicts. The Roboflow-style JSON is only built on request.
+# NumPy is imported on first use, so importing the detection modules stays cheap
+# for commands that never produce a result (e.g. --help, job submission).
+
+
+class _LazyNumpy:
+    """Stands in for the numpy module and imports it on the first attribute access."""
+
+    def __getattr__(self, name):
+        import numpy
+        value = getattr(numpy, name)
+        # Cache on the instance, so later lookups skip __getattr__
+        setattr(self, name, value)
+        return value
+
+
+np = _LazyNumpy()
+
+
+class Detections:
+    """
+    Detection results of one image.
+
+    Args:
+        xyxy (array-like): (N, 4) boxes as [x1, y1, x2, y2] in pixels.
+        confidence (array-like): (N,) confidence scores.
+        class_id (array-like): (N,) integer class ids.
+        class_names (dict): Maps class ids to class names.
+        image_size (tuple): (width, height) of the image, if known.
+        method (str): The backend that produced the detections ('API' or 'LOCAL').
+        meta (dict): Extra per-image information (timings, tile counts, ...).
+    """
+
+    __slots__ = ('xyxy', 'confidence', 'class_id', 'class_names', 'image_size', 'method', 'meta', '_json')
+
+    def __init__(self, xyxy=None, confidence=None, class_id=None, class_names=None,
+                 image_size=None, method=None, meta=None):
+        self.xyxy = np.ascontiguousarray(xyxy if xyxy is not None else np.zeros((0, 4)), dtype=np.float32).reshape(-1, 4)
+        n = len(self.xyxy)
+        self.confidence = np.ascontiguousarray(confidence if confidence is not None else np.zeros(n), dtype=np.float32).reshape(-1)
+        self.class_id = np.ascontiguousarray(class_id if class_id is not None else np.zeros(n), dtype=np.int32).reshape(-1)
+        self.class_names = dict(class_names or {})
+        self.image_size = tuple(image_size) if image_size is not None else None
+        self.method = method
+        self.meta = meta if meta is not None else {}
+        self._json = None
+
+    @classmethod
+    def from_roboflow(cls, result, method="API"):
+        """
+        Builds detections from a Roboflow prediction JSON dict.
+
+        Boxes are converted from center/width/height to xyxy in one vectorised step.
+        """
+        predictions = result.get('predictions', [])
+        image = result.get('image') or {}
+        image_size = (int(image['width']), int(image['height'])) if image.get('width') else None
+        if not predictions:
+            return cls(image_size=image_size, method=method)
+
+        xywh = np.array([[p['x'], p['y'], p['width'], p['height']] for p in predictions], dtype=np.float32)
+        confidence = np.array([p['confidence'] for p in predictions], dtype=np.float32)
+
+        class_names, class_id = {}, []
+        name_to_id = {}
+        for p in predictions:
+            name = p['class']
+            if name not in name_to_id:
+                name_to_id[name] = int(p['class_id']) if 'class_id' in p else len(name_to_id)
+                class_names[name_to_id[name]] = name
+            class_id.append(name_to_id[name])
+
+        half = xywh[:, 2:] / 2
+        xyxy = np.concatenate([xywh[:, :2] - half, xywh[:, :2] + half], axis=1)
+        detections = cls(xyxy, confidence, class_id, class_names, image_size, method)
+        detections._json = result
+        return detections
+
+    @classmethod
+    def from_ultralytics(cls, result, method="LOCAL"):
+        """
+        Builds detections from one ultralytics Results object.
+
+        On CPU the tensors are viewed as NumPy arrays without copying.
+        """
+        boxes = result.boxes
+        height, width = result.orig_shape[:2]
+        return cls(
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            boxes.cls.cpu().numpy(),
+            result.names,
+            (width, height),
+            method,
+        )
+
+    @classmethod
+    def concatenate(cls, items, image_size=None, method=None):
+        """Joins several detections of the same image (e.g. tiles) into one."""
+        items = [d for d in items if d is not None]
+        class_names = {}
+        for d in items:
+            class_names.update(d.class_names)
+        if not items:
+            return cls(image_size=image_size, method=method)
+        return cls(
+            np.concatenate([d.xyxy for d in items]),
+            np.concatenate([d.confidence for d in items]),
+            np.concatenate([d.class_id for d in items]),
+            class_names,
+            image_size if image_size is not None else items[0].image_size,
+            method if method is not None else items[0].method,
+        )
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __getitem__(self, index):
+        """Selects detections with a boolean mask, an index array or a slice."""
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return Detections(self.xyxy[index], self.confidence[index], self.class_id[index],
+                          self.class_names, self.image_size, self.method, dict(self.meta))
+
+    def __repr__(self):
+        return f"Detections(n={len(self)}, method={self.method!r}, image_size={self.image_size})"
+
+    @property
+    def labels(self):
+        """Class names of the detections, in order."""
+        return [self.class_names.get(int(c), str(int(c))) for c in self.class_id]
+
+    def filter(self, min_confidence=None, class_ids=None):
+        """Returns the detections above a confidence and/or within a set of class ids."""
+        mask = np.ones(len(self), dtype=bool)
+        if min_confidence is not None:
+            mask &= self.confidence >= min_confidence
+        if class_ids is not None:
+            mask &= np.isin(self.class_id, list(class_ids))
+        return self[mask]
+
+    def nms(self, iou_threshold=0.5, class_agnostic=False):
+        """Returns the detections left after non-maximum suppression."""
+        if len(self) <= 1:
+            return self
+        boxes = self.xyxy
+        if not class_agnostic:
+            # Shift each class into its own coordinate range so boxes of different classes never overlap
+            boxes = boxes + (self.class_id.astype(np.float32) * (boxes.max() + 1))[:, None]
+        return self[nms_indices(boxes, self.confidence, iou_threshold)]
+
+    def scale(self, sx, sy=None, image_size=None):
+        """Returns the detections with boxes scaled by (sx, sy)."""
+        sy = sx if sy is None else sy
+        factors = np.array([sx, sy, sx, sy], dtype=np.float32)
+        return Detections(self.xyxy * factors, self.confidence, self.class_id, self.class_names,
+                          image_size if image_size is not None else self.image_size, self.method, dict(self.meta))
+
+    def offset(self, dx, dy, image_size=None):
+        """Returns the detections with boxes shifted by (dx, dy)."""
+        shift = np.array([dx, dy, dx, dy], dtype=np.float32)
+        return Detections(self.xyxy + shift, self.confidence, self.class_id, self.class_names,
+                          image_size if image_size is not None else self.image_size, self.method, dict(self.meta))
+
+    def to_json(self):
+        """
+        Returns the detections as a Roboflow-style prediction dict.
+
+        The dict is built on first use and cached; detections parsed from the
+        Roboflow API return the original response.
+        """
+        if self._json is None:
+            centers = (self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2
+            sizes = self.xyxy[:, 2:] - self.xyxy[:, :2]
+            labels = self.labels
+            predictions = [
+                {
+                    'x': round(float(centers[i, 0]), 1),
+                    'y': round(float(centers[i, 1]), 1),
+                    'width': round(float(sizes[i, 0]), 1),
+                    'height': round(float(sizes[i, 1]), 1),
+                    'confidence': round(float(self.confidence[i]), 4),
+                    'class': labels[i],
+                    'class_id': int(self.class_id[i]),
+                }
+                for i in range(len(self))
+            ]
+            result = {'predictions': predictions}
+            if self.image_size is not None:
+                result['image'] = {'width': self.image_size[0], 'height': self.image_size[1]}
+            self._json = result
+        return self._json
+
+    def to_records(self):
+        """Returns a list of dicts with 'class', 'confidence' and 'box' ([x1, y1, x2, y2])."""
+        boxes = np.round(self.xyxy, 1).tolist()
+        scores = np.round(self.confidence, 4).tolist()
+        return [
+            {'class': label, 'confidence': score, 'box': box}
+            for label, score, box in zip(self.labels, scores, boxes)
+        ]
+
+    def draw(self, image, color=(0, 255, 0), thickness=2, show_labels=True):
+        """
+        Draws the boxes (and labels) on an image in place.
+
+        Args:
+            image (numpy.ndarray): The image to draw on (BGR or RGB).
+            color (tuple): Box colour in the image's channel order.
+            thickness (int): Line thickness.
+            show_labels (bool): Whether to write "<class> <confidence>" above each box.
+
+        Returns:
+            numpy.ndarray: The same image.
+        """
+        import cv2
+        boxes = self.xyxy.astype(np.int32)
+        labels = self.labels if show_labels else None
+        for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
+            if labels is not None:
+                cv2.putText(image, f"{labels[i]} {self.confidence[i]:.2f}", (x1, y1 - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return image
+
+
+def nms_indices(boxes, scores, iou_threshold=0.5):
+    """
+    Greedy non-maximum suppression over NumPy arrays.
+
+    Args:
+        boxes (numpy.ndarray): (N, 4) xyxy boxes.
+        scores (numpy.ndarray): (N,) scores.
+        iou_threshold (float): Boxes overlapping a kept box above this IoU are dropped.
+
+    Returns:
+        numpy.ndarray: Indices of the kept boxes, highest score first.
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
@@ -0,0 +1,245 @@
+# scripts/engines.py
+# This script defines the inference engines the local model can run on.
+# "pytorch" runs model/best.pt directly; "onnx" (ONNX Runtime), "openvino" and "torchscript"
+# run a copy of the same weights exported once with ultralytics, which is usually much faster
+# on CPU-only hosts. The ONNX export can also be quantized to int8 (dynamic quantization).
+# Exports are cached in LOCAL_EXPORT_DIR in a folder named after a hash of the weights file,
+# so retrained weights are exported again and unchanged ones never are.
+#
+# Examples:
+#   python engines.py export --engine onnx --int8
+#   python engines.py export --engine all
+#   python engines.py list
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import LOCAL_MODEL_PATH, LOCAL_ENGINE, LOCAL_ENGINE_INT8, LOCAL_EXPORT_DIR, LOCAL_EXPORT_IMGSZ
+
+# Engine name -> ultralytics export format, exported file name for weights "<stem>.pt",
+# and export options (dynamic batch so detect_batch() works with the exported model)
+ENGINES = {
+    'pytorch': None,
+    'onnx': {'format': "onnx", 'artifact': "{stem}.onnx", 'options': {'dynamic': True, 'simplify': True}},
+    'openvino': {'format': "openvino", 'artifact': "{stem}_openvino_model", 'options': {'dynamic': True}},
+    'torchscript': {'format': "torchscript", 'artifact': "{stem}.torchscript", 'options': {}},
+}
+INT8_ENGINES = ('onnx',)
+
+_warned = set()
+_digests = {}
+
+
+def weights_digest(weights_path):
+    """
+    Returns a short SHA-256 of the weights file, used to name its export folder.
+    The hash is remembered until the file's size or modification time changes.
+    """
+    stat = os.stat(weights_path)
+    key = (os.path.abspath(weights_path), stat.st_size, stat.st_mtime)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(weights_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        _digests[key] = h.hexdigest()[:16]
+    return _digests[key]
+
+
+def export_folder(weights_path=LOCAL_MODEL_PATH, export_dir=LOCAL_EXPORT_DIR):
+    """Returns the cache folder of the exports of a weights file."""
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    return os.path.join(export_dir, f"{stem}-{weights_digest(weights_path)}")
+
+
+def artifact_path(engine, weights_path=LOCAL_MODEL_PATH, int8=False, export_dir=LOCAL_EXPORT_DIR):
+    """
+    Returns the path of the model an engine runs, whether or not it has been exported yet.
+
+    Raises:
+        Exception: If the engine is unknown or int8 is requested for an engine without it.
+    """
+    if engine not in ENGINES:
+        raise Exception(f"Unknown inference engine: {engine}. Choose one of: {', '.join(ENGINES)}")
+    if int8 and engine not in INT8_ENGINES:
+        raise Exception(f"int8 quantization is only available for: {', '.join(INT8_ENGINES)}")
+    if ENGINES[engine] is None:
+        return weights_path
+    stem = os.path.splitext(os.path.basename(weights_path))[0]
+    name = ENGINES[engine]['artifact'].format(stem=f"{stem}_int8" if int8 else stem)
+    return os.path.join(export_folder(weights_path, export_dir), name)
+
+
+def quantize_onnx(source_path, output_path):
+    """
+    Quantizes the weights of an ONNX model to int8 with ONNX Runtime dynamic quantization.
+
+    Activations stay float and are quantized on the fly, so no calibration images are needed.
+    The model metadata (class names, input size) is copied so ultralytics can load the result.
+    """
+    try:
+        import onnx
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise Exception(f"int8 quantization needs onnx and onnxruntime. Install them with pip: {e}")
+
+    quantize_dynamic(source_path, output_path, weight_type=QuantType.QUInt8)
+    source, quantized = onnx.load(source_path), onnx.load(output_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, output_path)
+
+
+def export_model(engine, weights_path=LOCAL_MODEL_PATH, int8=False, imgsz=LOCAL_EXPORT_IMGSZ,
+                 export_dir=LOCAL_EXPORT_DIR, force=False):
+    """
+    Exports the weights for an engine, unless a cached export already exists.
+
+    Args:
+        engine (str): "onnx", "openvino" or "torchscript" ("pytorch" needs no export).
+        weights_path (str): The PyTorch weights to export.
+        int8 (bool): Also quantize the export to int8 (onnx only).
+        imgsz (int): Input size of the exported model.
+        export_dir (str): Root of the export cache.
+        force (bool): Export again even if a cached export exists.
+
+    Returns:
+        str: The path of the exported model.
+
+    Raises:
+        Exception: If the weights are missing or the export fails.
+    """
+    if not os.path.exists(weights_path):
+        raise Exception(f"Local model not found at path: {weights_path}. Please ensure the model file exists.")
+    target = artifact_path(engine, weights_path, int8, export_dir)
+    if ENGINES[engine] is None:
+        return target
+    if os.path.exists(target) and not force:
+        print(f"Using cached {engine}{' int8' if int8 else ''} export: {target}")
+        return target
+
+    folder = os.path.dirname(target)
+    os.makedirs(folder, exist_ok=True)
+    start = time.perf_counter()
+    if int8:
+        source = export_model(engine, weights_path, False, imgsz, export_dir, force)
+        print(f"Quantizing {source} to int8...")
+        quantize_onnx(source, target)
+    else:
+        try:
+            from ultralytics import YOLO
+        except ImportError as e:
+            raise Exception(f"Failed to import YOLO from ultralytics. Ensure ultralytics is installed: {e}")
+        # ultralytics writes the export next to the weights, so export a copy inside the cache folder
+        local_weights = os.path.join(folder, os.path.basename(weights_path))
+        if not os.path.exists(local_weights):
+            shutil.copy2(weights_path, local_weights)
+        spec = ENGINES[engine]
+        print(f"Exporting {weights_path} to {engine}...")
+        try:
+            exported = YOLO(local_weights).export(format=spec['format'], imgsz=imgsz, **spec['options'])
+        except Exception as e:
+            raise Exception(f"Export to {engine} failed: {e}")
+        if os.path.abspath(exported) != os.path.abspath(target):
+            shutil.move(exported, target)
+    seconds = time.perf_counter() - start
+
+    _write_manifest(folder, engine, int8, target, weights_path, imgsz, seconds)
+    print(f"Exported {engine}{' int8' if int8 else ''} model to {target} in {seconds:.1f}s")
+    return target
+
+
+def _write_manifest(folder, engine, int8, target, weights_path, imgsz, seconds):
+    manifest_path = os.path.join(folder, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    manifest[f"{engine}{'_int8' if int8 else ''}"] = {
+        'path': os.path.basename(target),
+        'weights': os.path.abspath(weights_path),
+        'imgsz': imgsz,
+        'export_seconds': round(seconds, 2),
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def resolve_engine(engine=LOCAL_ENGINE, weights_path=LOCAL_MODEL_PATH, int8=LOCAL_ENGINE_INT8,
+                   export_dir=LOCAL_EXPORT_DIR):
+    """
+    Returns the model path and loader settings for an engine.
+
+    Falls back to the PyTorch weights (with a printed warning) when the export has not
+    been created yet, so a missing export never takes the local backend down.
+
+    Returns:
+        tuple: (engine actually used, model path, loader settings for the model registry)
+    """
+    if engine == "pytorch" or not os.path.exists(weights_path):
+        return "pytorch", weights_path, {}
+    path = artifact_path(engine, weights_path, int8, export_dir)
+    if not os.path.exists(path):
+        if (engine, int8) not in _warned:
+            _warned.add((engine, int8))
+            print(f"No {engine}{' int8' if int8 else ''} export of {weights_path} found, using pytorch. "
+                  f"Create it with: python engines.py export --engine {engine}{' --int8' if int8 else ''}")
+        return "pytorch", weights_path, {}
+    # Exported models do not carry the task the way .pt weights do
+    return f"{engine}_int8" if int8 else engine, path, {'task': "detect"}
+
+
+def list_exports(weights_path=LOCAL_MODEL_PATH, export_dir=LOCAL_EXPORT_DIR):
+    """Returns (engine, int8, path, exists) for every engine of a weights file."""
+    rows = []
+    for engine in ENGINES:
+        for int8 in ((False, True) if engine in INT8_ENGINES else (False,)):
+            path = artifact_path(engine, weights_path, int8, export_dir)
+            rows.append((engine, int8, path, os.path.exists(path)))
+    return rows
+
+
+def main():
+    """Command line interface for exporting the local model"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--weights', default=LOCAL_MODEL_PATH, help="PyTorch weights to export")
+    common.add_argument('--export-dir', default=LOCAL_EXPORT_DIR, help="Root of the export cache")
+
+    parser = argparse.ArgumentParser(description="Export the local model to CPU-optimized inference engines")
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', parents=[common], help="Export the weights (cached; use --force to redo)")
+    export.add_argument('--engine', default="onnx", choices=[e for e in ENGINES if e != "pytorch"] + ["all"])
+    export.add_argument('--int8', action='store_true', help="Also create the int8 quantized model (onnx only)")
+    export.add_argument('--imgsz', type=int, default=LOCAL_EXPORT_IMGSZ, help="Input size of the exported model")
+    export.add_argument('--force', action='store_true', help="Export again even if a cached export exists")
+    sub.add_parser('list', parents=[common], help="Show which exports exist for the configured weights")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for engine, int8, path, exists in list_exports(args.weights, args.export_dir):
+            name = f"{engine}{' int8' if int8 else ''}"
+            print(f"{name:<12} {'ready' if exists else 'missing':<8} {path}")
+        return
+
+    engines = [e for e in ENGINES if e != "pytorch"] if args.engine == "all" else [args.engine]
+    failed = False
+    for engine in engines:
+        try:
+            export_model(engine, args.weights, False, args.imgsz, args.export_dir, args.force)
+            if args.int8 and engine in INT8_ENGINES:
+                export_model(engine, args.weights, True, args.imgsz, args.export_dir, args.force)
+        except Exception as e:
+            print(f"Error: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
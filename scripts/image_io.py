@@ -0,0 +1,179 @@
+# scripts/image_io.py
+# This script defines helpers for passing images to the detection backends in memory.
+# Images can be given as a file path, a decoded numpy array (BGR, as returned by OpenCV),
+# a PIL image or encoded image bytes, so callers never have to write a temporary file.
+# prepare_upload() shrinks images to the model's input size before they are sent to the API.
+
+import io
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import API_JPEG_QUALITY, API_UPLOAD_MAX_SIZE, API_UPLOAD_FORMAT
+
+
+def is_image_path(image):
+    """Returns True if the image is given as a file path."""
+    return isinstance(image, (str, os.PathLike))
+
+
+def is_encoded_bytes(image):
+    """Returns True if the image is given as encoded image bytes."""
+    return isinstance(image, (bytes, bytearray, memoryview))
+
+
+def is_pil_image(image):
+    """Returns True if the image is a PIL image, without importing PIL."""
+    return type(image).__module__.startswith('PIL.')
+
+
+def decode_image(image):
+    """
+    Decodes an image into a BGR numpy array.
+
+    Args:
+        image: A file path, BGR numpy array, PIL image or encoded image bytes.
+
+    Returns:
+        numpy.ndarray: The image in BGR channel order.
+
+    Raises:
+        Exception: If the image cannot be decoded.
+    """
+    import cv2
+    import numpy as np
+
+    if is_image_path(image):
+        img = cv2.imread(os.fspath(image))
+        if img is None:
+            raise Exception(f"Could not load image from '{image}'")
+        return img
+    if is_encoded_bytes(image):
+        img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise Exception("Could not decode image bytes")
+        return img
+    if is_pil_image(image):
+        return cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+    if isinstance(image, np.ndarray):
+        return image
+    raise Exception(f"Unsupported image type: {type(image).__name__}")
+
+
+def to_model_input(image):
+    """
+    Converts an image into a source the local YOLO model accepts without a temp file.
+
+    Paths, numpy arrays and PIL images are passed through unchanged (ultralytics reads
+    them directly); encoded bytes are decoded once into a BGR array.
+    """
+    if is_encoded_bytes(image):
+        return decode_image(image)
+    if is_image_path(image):
+        return os.fspath(image)
+    return image
+
+
+def encode_image(image, ext='.jpg', quality=API_JPEG_QUALITY):
+    """
+    Encodes an image into bytes for upload, entirely in memory.
+
+    Files and encoded bytes are returned as they are, so they are never decoded
+    and re-encoded. Numpy arrays and PIL images are encoded once.
+
+    Args:
+        image: A file path, BGR numpy array, PIL image or encoded image bytes.
+        ext (str): The encoding to use for decoded images, ".jpg", ".png" or ".webp".
+        quality (int): JPEG/WebP quality (1-100).
+
+    Returns:
+        bytes: The encoded image.
+
+    Raises:
+        Exception: If the image cannot be encoded.
+    """
+    if is_image_path(image):
+        with open(image, 'rb') as f:
+            return f.read()
+    if is_encoded_bytes(image):
+        return bytes(image)
+    if is_pil_image(image):
+        buffer = io.BytesIO()
+        pil_format = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}[ext.lower()]
+        pil_image = image.convert('RGB') if pil_format == 'JPEG' else image
+        pil_image.save(buffer, format=pil_format, quality=quality)
+        return buffer.getvalue()
+
+    import cv2
+    ext = ext.lower()
+    if ext in ('.jpg', '.jpeg'):
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    elif ext == '.webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    else:
+        params = []
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise Exception(f"Could not encode image as {ext}")
+    return buffer.tobytes()
+
+
+def is_compressed(data):
+    """Returns True if encoded image bytes are JPEG or WebP (lossy formats worth sending as they are)."""
+    return data[:2] == b'\xff\xd8' or (data[:4] == b'RIFF' and data[8:12] == b'WEBP')
+
+
+def prepare_upload(image, max_size=API_UPLOAD_MAX_SIZE, ext=API_UPLOAD_FORMAT, quality=API_JPEG_QUALITY):
+    """
+    Downscales and recompresses an image for upload to the API.
+
+    Images larger than max_size on their longer side are resized to it (the server resizes
+    to the model's input size anyway, so the extra pixels only cost bandwidth) and encoded
+    at the given quality. Small JPEG/WebP files and bytes are sent unchanged; small PNGs
+    and decoded images are encoded, keeping the original bytes if they are smaller.
+
+    Args:
+        image: A file path, BGR numpy array, PIL image or encoded image bytes.
+        max_size (int): Longer side of the uploaded image in pixels. 0 or None sends the image as
+            encode_image() would, without decoding files.
+        ext (str): ".jpg" or ".webp".
+        quality (int): JPEG/WebP quality (1-100).
+
+    Returns:
+        tuple: (encoded bytes, info). info holds 'original_size' and 'sent_size' as (width, height)
+            (None when the image was not decoded), 'source_bytes' (size of the file or bytes passed
+            in, None for decoded images) and 'sent_bytes'.
+
+    Raises:
+        Exception: If the image cannot be read, decoded or encoded.
+    """
+    source = None
+    if is_image_path(image):
+        with open(image, 'rb') as f:
+            source = f.read()
+    elif is_encoded_bytes(image):
+        source = bytes(image)
+
+    if not max_size:
+        data = source if source is not None else encode_image(image, ext, quality)
+        return data, {'original_size': None, 'sent_size': None,
+                      'source_bytes': len(source) if source is not None else None, 'sent_bytes': len(data)}
+
+    import cv2
+
+    img = decode_image(source if source is not None else image)
+    height, width = img.shape[:2]
+    scale = max_size / max(width, height)
+    if scale < 1:
+        sent_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        data = encode_image(cv2.resize(img, sent_size, interpolation=cv2.INTER_AREA), ext, quality)
+    else:
+        sent_size = (width, height)
+        if source is not None and is_compressed(source):
+            data = source
+        else:
+            data = encode_image(img, ext, quality)
+            if source is not None and len(source) <= len(data):
+                data = source
+
+    return data, {'original_size': (width, height), 'sent_size': sent_size,
+                  'source_bytes': len(source) if source is not None else None, 'sent_bytes': len(data)}
@@ -0,0 +1,186 @@
+# scripts/import_time.py
+# This script measures the startup cost of the command line entry points and gates regressions.
+# Each module is imported in a fresh interpreter with `python -X importtime`, and the report
+# shows the median import time, the process wall time and the slowest packages it pulled in.
+# Heavy libraries (ultralytics/torch, cv2, roboflow, requests, numpy, ...) must only be loaded
+# on first use, so the check fails if an entry point imports one of them at startup. Optionally
+# the times are compared with a saved baseline, like benchmark.py.
+#
+# Examples:
+#   python import_time.py
+#   python import_time.py --output import_times.json
+#   python import_time.py --baseline import_times.json --fail-on-regression
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entry points checked by default (imported from the scripts directory, as the CLIs do)
+ENTRY_POINTS = ("detect", "detect_api", "detect_local", "detect_images", "detect_stream", "jobs", "engines",
+                "tiling", "metrics", "video_shards", "detect_video")
+
+# Packages that must not be imported before they are needed
+HEAVY_MODULES = ("torch", "ultralytics", "cv2", "roboflow", "requests", "numpy", "PIL", "onnxruntime",
+                 "openvino", "polars", "asyncio")
+
+
+def parse_importtime(stderr):
+    """
+    Parses the output of `python -X importtime`.
+
+    Returns:
+        list: (module name, self microseconds, cumulative microseconds, depth) in import order.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # The header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return rows
+
+
+def measure_module(module, python=sys.executable, cwd=SCRIPTS_DIR):
+    """
+    Imports a module once in a fresh interpreter.
+
+    Returns:
+        dict: 'import_ms' (cumulative import time of the module), 'wall_ms' (whole process,
+            interpreter start-up included) and 'rows' from parse_importtime().
+
+    Raises:
+        Exception: If the import fails.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f"import {module}"], cwd=cwd,
+                          capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+        raise Exception(f"Importing {module} failed: {error}")
+    rows = parse_importtime(proc.stderr)
+    import_us = next((cumulative for name, _, cumulative, depth in rows if name == module and depth == 0), 0)
+    return {'import_ms': import_us / 1000, 'wall_ms': wall_ms, 'rows': rows}
+
+
+def package_breakdown(rows, top=10):
+    """Returns the self import time per top-level package in ms, slowest first."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    ordered = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {package: round(us / 1000, 2) for package, us in ordered}
+
+
+def check_module(module, repeats=5, top=10):
+    """
+    Measures a module repeatedly and reports the medians and the heavy packages it imports.
+
+    Returns:
+        dict: name, import_ms, wall_ms, heavy (heavy packages imported) and breakdown.
+    """
+    runs = [measure_module(module) for _ in range(repeats)]
+    imported = {name.split('.')[0] for name, _, _, _ in runs[0]['rows']}
+    return {
+        'name': module,
+        'import_ms': round(statistics.median(r['import_ms'] for r in runs), 2),
+        'wall_ms': round(statistics.median(r['wall_ms'] for r in runs), 2),
+        'heavy': sorted(m for m in HEAVY_MODULES if m in imported),
+        'breakdown': package_breakdown(runs[0]['rows'], top),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Compares import times with a baseline run.
+
+    A module regresses when its import time grew by more than threshold percent and
+    by more than min_delta_ms, so sub-millisecond noise never fails the check.
+
+    Returns:
+        list: (module, baseline ms, current ms, change in percent, regressed) tuples.
+    """
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    rows = []
+    for record in results:
+        old = previous.get(record['name'])
+        if not old or not old.get('import_ms'):
+            continue
+        before, after = old['import_ms'], record['import_ms']
+        change = (after - before) / before * 100
+        rows.append((record['name'], before, after, change, change > threshold and after - before > min_delta_ms))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and gate the import time of the entry points")
+    parser.add_argument('--modules', default=",".join(ENTRY_POINTS), help="Comma-separated modules to import")
+    parser.add_argument('--repeats', type=int, default=5, help="Fresh interpreters per module (median is reported)")
+    parser.add_argument('--top', type=int, default=5, help="Slowest packages shown per module")
+    parser.add_argument('--budget-ms', type=float, default=None, help="Fail if a module takes longer to import")
+    parser.add_argument('--allow-heavy', action='store_true', help="Only report heavy imports instead of failing")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=25.0, help="Regression threshold in percent")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="Smallest slowdown counted as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 if a module regressed beyond the threshold")
+    args = parser.parse_args()
+
+    results, failures = [], []
+    for module in [m.strip() for m in args.modules.split(',') if m.strip()]:
+        try:
+            record = check_module(module, args.repeats, args.top)
+        except Exception as e:
+            print(f"{module:<16} error: {e}")
+            failures.append(f"{module}: {e}")
+            continue
+        results.append(record)
+        slowest = ", ".join(f"{name} {ms:.1f}" for name, ms in record['breakdown'].items())
+        print(f"{module:<16} import {record['import_ms']:>7.1f} ms  process {record['wall_ms']:>7.1f} ms  [{slowest}]")
+        if record['heavy']:
+            print(f"{'':<16} imports at startup: {', '.join(record['heavy'])}")
+            if not args.allow_heavy:
+                failures.append(f"{module} imports {', '.join(record['heavy'])} at startup")
+        if args.budget_ms is not None and record['import_ms'] > args.budget_ms:
+            failures.append(f"{module} takes {record['import_ms']:.1f} ms to import (budget {args.budget_ms:.1f} ms)")
+
+    if args.output:
+        meta = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                'platform': platform.platform(), 'repeats': args.repeats}
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline}:")
+        for name, before, after, change, regressed in compare(results, baseline, args.threshold, args.min_delta_ms):
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<16} {before:>8.1f} -> {after:>8.1f} ms ({change:+.1f}%){flag}")
+            if regressed and args.fail_on_regression:
+                failures.append(f"{name} import time regressed by {change:.0f}%")
+
+    if failures:
+        print("\nImport time check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nImport time check passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+# scripts/jobs.py
+# This script defines the background job queue for video detection in the web app.
+# Jobs run on a bounded worker pool shared by all sessions, each with its own output
+# file, so concurrent users neither block nor overwrite each other. Callers poll a
+# job's status and progress, can cancel it, and finished outputs are removed by a
+# background cleanup thread once they are older than JOB_RESULT_TTL. Job outputs older
+# than JOB_RESULT_TTL that no job refers to (e.g. left by an earlier server process) are
+# purged too, starting at startup; other files in the output directory are never touched.
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import JOB_MAX_WORKERS, JOB_MAX_PENDING, JOB_MAX_PER_OWNER, JOB_RESULT_TTL, JOB_OUTPUT_DIR
+from metrics import get_metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Output file names of jobs: the job id (uuid4 hex) and the extension
+OUTPUT_NAME = re.compile(r'[0-9a-f]{32}\.mp4$')
+
+
+class JobLimitError(Exception):
+    """Raised when a job is submitted while the queue or the owner's quota is full."""
+
+
+class Job:
+    """
+    State of one video detection job. Read it from any thread; only the worker updates it.
+
+    Attributes:
+        id (str): Unique job id.
+        status (str): "queued", "running", "done", "failed" or "cancelled".
+        current (int) / total (int): Frames processed so far and total frames.
+        output_path (str): Where the annotated video is written.
+        method (str): The detection method used, once done.
+        error_msg (str): Error message if the job failed or was cancelled.
+        stats (dict): The stats returned by detect_video(), once done.
+    """
+
+    def __init__(self, input_path, output_path, preferred_method, owner=None, options=None, delete_input=False):
+        self.id = uuid.uuid4().hex
+        self.input_path = input_path
+        self.output_path = output_path
+        self.preferred_method = preferred_method
+        self.owner = owner
+        self.options = options or {}
+        self.delete_input = delete_input
+        self.status = QUEUED
+        self.current = 0
+        self.total = 0
+        self.method = None
+        self.error_msg = None
+        self.stats = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def progress(self):
+        """Fraction of frames processed, between 0 and 1."""
+        return min(1.0, self.current / self.total) if self.total else 0.0
+
+    def _update_progress(self, current, total):
+        self.current = current
+        self.total = total
+
+
+class JobManager:
+    """
+    Runs video detection jobs on a bounded thread pool.
+
+    Args:
+        max_workers (int): Jobs processed at the same time.
+        max_pending (int): Queued plus running jobs before submissions are refused.
+        max_per_owner (int): Queued plus running jobs per owner (e.g. a browser session).
+        result_ttl (float): Seconds a finished job and its output are kept.
+        output_dir (str): Directory for job outputs. Defaults to a folder in the temp directory.
+        runner (callable): The video detection function. Defaults to detect_video().
+        cleanup_interval (float): Seconds between background cleanups of expired jobs.
+            Defaults to a quarter of result_ttl, at most a minute.
+    """
+
+    def __init__(self, max_workers=JOB_MAX_WORKERS, max_pending=JOB_MAX_PENDING, max_per_owner=JOB_MAX_PER_OWNER,
+                 result_ttl=JOB_RESULT_TTL, output_dir=JOB_OUTPUT_DIR, runner=None, cleanup_interval=None):
+        self.max_pending = max_pending
+        self.max_per_owner = max_per_owner
+        self.result_ttl = result_ttl
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), "snake_detection_jobs")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.purge_outputs()
+        if runner is None:
+            from detect_video import detect_video
+            runner = detect_video
+        self.runner = runner
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="video-job")
+        # Expired outputs are removed even while nobody submits or lists jobs
+        self.cleanup_interval = cleanup_interval or max(1.0, min(result_ttl / 4, 60.0))
+        self._stop_event = threading.Event()
+        self._cleaner = threading.Thread(target=self._cleanup_loop, name="video-job-cleanup", daemon=True)
+        self._cleaner.start()
+
+    def submit(self, input_path, preferred_method="auto", owner=None, delete_input=False, **options):
+        """
+        Queues detection on a video file.
+
+        Args:
+            input_path (str): The video to process.
+            preferred_method (str): Detection method passed to detect_video().
+            owner (str): Who submitted the job, for the per-owner limit and listing.
+            delete_input (bool): Remove input_path once the job has finished.
+            **options: Further keyword arguments for detect_video() (e.g. stride, track).
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobLimitError: If the queue or the owner's quota is full.
+        """
+        self.cleanup()
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.status in ACTIVE_STATES]
+            if len(active) >= self.max_pending:
+                raise JobLimitError(f"The server is busy ({len(active)} videos queued). Please try again shortly.")
+            if owner is not None and sum(job.owner == owner for job in active) >= self.max_per_owner:
+                raise JobLimitError(f"You already have {self.max_per_owner} videos processing. "
+                                    f"Wait for one to finish or cancel it.")
+
+            job = Job(input_path, None, preferred_method, owner, options, delete_input)
+            job.output_path = os.path.join(self.output_dir, f"{job.id}.mp4")
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job)
+        get_metrics().inc('jobs_submitted_total')
+        return job
+
+    def get(self, job_id):
+        """Returns a job by id, or None if it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner=None):
+        """Returns the known jobs, optionally only those of one owner, oldest first."""
+        self.cleanup()
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if owner is None or job.owner == owner),
+                          key=lambda job: job.created_at)
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. A queued job never starts; a running one stops at the next frame.
+
+        Returns:
+            bool: True if the job was still queued or running.
+        """
+        job = self.get(job_id)
+        if job is None or job.status not in ACTIVE_STATES:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Never started, so _run() will not finish it
+            self._finish(job, CANCELLED, error_msg="Video processing cancelled")
+        return True
+
+    def cleanup(self, now=None):
+        """
+        Removes finished jobs older than result_ttl together with their output files, and
+        files in the output directory that belong to no known job and are older than result_ttl.
+        """
+        now = now or time.time()
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished_at is not None and now - job.finished_at > self.result_ttl]
+            for job in expired:
+                del self._jobs[job.id]
+            known = {job.output_path for job in self._jobs.values()}
+        for job in expired:
+            self._remove(job.output_path)
+        self.purge_outputs(keep=known, now=now)
+        return len(expired)
+
+    def purge_outputs(self, max_age=None, keep=(), now=None):
+        """
+        Removes job outputs from the output directory that no job refers to.
+
+        Only files named like job outputs are removed, so an output directory shared with
+        other files, or with another server process whose jobs are still recent, is safe.
+
+        Args:
+            max_age (float): Only remove files not modified for this many seconds.
+                Defaults to result_ttl.
+            keep (set): Paths to leave alone.
+
+        Returns:
+            int: The number of files removed.
+        """
+        now = now or time.time()
+        max_age = self.result_ttl if max_age is None else max_age
+        removed = 0
+        for entry in os.scandir(self.output_dir):
+            try:
+                if (not OUTPUT_NAME.match(entry.name) or not entry.is_file() or entry.path in keep
+                        or now - entry.stat().st_mtime <= max_age):
+                    continue
+            except OSError:
+                continue
+            self._remove(entry.path)
+            removed += 1
+        return removed
+
+    def shutdown(self, cancel=True):
+        """Stops the worker pool and the cleanup thread, cancelling unfinished jobs unless cancel is False."""
+        if cancel:
+            for job in self.jobs():
+                self.cancel(job.id)
+        self._stop_event.set()
+        self._executor.shutdown(wait=True)
+
+    def _cleanup_loop(self):
+        while not self._stop_event.wait(self.cleanup_interval):
+            try:
+                self.cleanup()
+            except Exception as e:
+                print(f"Job cleanup failed: {e}")
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED, error_msg="Video processing cancelled")
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            _, method, error_msg, stats = self.runner(
+                job.input_path, job._update_progress, job.preferred_method,
+                output_path=job.output_path, cancel_event=job.cancel_event, **job.options)
+        except Exception as e:
+            method, error_msg, stats = None, f"Video processing error: {e}", None
+
+        if error_msg is None:
+            self._finish(job, DONE, method=method, stats=stats)
+        elif job.cancel_event.is_set():
+            self._finish(job, CANCELLED, error_msg=error_msg)
+        else:
+            self._finish(job, FAILED, method=method, error_msg=error_msg)
+
+    def _finish(self, job, status, method=None, error_msg=None, stats=None):
+        job.method = method
+        job.error_msg = error_msg
+        job.stats = stats
+        job.finished_at = time.time()
+        job.status = status
+        if status != DONE:
+            self._remove(job.output_path)
+        if job.delete_input:
+            self._remove(job.input_path)
+        get_metrics().inc('jobs_finished_total', status=status)
+        if job.started_at is not None:
+            get_metrics().observe('job_seconds', job.finished_at - job.started_at, status=status)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Could not remove job file {path}: {e}")
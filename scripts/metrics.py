@@ -0,0 +1,265 @@
+# scripts/metrics.py
+# This script defines the in-process metrics of the detection system.
+# Counters (cache hits, API fallbacks, frames) and histograms of stage durations
+# (decode, inference, model load, annotate, encode, ...) are recorded in a
+# process-wide registry. They can be read as a dict, printed as one structured JSON
+# log line, or scraped in Prometheus text format from an optional HTTP endpoint.
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import METRICS_ENABLED, METRICS_LOG, METRICS_PORT, METRICS_HOST
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_PREFIX = "snake_detection_"
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative histogram of durations in seconds."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Estimates the q-th quantile (0-1) as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_s': round(self.sum, 4),
+            'mean_ms': round(self.sum / self.count * 1000, 3) if self.count else None,
+            'p50_ms': round(self.quantile(0.5) * 1000, 3) if self.count else None,
+            'p95_ms': round(self.quantile(0.95) * 1000, 3) if self.count else None,
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of labelled counters and duration histograms.
+
+    Args:
+        enabled (bool): When False, recording calls do nothing.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Adds value to a counter."""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Records a duration in a histogram."""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Context manager recording the duration of its block in a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """
+        Returns all metrics as a dict: counters map to {labels: value} and histograms
+        to {labels: summary}, with labels written as "k=v,k=v".
+        """
+        def label_text(key):
+            return ",".join(f"{k}={v}" for k, v in key) or "all"
+
+        with self._lock:
+            return {
+                'counters': {name: {label_text(k): v for k, v in series.items()}
+                             for name, series in self._counters.items()},
+                'histograms': {name: {label_text(k): h.summary() for k, h in series.items()}
+                               for name, series in self._histograms.items()},
+            }
+
+    def to_prometheus(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{_PREFIX}{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{_PREFIX}{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, n in zip(h.buckets, h.counts):
+                        cumulative += n
+                        lines.append(f"{metric}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, [('le', '+Inf')])} {h.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+class StageTimings:
+    """
+    Durations of the stages of one job (e.g. one video), also recorded in a
+    registry histogram labelled with the stage. Safe to use from several threads.
+
+    Args:
+        metric (str): Name of the registry histogram the durations are added to.
+        registry (MetricsRegistry): Defaults to the process-wide registry.
+    """
+
+    def __init__(self, metric="stage_seconds", registry=None):
+        self.metric = metric
+        self.registry = registry or get_metrics()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+        self.registry.observe(self.metric, seconds, stage=stage)
+
+    @contextmanager
+    def time(self, stage):
+        """Context manager adding the duration of its block to a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def summary(self):
+        """Returns {stage: {count, total_s, mean_ms, p50_ms, p95_ms, max_ms}}."""
+        with self._lock:
+            return {stage: h.summary() for stage, h in self._stages.items()}
+
+
+def log_event(event, **fields):
+    """Prints one structured JSON log line if METRICS_LOG is enabled."""
+    if not METRICS_LOG:
+        return
+    record = {'event': event, 'ts': round(time.time(), 3), **fields}
+    print(json.dumps(record, separators=(',', ':'), default=str))
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST, registry=None):
+    """
+    Serves the registry in Prometheus text format at http://host:port/metrics on a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() to stop it).
+    """
+    # http.server is only imported when the endpoint is enabled
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = self.server.registry.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or get_metrics()
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+_metrics = None
+_metrics_server = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Returns the process-wide metrics registry, creating it on first use. If METRICS_PORT
+    is set, the Prometheus endpoint is started along with it.
+    """
+    global _metrics, _metrics_server
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+                if METRICS_ENABLED and METRICS_PORT:
+                    try:
+                        _metrics_server = start_metrics_server(METRICS_PORT, METRICS_HOST, _metrics)
+                        print(f"Serving metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+                    except OSError as e:
+                        # e.g. another worker process already serves the port
+                        print(f"Could not start the metrics endpoint on port {METRICS_PORT}: {e}")
+    return _metrics
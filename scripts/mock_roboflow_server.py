@@ -0,0 +1,171 @@
+# scripts/mock_roboflow_server.py
+# This script defines a local stub of the Roboflow hosted inference API.
+# It answers prediction requests with a fixed snake detection after a configurable
+# latency, and counts requests and TCP connections so that client changes can be
+# measured offline without an API key. A bandwidth limit makes larger uploads take
+# proportionally longer, as they would over a real uplink.
+
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+DEFAULT_PREDICTION = {
+    'x': 320.0,
+    'y': 240.0,
+    'width': 120.0,
+    'height': 80.0,
+    'confidence': 0.91,
+    'class': 'snake',
+    'class_id': 0,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep connections alive between requests
+
+    def setup(self):
+        super().setup()
+        self.server.mock._count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # Metadata lookups made by the Roboflow SDK (workspace, project, version).
+        mock = self.server.mock
+        mock._count('metadata_requests')
+        time.sleep(mock.latency)
+        self._send_json(200, {'path': urlparse(self.path).path})
+
+    def do_POST(self):
+        mock = self.server.mock
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        request_number = mock._count('requests')
+        mock._count('bytes_received', len(body))
+        time.sleep(mock.latency + (len(body) / mock.bandwidth if mock.bandwidth else 0))
+
+        if request_number <= mock.fail_count:
+            self._send_json(mock.fail_status, {'message': 'Simulated failure'})
+            return
+
+        width, height = _image_size(body)
+        self._send_json(200, {
+            'time': mock.latency,
+            'image': {'width': width, 'height': height},
+            'predictions': [dict(p) for p in mock.predictions],
+        })
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _image_size(body):
+    """Returns the (width, height) of a base64 encoded image, or (0, 0) if unknown."""
+    try:
+        import cv2
+        import numpy as np
+        img = cv2.imdecode(np.frombuffer(base64.b64decode(body), np.uint8), cv2.IMREAD_UNCHANGED)
+        if img is not None:
+            return img.shape[1], img.shape[0]
+    except Exception:
+        pass
+    return 0, 0
+
+
+class MockRoboflowServer:
+    """
+    Stub Roboflow inference server running on a background thread.
+
+    Args:
+        host (str): The host to bind to.
+        port (int): The port to bind to. 0 picks a free port.
+        latency (float): Seconds to sleep before answering each request.
+        predictions (list): Predictions returned for every image.
+        fail_count (int): Number of initial prediction requests answered with fail_status.
+        fail_status (int): HTTP status used for simulated failures.
+        bandwidth (float): Simulated upload speed in bytes per second; each request body adds
+            its transfer time to the latency. 0 means unlimited.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, predictions=None, fail_count=0, fail_status=503,
+                 bandwidth=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.predictions = predictions if predictions is not None else [DEFAULT_PREDICTION]
+        self.fail_count = fail_count
+        self.fail_status = fail_status
+        self.stats = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def metadata_paths(model_id):
+        """Returns the metadata paths the Roboflow SDK requests before predicting."""
+        workspace, project, version = model_id.split('/')
+        return [f"/{workspace}", f"/{workspace}/{project}", f"/{workspace}/{project}/{version}"]
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'connections': 0, 'requests': 0, 'metadata_requests': 0, 'bytes_received': 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+            return self.stats[name]
+
+
+def main():
+    """Runs the stub server in the foreground."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stub of the Roboflow inference API")
+    parser.add_argument('--port', type=int, default=9001)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds to wait before each response")
+    parser.add_argument('--bandwidth', type=float, default=0, help="Simulated upload speed in bytes/s (0 = unlimited)")
+    args = parser.parse_args()
+
+    server = MockRoboflowServer(port=args.port, latency=args.latency, bandwidth=args.bandwidth)
+    print(f"Mock Roboflow API listening on {server.url} (set ROBOFLOW_API_URL to use it)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# scripts/model_registry.py
+# This script defines a process-wide registry of loaded detection models.
+# Each model is loaded once per process, keyed by its path, device and settings,
+# and is warmed up with a dummy inference so the first real call is not slowed down.
+# When the configured memory budget is exceeded, least recently used models are evicted.
+# ultralytics predictors keep per-call state on the model, so every model has an inference
+# lock that callers sharing it across threads hold around each call (see get_with_lock()).
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import MODEL_MEMORY_BUDGET_MB, MODEL_WARMUP
+from metrics import get_metrics
+
+
+def load_yolo_model(path, device, **settings):
+    """
+    Loads an ultralytics YOLO model and moves it to the requested device.
+
+    Args:
+        path (str): The path to the model weights.
+        device (str): The device to run the model on, e.g. "cpu" or "cuda:0".
+        **settings: Extra keyword arguments passed to the YOLO constructor.
+
+    Returns:
+        YOLO: The loaded model.
+    """
+    from ultralytics import YOLO
+    model = YOLO(path, **settings)
+    if path.endswith('.pt'):
+        model.to(device)
+    return model
+
+
+def warmup_yolo_model(model, device, imgsz=640):
+    """
+    Runs a single inference on a blank image so lazy initialisation
+    (layer fusing, memory allocation) happens before the first real request.
+    """
+    import numpy as np
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    model(dummy, device=device, verbose=False)
+
+
+def estimate_model_bytes(model, path):
+    """
+    Estimates the memory held by a loaded model.
+
+    Uses the size of the model parameters when they are available and
+    falls back to the size of the weights file otherwise.
+    """
+    try:
+        return sum(p.numel() * p.element_size() for p in model.model.parameters())
+    except Exception:
+        try:
+            if os.path.isdir(path):
+                # e.g. an OpenVINO export folder
+                return sum(os.path.getsize(os.path.join(root, name))
+                           for root, _, names in os.walk(path) for name in names)
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+
+class ModelRegistry:
+    """
+    Keeps loaded models in memory and hands out the same instance for every
+    request with the same path, device and settings.
+
+    Args:
+        memory_budget_mb (float): Total size of the loaded models before the least
+            recently used ones are evicted. None or 0 disables eviction.
+        warmup (bool): Whether to run a dummy inference after loading a model.
+        loader (callable): Function (path, device, **settings) -> model.
+        warmer (callable): Function (model, device) -> None used for warm-up.
+    """
+
+    def __init__(self, memory_budget_mb=MODEL_MEMORY_BUDGET_MB, warmup=MODEL_WARMUP,
+                 loader=load_yolo_model, warmer=warmup_yolo_model):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self.warmup = warmup
+        self.loader = loader
+        self.warmer = warmer
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'load_seconds': 0.0}
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def make_key(path, device="cpu", **settings):
+        """Builds the registry key for a model."""
+        return (os.path.abspath(path), device, tuple(sorted(settings.items())))
+
+    def get(self, path, device="cpu", **settings):
+        """
+        Returns the model for the given path, device and settings, loading it on first use.
+
+        Args:
+            path (str): The path to the model weights.
+            device (str): The device to run the model on.
+            **settings: Extra settings passed to the loader. They are part of the key.
+
+        Returns:
+            The loaded model.
+
+        Raises:
+            Exception: Whatever the loader raises if the model cannot be loaded.
+        """
+        return self.get_with_lock(path, device, **settings)[0]
+
+    def get_with_lock(self, path, device="cpu", **settings):
+        """
+        Returns the model like get(), together with its inference lock.
+
+        The same instance is handed to every thread, and ultralytics models are not safe
+        to call from several threads at once, so hold the lock around every inference call.
+
+        Returns:
+            tuple: (model, threading.Lock)
+        """
+        key = self.make_key(path, device, **settings)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry['model'], entry['lock']
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it.
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry['model'], entry['lock']
+
+            start = time.perf_counter()
+            model = self.loader(path, device, **settings)
+            if self.warmup and self.warmer is not None:
+                self.warmer(model, device)
+            load_seconds = time.perf_counter() - start
+
+            lock = threading.Lock()
+            with self._lock:
+                self._models[key] = {
+                    'model': model,
+                    'lock': lock,
+                    'bytes': estimate_model_bytes(model, path),
+                    'load_seconds': load_seconds,
+                }
+                self.stats['misses'] += 1
+                self.stats['load_seconds'] += load_seconds
+                self._evict(keep=key)
+            get_metrics().observe('model_load_seconds', load_seconds, device=device)
+            print(f"Loaded model {path} on {device} in {load_seconds:.2f}s")
+            return model, lock
+
+    def unload(self, path, device="cpu", **settings):
+        """Removes a model from the registry. Returns True if it was loaded."""
+        key = self.make_key(path, device, **settings)
+        with self._lock:
+            return self._models.pop(key, None) is not None
+
+    def clear(self):
+        """Removes every model from the registry."""
+        with self._lock:
+            self._models.clear()
+
+    def loaded(self):
+        """
+        Returns a list of dicts describing the loaded models, least recently used first.
+        """
+        with self._lock:
+            return [
+                {'path': key[0], 'device': key[1], 'settings': dict(key[2]),
+                 'bytes': entry['bytes'], 'load_seconds': entry['load_seconds']}
+                for key, entry in self._models.items()
+            ]
+
+    def total_bytes(self):
+        """Returns the estimated memory held by all loaded models."""
+        with self._lock:
+            return sum(entry['bytes'] for entry in self._models.values())
+
+    def _lookup(self, key):
+        entry = self._models.get(key)
+        if entry is None:
+            return None
+        self._models.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry
+
+    def _evict(self, keep):
+        if not self.memory_budget:
+            return
+        total = sum(entry['bytes'] for entry in self._models.values())
+        for key in list(self._models):
+            if total <= self.memory_budget:
+                break
+            if key == keep:
+                continue
+            total -= self._models.pop(key)['bytes']
+            self.stats['evictions'] += 1
+            get_metrics().inc('model_evictions_total')
+            print(f"Evicted model {key[0]} ({key[1]}) from the model registry")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the process-wide model registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def get_model(path, device="cpu", **settings):
+    """Shortcut for get_registry().get(path, device, **settings)."""
+    return get_registry().get(path, device, **settings)
+
+
+def get_model_with_lock(path, device="cpu", **settings):
+    """Shortcut for get_registry().get_with_lock(path, device, **settings)."""
+    return get_registry().get_with_lock(path, device, **settings)
@@ -0,0 +1,114 @@
+# scripts/output_server.py
+# This script defines a small HTTP server that streams finished job outputs to the browser.
+# Files are sent from disk in chunks with the right Content-Type and support for Range
+# requests, so the video player can seek and multi-GB outputs never pass through memory
+# (Streamlit's static serving refuses files over 200 MB and sends .mp4 as text/plain).
+# Only files directly inside the served directory can be requested.
+
+import mimetypes
+import os
+import re
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import OUTPUT_SERVER_HOST, OUTPUT_SERVER_PORT, OUTPUT_SERVER_URL
+
+_CHUNK = 1024 * 1024
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Parses a single-range "Range: bytes=start-end" header.
+
+    Returns:
+        tuple: (start, end) inclusive byte offsets, None if there is no usable header
+            (the whole file is sent), or False if the range cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # The last `end` bytes
+        start, end = max(0, size - int(end)), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def start_output_server(directory, port=OUTPUT_SERVER_PORT, host=OUTPUT_SERVER_HOST):
+    """
+    Serves the files of a directory at http://host:port/<file name> on a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() to stop it).
+    """
+    # http.server is only imported when the server is enabled
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class OutputHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _serve(self, send_body):
+            name = os.path.basename(self.path.split('?')[0])
+            path = os.path.join(self.server.directory, name)
+            if not name or not os.path.isfile(path):
+                self.send_error(404)
+                return
+            size = os.path.getsize(path)
+            byte_range = parse_range(self.headers.get('Range'), size)
+            if byte_range is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.end_headers()
+                return
+            start, end = byte_range or (0, size - 1)
+            length = end - start + 1 if size else 0
+
+            self.send_response(206 if byte_range else 200)
+            self.send_header('Content-Type', mimetypes.guess_type(name)[0] or 'application/octet-stream')
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            if byte_range:
+                self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+            if 'download' in self.path.split('?', 1)[-1]:
+                self.send_header('Content-Disposition', 'attachment; filename="snake_detected_video.mp4"')
+            self.end_headers()
+            if not send_body or not length:
+                return
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(start)
+                    remaining = length
+                    while remaining > 0:
+                        chunk = f.read(min(_CHUNK, remaining))
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+                        remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The player closed the connection, e.g. after seeking
+
+    server = ThreadingHTTPServer((host, port), OutputHandler)
+    server.daemon_threads = True
+    server.directory = os.path.abspath(directory)
+    threading.Thread(target=server.serve_forever, name="output-server", daemon=True).start()
+    return server
+
+
+def output_url(path, download=False, port=OUTPUT_SERVER_PORT, base_url=OUTPUT_SERVER_URL):
+    """Returns the URL the browser loads a served output file from."""
+    base = base_url or f"http://localhost:{port}"
+    return f"{base.rstrip('/')}/{os.path.basename(path)}{'?download' if download else ''}"
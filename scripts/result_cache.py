@@ -0,0 +1,240 @@
+# scripts/result_cache.py
+# This script defines a content-addressed cache of detection results.
+# Results are keyed by a hash of the image content plus the backend, model id and
+# confidence threshold, kept in an in-memory LRU tier and optionally in an on-disk
+# tier with size-based eviction. A hit skips the network and the model entirely.
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import (RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_DIR,
+                    RESULT_CACHE_MAX_DISK_MB, ROBOFLOW_MODEL_ID, LOCAL_MODEL_PATH, LOCAL_ENGINE,
+                    LOCAL_ENGINE_INT8, CONF_THRESHOLD, API_UPLOAD_MAX_SIZE, API_UPLOAD_FORMAT)
+from image_io import is_image_path, is_encoded_bytes, is_pil_image
+from engines import resolve_engine, weights_digest
+
+_READ_CHUNK = 1024 * 1024
+
+
+def image_digest(image):
+    """
+    Returns a hex digest of an image's content.
+
+    Files and encoded bytes are hashed as stored; numpy arrays and PIL images
+    are hashed over their pixels together with their shape and type.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if is_image_path(image):
+        with open(image, 'rb') as f:
+            for chunk in iter(lambda: f.read(_READ_CHUNK), b''):
+                h.update(chunk)
+    elif is_encoded_bytes(image):
+        h.update(image)
+    elif is_pil_image(image):
+        h.update(f"pil:{image.mode}:{image.size}".encode())
+        h.update(image.tobytes())
+    else:
+        import numpy as np
+        array = np.ascontiguousarray(image)
+        h.update(f"array:{array.dtype}:{array.shape}".encode())
+        h.update(array)
+    return h.hexdigest()
+
+
+def backend_model_id(backend):
+    """
+    Returns the model identifier that results of a backend depend on.
+
+    For the local model this is the weights path, a hash of the weights (so retrained
+    weights at the same path never hit results of the old ones) and the engine actually
+    used, which is "pytorch" when the configured engine's export is missing.
+    """
+    if backend == "api":
+        if API_UPLOAD_MAX_SIZE:
+            # Boxes found on a downscaled upload can differ slightly from full-size ones
+            return f"{ROBOFLOW_MODEL_ID}|{API_UPLOAD_MAX_SIZE}{API_UPLOAD_FORMAT}"
+        return ROBOFLOW_MODEL_ID
+    model_id = os.path.abspath(LOCAL_MODEL_PATH)
+    if not os.path.exists(LOCAL_MODEL_PATH):
+        return model_id
+    # Exported and quantized engines can give slightly different boxes than the PyTorch weights
+    engine, _, _ = resolve_engine(LOCAL_ENGINE, LOCAL_MODEL_PATH, LOCAL_ENGINE_INT8)
+    return f"{model_id}|{weights_digest(LOCAL_MODEL_PATH)}|{engine}"
+
+
+class DetectionCache:
+    """
+    Two-tier LRU cache of Detections.
+
+    Args:
+        max_entries (int): Entries kept in the in-memory tier.
+        cache_dir (str): Directory of the on-disk tier. None disables it.
+        max_disk_mb (float): Size of the on-disk tier before the least recently used files are removed.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, cache_dir=RESULT_CACHE_DIR,
+                 max_disk_mb=RESULT_CACHE_MAX_DISK_MB):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'disk_evictions': 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def make_key(digest, backend, model_id=None, confidence=CONF_THRESHOLD):
+        """
+        Builds the cache key for an image digest and the settings the result depends on.
+
+        Args:
+            digest (str): The image digest from image_digest().
+            backend (str): "api" or "local".
+            model_id (str): The model identifier. Defaults to the configured model of the backend.
+            confidence (float): The confidence threshold.
+        """
+        model_id = model_id or backend_model_id(backend)
+        raw = f"{digest}|{backend}|{model_id}|{confidence}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get(self, *keys):
+        """
+        Returns the cached Detections of the first key found, or None.
+
+        Several keys can be given to accept more than one backend's result; a lookup
+        counts as a single hit or miss.
+        """
+        with self._lock:
+            for key in keys:
+                detections = self._memory.get(key)
+                if detections is not None:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return detections
+
+        for key in keys if self.cache_dir else ():
+            detections = self._load(key)
+            if detections is not None:
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                    self._remember(key, detections)
+                return detections
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key, detections):
+        """Stores Detections under a key in both tiers."""
+        with self._lock:
+            self._remember(key, detections)
+            self.stats['stores'] += 1
+        if self.cache_dir:
+            self._save(key, detections)
+
+    def clear(self):
+        """Empties the in-memory tier."""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key, detections):
+        self._memory[key] = detections
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npz")
+
+    def _load(self, key):
+        import numpy as np
+        from detections import Detections
+
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                info = json.loads(str(data['info']))
+                detections = Detections(
+                    data['xyxy'], data['confidence'], data['class_id'],
+                    {int(k): v for k, v in info['class_names'].items()},
+                    info['image_size'], info['method'],
+                )
+            os.utime(path)  # Mark as recently used for disk eviction
+            return detections
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, key, detections):
+        import numpy as np
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        info = json.dumps({
+            'class_names': detections.class_names,
+            'image_size': detections.image_size,
+            'method': detections.method,
+        })
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, xyxy=detections.xyxy, confidence=detections.confidence,
+                         class_id=detections.class_id, info=np.array(info))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write detection cache entry {path}: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += os.path.getsize(path)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npz'):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _evict_disk(self):
+        # Remove least recently used files until the tier is back at 90% of its budget
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.stats['disk_evictions'] += 1
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide detection cache, or None if caching is disabled."""
+    global _cache
+    if not RESULT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DetectionCache()
+    return _cache
@@ -0,0 +1,241 @@
+# scripts/roboflow_client.py
+# This script defines a long-lived client for the Roboflow hosted inference API.
+# The model ID is resolved into an endpoint once, and predictions are sent over a
+# pool of keep-alive HTTP connections with configurable timeouts and bounded
+# retries with exponential backoff.
+
+import base64
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import (ROBOFLOW_API_KEY, ROBOFLOW_MODEL_ID, ROBOFLOW_API_URL, CONF_THRESHOLD,
+                    API_CONNECT_TIMEOUT, API_READ_TIMEOUT, API_MAX_RETRIES,
+                    API_RETRY_BACKOFF, API_POOL_SIZE)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RoboflowAPIError(Exception):
+    """Raised when the Roboflow API returns an error response."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_model_id(model_id):
+    """
+    Splits a Roboflow model ID into its project and version.
+
+    Args:
+        model_id (str): The model ID in "workspace/project/version" or "project/version" format.
+
+    Returns:
+        tuple: (project_id, version)
+
+    Raises:
+        Exception: If the model ID has an invalid format.
+    """
+    parts = model_id.strip('/').split('/')
+    if len(parts) == 3:
+        _, project_id, version = parts
+    elif len(parts) == 2:
+        project_id, version = parts
+    else:
+        raise Exception(f"Invalid ROBOFLOW_MODEL_ID format: {model_id}. Expected 'workspace/project/version' or 'project/version'")
+    return project_id, version
+
+
+def build_session(pool_size=API_POOL_SIZE, max_retries=API_MAX_RETRIES, backoff_factor=API_RETRY_BACKOFF):
+    """
+    Creates a requests session with a keep-alive connection pool and bounded retries.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'POST']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class RoboflowClient:
+    """
+    Reusable client for a single Roboflow model.
+
+    Args:
+        api_key (str): The Roboflow API key.
+        model_id (str): The model ID in "workspace/project/version" or "project/version" format.
+        api_url (str): The base URL of the inference API. Point it at a local stub server for offline tests.
+        connect_timeout (float): Seconds to wait for a connection.
+        read_timeout (float): Seconds to wait for a response.
+        max_retries (int): Retries for connection errors and 429/5xx responses.
+        backoff_factor (float): Exponential backoff factor between retries.
+        pool_size (int): Number of keep-alive connections to keep open.
+    """
+
+    def __init__(self, api_key=ROBOFLOW_API_KEY, model_id=ROBOFLOW_MODEL_ID, api_url=ROBOFLOW_API_URL,
+                 connect_timeout=API_CONNECT_TIMEOUT, read_timeout=API_READ_TIMEOUT,
+                 max_retries=API_MAX_RETRIES, backoff_factor=API_RETRY_BACKOFF, pool_size=API_POOL_SIZE):
+        if not api_key:
+            raise Exception("ROBOFLOW_API_KEY is not set. Please configure it in environment variables or Streamlit secrets.")
+        self.api_key = api_key
+        self.model_id = model_id
+        self.project_id, self.version = parse_model_id(model_id)
+        self.endpoint = f"{api_url.rstrip('/')}/{self.project_id}/{self.version}"
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = build_session(pool_size, max_retries, backoff_factor)
+        self.stats = {'requests': 0, 'errors': 0, 'bytes_sent': 0, 'seconds': 0.0}
+        self._stats_lock = threading.Lock()
+
+    def predict(self, image, confidence=CONF_THRESHOLD, overlap=0.3):
+        """
+        Sends an image to the model and returns the prediction JSON.
+
+        Args:
+            image (str or bytes): The path to an image file or the encoded image bytes.
+            confidence (float): Minimum confidence (0.0-1.0) of returned predictions.
+            overlap (float): Maximum overlap (0.0-1.0) used by the server-side NMS.
+
+        Returns:
+            dict: The prediction results, in the same format as the Roboflow SDK.
+
+        Raises:
+            RoboflowAPIError: If the API returns an error response.
+            Exception: For network errors once retries are exhausted.
+        """
+        if isinstance(image, (str, os.PathLike)):
+            with open(image, 'rb') as f:
+                image = f.read()
+        payload = base64.b64encode(image)
+        params = {
+            'api_key': self.api_key,
+            'confidence': round(confidence * 100),
+            'overlap': round(overlap * 100),
+            'format': 'json',
+        }
+
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                self.endpoint,
+                params=params,
+                data=payload,
+                headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                timeout=self.timeout,
+            )
+        except Exception:
+            self._record(len(payload), time.perf_counter() - start, error=True)
+            raise
+        self._record(len(payload), time.perf_counter() - start, error=not response.ok)
+
+        if not response.ok:
+            raise RoboflowAPIError(
+                f"Roboflow API returned HTTP {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+            )
+        return response.json()
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _record(self, bytes_sent, seconds, error=False):
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_sent'] += bytes_sent
+            self.stats['seconds'] += seconds
+            if error:
+                self.stats['errors'] += 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide Roboflow client for the configured model, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RoboflowClient()
+    return _client
+
+
+def set_client(client):
+    """
+    Replaces the process-wide Roboflow client (e.g. with one pointed at a stub server)
+    and closes the previous one.
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    if previous is not None and previous is not client:
+        previous.close()
+
+
+def main():
+    """
+    Compares a fresh connection per request against the pooled client,
+    using a local stub server so no API key or network is needed.
+    """
+    import argparse
+    import requests
+    from mock_roboflow_server import MockRoboflowServer
+
+    parser = argparse.ArgumentParser(description="Measure round-trip savings of the pooled Roboflow client")
+    parser.add_argument('--requests', type=int, default=50, help="Number of predictions per run")
+    parser.add_argument('--latency', type=float, default=0.02, help="Simulated server latency in seconds")
+    args = parser.parse_args()
+
+    image = b'\xff\xd8' + os.urandom(50_000)
+    with MockRoboflowServer(latency=args.latency) as server:
+        # Per-call setup: resolve the model through metadata calls and open a new connection every time.
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            with requests.Session() as session:
+                for path in server.metadata_paths("demo-workspace/snake-detection/1"):
+                    session.get(server.url + path, params={'api_key': 'test'}).raise_for_status()
+                session.post(f"{server.url}/snake-detection/1", params={'api_key': 'test'},
+                             data=base64.b64encode(image)).raise_for_status()
+        per_call = time.perf_counter() - start
+        per_call_connections = server.stats['connections']
+
+        server.reset_stats()
+        start = time.perf_counter()
+        with RoboflowClient(api_key='test', model_id="demo-workspace/snake-detection/1", api_url=server.url) as client:
+            for _ in range(args.requests):
+                client.predict(image)
+        pooled = time.perf_counter() - start
+        pooled_connections = server.stats['connections']
+
+    print(f"Per-call client: {per_call / args.requests * 1000:.1f} ms/request, {per_call_connections} connections")
+    print(f"Pooled client:   {pooled / args.requests * 1000:.1f} ms/request, {pooled_connections} connections")
+    print(f"Speedup: {per_call / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# scripts/sampling.py
+# This script defines how video detection picks the frames the detector runs on.
+# FixedSampler keeps the original rule (first frame and every Nth frame).
+# MotionSampler compares downscaled frames with a running background model and
+# samples densely while something moves, falling back to a sparse keep-alive
+# stride in static scenes such as fixed trail cameras.
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import (VIDEO_DETECTION_STRIDE, MOTION_DENSE_STRIDE, MOTION_IDLE_STRIDE,
+                    MOTION_THRESHOLD, MOTION_PIXEL_DELTA, MOTION_HOLD_FRAMES,
+                    MOTION_DOWNSCALE_WIDTH, MOTION_BACKGROUND_RATE)
+
+
+def is_sampled(frame_number, stride=VIDEO_DETECTION_STRIDE):
+    """Returns True if detection runs on this (1-based) frame number."""
+    return frame_number == 1 or frame_number % stride == 0
+
+
+class FixedSampler:
+    """
+    Samples the first frame and every `stride`-th frame.
+
+    The decision only depends on the frame number, so unsampled frames
+    never need to be decoded.
+    """
+
+    needs_pixels = False
+
+    def __init__(self, stride=VIDEO_DETECTION_STRIDE):
+        self.stride = max(1, int(stride))
+        self.sampled_frames = 0
+
+    def should_sample(self, frame_number, frame=None):
+        sampled = is_sampled(frame_number, self.stride)
+        if sampled:
+            self.sampled_frames += 1
+        return sampled
+
+
+class MotionSampler:
+    """
+    Samples frames based on cheap motion detection.
+
+    Each frame is downscaled, converted to grey and compared with a running-average
+    background. When the fraction of changed pixels exceeds `threshold`, frames are
+    sampled every `dense_stride` frames until `hold_frames` frames after the motion
+    stops. Otherwise only one frame every `idle_stride` frames is sampled.
+
+    Args:
+        dense_stride (int): Stride while motion is present.
+        idle_stride (int): Keep-alive stride while the scene is static.
+        threshold (float): Fraction of changed pixels that counts as motion.
+        pixel_delta (int): Grey-level difference for a pixel to count as changed.
+        hold_frames (int): Frames to keep sampling densely after the last motion.
+        downscale_width (int): Width the frames are downscaled to before comparing.
+        background_rate (float): Learning rate of the running-average background (0-1).
+    """
+
+    needs_pixels = True
+
+    def __init__(self, dense_stride=MOTION_DENSE_STRIDE, idle_stride=MOTION_IDLE_STRIDE,
+                 threshold=MOTION_THRESHOLD, pixel_delta=MOTION_PIXEL_DELTA,
+                 hold_frames=MOTION_HOLD_FRAMES, downscale_width=MOTION_DOWNSCALE_WIDTH,
+                 background_rate=MOTION_BACKGROUND_RATE):
+        self.dense_stride = max(1, int(dense_stride))
+        self.idle_stride = max(1, int(idle_stride))
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.hold_frames = hold_frames
+        self.downscale_width = downscale_width
+        self.background_rate = background_rate
+        self.background = None
+        self.last_sampled = None
+        self.active_until = 0
+        self.sampled_frames = 0
+        self.motion_frames = 0
+
+    def motion_score(self, frame):
+        """Returns the fraction of pixels that differ from the background model."""
+        import cv2
+
+        height, width = frame.shape[:2]
+        scale = self.downscale_width / width if width > self.downscale_width else 1.0
+        small = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        grey = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self.background is None:
+            self.background = grey.astype('float32')
+            return 0.0
+        diff = cv2.absdiff(grey, cv2.convertScaleAbs(self.background))
+        changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1])
+        cv2.accumulateWeighted(grey, self.background, self.background_rate)
+        return changed / diff.size
+
+    def should_sample(self, frame_number, frame):
+        if self.motion_score(frame) > self.threshold:
+            self.motion_frames += 1
+            self.active_until = frame_number + self.hold_frames
+
+        stride = self.dense_stride if frame_number <= self.active_until else self.idle_stride
+        sampled = self.last_sampled is None or frame_number - self.last_sampled >= stride
+        if sampled:
+            self.last_sampled = frame_number
+            self.sampled_frames += 1
+        return sampled
+
+
+def make_sampler(mode="fixed", stride=VIDEO_DETECTION_STRIDE):
+    """
+    Creates the frame sampler for a sampling mode.
+
+    Args:
+        mode (str): "fixed" or "motion".
+        stride (int): Stride of the fixed sampler.
+
+    Raises:
+        Exception: If the mode is unknown.
+    """
+    if mode == "fixed":
+        return FixedSampler(stride)
+    if mode == "motion":
+        return MotionSampler()
+    raise Exception(f"Invalid sampling mode: {mode}. Expected 'fixed' or 'motion'")
@@ -6,7 +6,6 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 import config
-from roboflow import Roboflow
 
 def test_api():
     """
@@ -20,6 +19,9 @@ def test_api():
     print(f"Model ID: {config.ROBOFLOW_MODEL_ID}")
     
     try:
+        # Imported here so a missing key is reported without loading the roboflow SDK
+        from roboflow import Roboflow
+
         rf = Roboflow(api_key=config.ROBOFLOW_API_KEY)
         
         # Parse model ID
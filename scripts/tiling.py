@@ -0,0 +1,175 @@
+# scripts/tiling.py
+# This script defines tiled (sliced) inference for high-resolution images.
+# A large image is cut into overlapping tiles of the model's input size, so small objects
+# keep their pixels instead of being shrunk with the whole image. Tiles with almost no
+# content (blank sky, letterboxing) are skipped before inference, the rest are detected
+# as one batch, and their boxes are shifted back to full-image coordinates and merged
+# across tile overlaps by NMS or weighted box fusion (WBF). Optionally the whole image is
+# detected too, so objects larger than a tile are not lost.
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import (TILE_SIZE, TILE_OVERLAP, TILE_MIN_IMAGE_SIZE, TILE_MIN_STD, TILE_MERGE, TILE_MERGE_IOU,
+                    TILE_FULL_IMAGE)
+from detections import Detections
+from tracking import box_iou
+from metrics import StageTimings, get_metrics
+
+MERGE_METHODS = ("nms", "wbf")
+
+
+def tile_starts(length, tile_size, overlap):
+    """Returns the start offsets of tiles covering [0, length), the last one flush with the end."""
+    if length <= tile_size:
+        return [0]
+    step = max(1, int(tile_size * (1 - overlap)))
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_grid(width, height, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """
+    Returns the tiles covering an image.
+
+    Returns:
+        list: (x1, y1, x2, y2) tile rectangles, row by row.
+    """
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in tile_starts(height, tile_size, overlap)
+            for x in tile_starts(width, tile_size, overlap)]
+
+
+def is_blank(tile, min_std=TILE_MIN_STD):
+    """Returns True if a tile has too little variation to contain anything (checked on every 4th pixel)."""
+    return min_std > 0 and float(tile[::4, ::4].std()) < min_std
+
+
+def weighted_box_fusion(detections, iou_threshold=TILE_MERGE_IOU):
+    """
+    Fuses overlapping boxes of the same class into their confidence-weighted average.
+
+    Boxes are visited from the most confident; each joins the first fused box of its class
+    it overlaps above iou_threshold, or starts a new one. A fused box keeps the highest
+    confidence of its members, so merging partial tile boxes never lowers the score.
+    """
+    import numpy as np
+
+    if len(detections) <= 1:
+        return detections
+    clusters, fused = [], []
+    for i in np.argsort(-detections.confidence):
+        box = detections.xyxy[i]
+        for k, members in enumerate(clusters):
+            if (detections.class_id[members[0]] == detections.class_id[i]
+                    and box_iou(fused[k].tolist(), box.tolist()) >= iou_threshold):
+                members.append(i)
+                weights = detections.confidence[members][:, None]
+                fused[k] = (detections.xyxy[members] * weights).sum(axis=0) / weights.sum()
+                break
+        else:
+            clusters.append([i])
+            fused.append(box.copy())
+
+    return Detections(np.array(fused), [detections.confidence[m].max() for m in clusters],
+                      [detections.class_id[m[0]] for m in clusters], detections.class_names,
+                      detections.image_size, detections.method, dict(detections.meta))
+
+
+def merge_detections(detections, merge=TILE_MERGE, iou_threshold=TILE_MERGE_IOU):
+    """
+    Merges duplicate boxes found in overlapping tiles.
+
+    Args:
+        detections (Detections): All boxes in full-image coordinates.
+        merge (str): "nms" keeps the most confident box, "wbf" averages the overlapping ones.
+        iou_threshold (float): Boxes of the same class overlapping above this are duplicates.
+
+    Raises:
+        Exception: If the merge method is unknown.
+    """
+    if merge == "nms":
+        return detections.nms(iou_threshold)
+    if merge == "wbf":
+        return weighted_box_fusion(detections, iou_threshold)
+    raise Exception(f"Unknown tile merge method: {merge}. Choose one of: {', '.join(MERGE_METHODS)}")
+
+
+def needs_tiling(width, height, min_image_size=TILE_MIN_IMAGE_SIZE, tile_size=TILE_SIZE):
+    """Returns True if an image is large enough to be worth tiling."""
+    return max(width, height) >= max(min_image_size, tile_size + 1)
+
+
+def detect_tiled(image, run_batch, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, merge=TILE_MERGE,
+                 iou_threshold=TILE_MERGE_IOU, min_std=TILE_MIN_STD, full_image=TILE_FULL_IMAGE):
+    """
+    Detects objects in a large image tile by tile.
+
+    Args:
+        image (numpy.ndarray): The BGR image.
+        run_batch (callable): Function (list of images) -> (list of Detections, method, error message),
+            e.g. detection with a fixed method preference. All tiles go to it in one call.
+        tile_size (int): Tile side in pixels.
+        overlap (float): Fraction of a tile shared with its neighbours (0 to <1).
+        merge (str): "nms" or "wbf".
+        iou_threshold (float): IoU above which boxes from overlapping tiles are merged.
+        min_std (float): Tiles with a lower pixel standard deviation are skipped (0 keeps all).
+        full_image (bool): Also detect on the whole image.
+
+    Returns:
+        tuple: (Detections in full-image coordinates, method, error message). The detections'
+            meta['tiles'] holds the tile counts and the slice/inference/merge timings.
+    """
+    if not 0 <= overlap < 1:
+        raise Exception(f"Tile overlap must be between 0 and 1, got {overlap}")
+    height, width = image.shape[:2]
+    timings = StageTimings()
+    start = time.perf_counter()
+
+    with timings.time("tile_slice"):
+        grid = tile_grid(width, height, tile_size, overlap)
+        kept, tiles = [], []
+        for x1, y1, x2, y2 in grid:
+            tile = image[y1:y2, x1:x2]
+            if not is_blank(tile, min_std):
+                kept.append((x1, y1))
+                tiles.append(tile)
+        # With every tile blank, the whole image is still checked once
+        full_image = full_image or not tiles
+        inputs = tiles + [image] if full_image else tiles
+
+    with timings.time("tile_inference"):
+        predictions, method, error_msg = run_batch(inputs)
+    if error_msg:
+        return None, method, error_msg
+
+    with timings.time("tile_merge"):
+        parts = [p.offset(x, y, image_size=(width, height)) for p, (x, y) in zip(predictions, kept)]
+        if full_image:
+            parts.append(predictions[-1])
+        merged = Detections.concatenate(parts, image_size=(width, height), method=method)
+        candidates = len(merged)
+        merged = merge_detections(merged, merge, iou_threshold)
+
+    skipped = len(grid) - len(tiles)
+    metrics = get_metrics()
+    metrics.inc('tiles_total', len(tiles), outcome="detected")
+    metrics.inc('tiles_total', skipped, outcome="skipped")
+    merged.meta['tiles'] = {
+        'tiles': len(grid),
+        'detected': len(tiles),
+        'skipped': skipped,
+        'full_image': full_image,
+        'tile_size': tile_size,
+        'overlap': overlap,
+        'merge': merge,
+        'candidates': candidates,
+        'seconds': round(time.perf_counter() - start, 4),
+        'timings': timings.summary(),
+    }
+    print(f"Tiled inference: {len(tiles)}/{len(grid)} tiles detected ({skipped} blank skipped), "
+          f"{candidates} boxes merged into {len(merged)}.")
+    return merged, method, None
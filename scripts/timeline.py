@@ -0,0 +1,65 @@
+# scripts/timeline.py
+# This script defines the detections-only "timeline" output of video detection.
+# Instead of re-encoding an annotated video, the per-frame detections are written
+# as a compact JSON document or a Parquet table (one row per detection).
+
+import json
+import tempfile
+
+
+def default_timeline_path(output_dir, fmt="json"):
+    """
+    Creates an empty, uniquely named timeline file in output_dir and returns its path,
+    so concurrent jobs never overwrite each other's output.
+    """
+    with tempfile.NamedTemporaryFile(prefix="detected_timeline_", suffix=f".{fmt}", dir=output_dir,
+                                     delete=False) as f:
+        return f.name
+
+
+def write_timeline(path, video_info, frames, fmt="json"):
+    """
+    Writes the detection timeline of a video.
+
+    Args:
+        path (str): The output file path.
+        video_info (dict): Video properties (source, fps, width, height, total_frames, stride).
+        frames (list): Per sampled frame dicts with 'frame', 'time', 'method' and 'detections'.
+        fmt (str): "json" or "parquet". Parquet needs polars.
+
+    Raises:
+        Exception: If the format is unknown or polars is not installed for Parquet.
+    """
+    if fmt == "json":
+        with open(path, 'w') as f:
+            json.dump({'video': video_info, 'frames': frames}, f, separators=(',', ':'))
+    elif fmt == "parquet":
+        try:
+            import polars as pl
+        except ImportError as e:
+            raise Exception(f"Parquet timelines need polars. Install it or use the JSON format: {e}")
+
+        rows = []
+        for record in frames:
+            detections = record['detections'] or [None]
+            for det in detections:
+                rows.append({
+                    'frame': record['frame'],
+                    'time': record['time'],
+                    'method': record['method'],
+                    'class': det['class'] if det else None,
+                    'confidence': det['confidence'] if det else None,
+                    'x1': det['box'][0] if det else None,
+                    'y1': det['box'][1] if det else None,
+                    'x2': det['box'][2] if det else None,
+                    'y2': det['box'][3] if det else None,
+                    'track_id': det.get('track_id') if det else None,
+                })
+        schema = {
+            'frame': pl.Int64, 'time': pl.Float64, 'method': pl.Utf8, 'class': pl.Utf8,
+            'confidence': pl.Float32, 'x1': pl.Float32, 'y1': pl.Float32, 'x2': pl.Float32, 'y2': pl.Float32,
+            'track_id': pl.Int64,
+        }
+        pl.DataFrame(rows, schema=schema).write_parquet(path)
+    else:
+        raise Exception(f"Unknown timeline format: {fmt}. Expected 'json' or 'parquet'")
@@ -0,0 +1,158 @@
+# scripts/tracking.py
+# This script defines a lightweight box tracker used to carry detections across
+# video frames the detector did not run on. Detections on sampled frames are
+# associated to existing tracks by IoU, each track keeps a constant-velocity motion
+# estimate, and boxes on the frames in between are extrapolated from that motion.
+# This lets the detection stride grow while overlays stay continuous and track IDs stable.
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config import TRACK_IOU_THRESHOLD, TRACK_MAX_AGE, TRACK_VELOCITY_SMOOTHING
+
+
+def box_iou(a, b):
+    """Returns the intersection over union of two [x1, y1, x2, y2] boxes."""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter <= 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+class Track:
+    """A tracked object with its last detected box and per-frame velocity."""
+
+    def __init__(self, track_id, detection, frame_number):
+        self.id = track_id
+        self.box = list(detection['box'])
+        self.velocity = [0.0, 0.0, 0.0, 0.0]
+        self.class_name = detection['class']
+        self.confidence = detection['confidence']
+        self.last_frame = frame_number
+        self.hits = 1
+
+    def predict_box(self, frame_number):
+        """Extrapolates the box to another frame with the constant-velocity model."""
+        gap = frame_number - self.last_frame
+        return [c + v * gap for c, v in zip(self.box, self.velocity)]
+
+    def update(self, detection, frame_number, smoothing):
+        gap = max(1, frame_number - self.last_frame)
+        measured = [(new - old) / gap for new, old in zip(detection['box'], self.box)]
+        self.velocity = [smoothing * m + (1 - smoothing) * v for m, v in zip(measured, self.velocity)]
+        self.box = list(detection['box'])
+        self.class_name = detection['class']
+        self.confidence = detection['confidence']
+        self.last_frame = frame_number
+        self.hits += 1
+
+    def as_record(self, box=None):
+        return {
+            'track_id': self.id,
+            'class': self.class_name,
+            'confidence': self.confidence,
+            'box': [round(c, 1) for c in (box if box is not None else self.box)],
+        }
+
+
+class BoxTracker:
+    """
+    Associates detections across sampled frames and propagates them to the frames in between.
+
+    Args:
+        iou_threshold (float): Minimum IoU between a track's predicted box and a detection to match them.
+        max_age (int): Frames a track is kept without a matching detection before it is dropped.
+        velocity_smoothing (float): Weight of the newest velocity measurement (0-1).
+    """
+
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_age=TRACK_MAX_AGE,
+                 velocity_smoothing=TRACK_VELOCITY_SMOOTHING):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.velocity_smoothing = velocity_smoothing
+        self.tracks = []
+        self.next_id = 1
+        self.last_update = None
+
+    @property
+    def total_tracks(self):
+        """Number of track IDs handed out so far."""
+        return self.next_id - 1
+
+    def update(self, frame_number, detections):
+        """
+        Updates the tracks with the detections of a sampled frame.
+
+        Args:
+            frame_number (int): The frame the detections belong to.
+            detections (list): Dicts with 'class', 'confidence' and 'box' ([x1, y1, x2, y2]).
+
+        Returns:
+            list: The detections with their 'track_id' added.
+        """
+        # Greedy association, highest IoU first, between predicted track boxes and detections
+        predicted = [track.predict_box(frame_number) for track in self.tracks]
+        pairs = []
+        for t, box in enumerate(predicted):
+            for d, det in enumerate(detections):
+                iou = box_iou(box, det['box'])
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, t, d))
+        pairs.sort(reverse=True)
+
+        matched_tracks, assigned = set(), {}
+        for _, t, d in pairs:
+            if t in matched_tracks or d in assigned:
+                continue
+            matched_tracks.add(t)
+            assigned[d] = self.tracks[t]
+            self.tracks[t].update(detections[d], frame_number, self.velocity_smoothing)
+
+        results = []
+        for d, det in enumerate(detections):
+            track = assigned.get(d)
+            if track is None:
+                track = Track(self.next_id, det, frame_number)
+                self.next_id += 1
+                self.tracks.append(track)
+            results.append(dict(det, track_id=track.id))
+
+        self.tracks = [t for t in self.tracks if frame_number - t.last_frame <= self.max_age]
+        self.last_update = frame_number
+        return results
+
+    def predict(self, frame_number):
+        """
+        Returns the propagated boxes for a frame the detector did not run on.
+
+        Only tracks that were matched on the latest sampled frame are returned,
+        so objects that disappeared are not drawn.
+
+        Returns:
+            list: Dicts with 'track_id', 'class', 'confidence' and 'box'.
+        """
+        return [
+            track.as_record(track.predict_box(frame_number))
+            for track in self.tracks
+            if track.last_frame == self.last_update
+        ]
+
+
+def draw_tracks(frame, records, color=(0, 255, 0)):
+    """
+    Draws tracked boxes with their track IDs on a frame.
+
+    Returns:
+        The frame with boxes drawn.
+    """
+    import cv2
+    for record in records:
+        x1, y1, x2, y2 = (int(c) for c in record['box'])
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        label = f"{record['class']} #{record['track_id']} {record['confidence']:.2f}"
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
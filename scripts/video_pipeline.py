@@ -0,0 +1,108 @@
+# scripts/video_pipeline.py
+# This script defines a small threaded pipeline used by the video detection engine.
+# Each stage is an iterator that runs on its own thread and hands its items to the
+# next stage through a bounded queue, so decoding, inference and encoding overlap
+# while frame order is kept and a slow stage applies backpressure to the ones before it.
+
+import queue
+import threading
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class _Failure:
+    """Carries an exception raised inside a stage to the consuming thread."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class Pipeline:
+    """
+    Runs iterator stages on background threads joined by bounded queues.
+
+    Use it as a context manager: leaving the block (normally or because of an
+    error) stops every stage and waits for the threads to finish.
+
+    Args:
+        queue_size (int): Maximum number of items waiting between two stages.
+        enabled (bool): If False, stages run inline on the calling thread.
+        join_timeout (float): Seconds to wait for each stage thread on shutdown.
+    """
+
+    def __init__(self, queue_size=16, enabled=True, join_timeout=10.0):
+        self.queue_size = max(1, int(queue_size))
+        self.enabled = enabled
+        self.join_timeout = join_timeout
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    def stage(self, iterable, name):
+        """
+        Starts consuming `iterable` on a new thread.
+
+        Args:
+            iterable: The iterator producing this stage's items.
+            name (str): The thread name, used in error messages and debuggers.
+
+        Returns:
+            iterator: Yields the stage's items in order on the calling thread.
+                Exceptions raised by the stage are re-raised here.
+        """
+        if not self.enabled:
+            return iterable
+
+        items = queue.Queue(maxsize=self.queue_size)
+        thread = threading.Thread(target=self._produce, args=(iterable, items), name=name, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return self._consume(items, thread)
+
+    def close(self):
+        """Stops every stage and waits for the stage threads to exit."""
+        self.stop_event.set()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(self.join_timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _produce(self, iterable, items):
+        try:
+            for item in iterable:
+                if not self._put(items, item):
+                    return
+            self._put(items, _DONE)
+        except BaseException as e:
+            self._put(items, _Failure(e))
+
+    def _put(self, items, item):
+        # Blocks while the queue is full (backpressure) unless the pipeline is stopping.
+        while not self.stop_event.is_set():
+            try:
+                items.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _consume(self, items, thread):
+        while True:
+            try:
+                item = items.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    return
+                if not thread.is_alive() and items.empty():
+                    raise RuntimeError(f"Pipeline stage '{thread.name}' exited unexpectedly")
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
@@ -0,0 +1,436 @@
+# scripts/video_shards.py
+# This script spreads detection on one long video over several worker processes.
+# The video is split into frame ranges that start on keyframes (listed with ffprobe when
+# it is installed, otherwise the ranges are split evenly and OpenCV seeks to them), and
+# each range is run through detect_video() in a process pool whose workers hold their
+# own model. The annotated segments are stitched into one MP4 (ffmpeg concat without
+# re-encoding, or OpenCV as a fallback) and the per-segment stats are merged into the
+# stats dict detect_video() returns. Timeline outputs are merged the same way.
+# Frame numbers and fixed-stride sampling match an unsharded run; trackers and motion
+# samplers start fresh in every segment.
+# On cancellation or a failed segment, a shared event stops the segments that are running
+# and the pool is shut down without waiting for them.
+#
+# Example:
+#   python video_shards.py ../data/trailcam_4h.mp4 --workers 8 --method local
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+from config import VIDEO_SHARD_WORKERS, VIDEO_SHARD_MIN_FRAMES, VIDEO_DETECTION_STRIDE, VIDEO_TRACKING, VIDEO_SAMPLING
+from metrics import get_metrics, log_event
+
+# Stats of the segments that are added up in the merged stats
+SUMMED_STATS = ('processed_frames', 'decoded_frames', 'inference_frames', 'detections')
+
+# Set in every worker process by _init_shard_worker(); once set, running segments stop
+_cancel_event = None
+
+
+def video_properties(video_path):
+    """
+    Returns (fps, width, height, total frames) of a video.
+
+    Raises:
+        Exception: If the video cannot be opened.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise Exception("Failed to open video file")
+        return (cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    finally:
+        cap.release()
+
+
+def keyframes(video_path, fps):
+    """
+    Lists the keyframes of a video's first video stream with ffprobe.
+
+    Only packet headers are read, so this takes seconds even for hours of footage.
+
+    Returns:
+        list: Sorted 1-based frame numbers of the keyframes, or None if ffprobe is not
+            installed or fails.
+    """
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None or not fps:
+        return None
+    try:
+        proc = subprocess.run([ffprobe, '-v', 'error', '-select_streams', 'v:0',
+                               '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path],
+                              capture_output=True, text=True, timeout=600)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if proc.returncode != 0:
+        return None
+
+    packets = []
+    for line in proc.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        try:
+            packets.append((float(pts_time), 'K' in flags))
+        except ValueError:
+            continue  # Packets without a timestamp ("N/A")
+    if not packets:
+        return None
+    # Timestamps can start above zero (e.g. with B-frames); frame 1 is the earliest one
+    origin = min(pts for pts, _ in packets)
+    return sorted({round((pts - origin) * fps) + 1 for pts, key in packets if key}) or None
+
+
+def plan_shards(total_frames, workers, keyframe_list=None, min_frames=VIDEO_SHARD_MIN_FRAMES):
+    """
+    Splits a video into frame ranges, one per worker at most.
+
+    Each boundary is moved to the nearest keyframe when keyframes are known, so every
+    segment can be decoded from its first frame without decoding the previous ones.
+
+    Args:
+        total_frames (int): Frames in the video.
+        workers (int): Number of worker processes.
+        keyframe_list (list): 1-based keyframe numbers from keyframes(), or None.
+        min_frames (int): Smallest segment worth its own worker.
+
+    Returns:
+        list: (start_frame, end_frame) 1-based inclusive ranges covering the whole video.
+    """
+    count = max(1, min(workers, total_frames // max(1, min_frames)))
+    starts = [1]
+    for i in range(1, count):
+        target = 1 + round(i * total_frames / count)
+        if keyframe_list:
+            target = min(keyframe_list, key=lambda frame: abs(frame - target))
+        if starts[-1] < target <= total_frames:
+            starts.append(target)
+    ends = [start - 1 for start in starts[1:]] + [total_frames]
+    return list(zip(starts, ends))
+
+
+def _init_shard_worker(method, workers, cancel_event):
+    """Prepares a worker process (see workers.init_worker) and keeps the pool's cancel event."""
+    global _cancel_event
+    from workers import init_worker
+
+    _cancel_event = cancel_event
+    init_worker(method, workers)
+
+
+def _run_shard(video_path, start_frame, end_frame, segment_path, options):
+    """Runs detect_video() on one segment in a worker process."""
+    from detect_video import detect_video
+
+    return detect_video(video_path, output_path=segment_path, start_frame=start_frame, end_frame=end_frame,
+                        pipelined=True, cancel_event=_cancel_event, **options)
+
+
+def stitch_videos(segment_paths, output_path, fps, size):
+    """
+    Joins MP4 segments into one video.
+
+    The segments share their codec settings, so ffmpeg's concat demuxer can join them
+    without re-encoding. Without ffmpeg the frames are copied with OpenCV.
+
+    Returns:
+        str: "ffmpeg" or "opencv", the tool that was used.
+
+    Raises:
+        Exception: If the segments cannot be joined.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is not None:
+        list_path = f"{output_path}.segments.txt"
+        with open(list_path, 'w') as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        try:
+            proc = subprocess.run([ffmpeg, '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', list_path,
+                                   '-c', 'copy', output_path], capture_output=True, text=True)
+        finally:
+            os.remove(list_path)
+        if proc.returncode == 0:
+            return "ffmpeg"
+        print(f"ffmpeg concat failed, stitching with OpenCV: {proc.stderr.strip()[-200:]}")
+
+    import cv2
+
+    out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    try:
+        for path in segment_paths:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                raise Exception(f"Failed to open video segment: {path}")
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    out.write(frame)
+            finally:
+                cap.release()
+    finally:
+        out.release()
+    return "opencv"
+
+
+def merge_timings(summaries):
+    """
+    Merges the stats['timings'] of several segments.
+
+    Counts and totals are added up and the maximum is kept. Percentiles cannot be merged
+    exactly from summaries, so p50/p95 are the call-weighted average of the segments'.
+    """
+    merged = {}
+    for summary in summaries:
+        for stage, t in summary.items():
+            merged.setdefault(stage, []).append(t)
+    result = {}
+    for stage, parts in merged.items():
+        count = sum(t['count'] for t in parts)
+        total = sum(t['total_s'] for t in parts)
+        result[stage] = {
+            'count': count,
+            'total_s': total,
+            'mean_ms': total / count * 1000 if count else 0.0,
+            'p50_ms': sum(t['p50_ms'] * t['count'] for t in parts) / count if count else 0.0,
+            'p95_ms': sum(t['p95_ms'] * t['count'] for t in parts) / count if count else 0.0,
+            'max_ms': max(t['max_ms'] for t in parts),
+        }
+    return result
+
+
+def merge_stats(segment_stats, elapsed, workers):
+    """
+    Merges the stats of the segments into one stats dict shaped like detect_video()'s.
+
+    Frame and detection counts are added up, stage timings are merged with merge_timings()
+    (so their totals are CPU time over all workers), processing_fps is the frames of the
+    whole video over the wall-clock time, and stats['shards'] lists every segment.
+    """
+    first = segment_stats[0]
+    stats = dict(first)
+    stats.pop('start_frame', None)
+    stats.pop('end_frame', None)
+    for key in SUMMED_STATS:
+        stats[key] = sum(s[key] for s in segment_stats)
+    if stats['tracks'] is not None:
+        stats['tracks'] = sum(s['tracks'] for s in segment_stats)
+    stats['processing_fps'] = stats['processed_frames'] / elapsed if elapsed > 0 else 0.0
+    stats['elapsed_seconds'] = elapsed
+    stats['timings'] = merge_timings([s['timings'] for s in segment_stats])
+    stats['workers'] = workers
+    stats['shards'] = [{
+        'start_frame': s.get('start_frame', 1),
+        'end_frame': s.get('end_frame', s['processed_frames']),
+        'processed_frames': s['processed_frames'],
+        'detections': s['detections'],
+        'elapsed_seconds': s['elapsed_seconds'],
+    } for s in segment_stats]
+    return stats
+
+
+def _merge_timelines(segment_paths, output_path, timeline_format, total_frames):
+    """Joins JSON timeline segments into one timeline, renumbering track IDs per segment."""
+    from timeline import write_timeline
+
+    video_info, frames, track_offset = None, [], 0
+    for path in segment_paths:
+        with open(path) as f:
+            segment = json.load(f)
+        video_info = video_info or dict(segment['video'], total_frames=total_frames)
+        last_track = 0
+        for record in segment['frames']:
+            for det in record['detections']:
+                if det.get('track_id') is not None:
+                    last_track = max(last_track, det['track_id'])
+                    det['track_id'] += track_offset
+            frames.append(record)
+        track_offset += last_track
+    write_timeline(output_path, video_info, frames, timeline_format)
+
+
+def detect_video_sharded(video_path, progress_callback=None, preferred_method="auto", workers=VIDEO_SHARD_WORKERS,
+                         batch_size=None, output="video", timeline_format="json", output_path=None,
+                         stride=None, track=VIDEO_TRACKING, sampling=VIDEO_SAMPLING, cancel_event=None,
+                         min_frames=VIDEO_SHARD_MIN_FRAMES):
+    """
+    Detect snakes in a long video with a pool of worker processes.
+
+    Args:
+        video_path (str): Path to input video file
+        progress_callback (callable): Optional; called with (frames done, total frames) from the
+            calling thread each time a segment finishes.
+        preferred_method (str): Detection method - "auto", "api", "local", or "race"
+        workers (int): Worker processes. 0 uses one per CPU core.
+        batch_size (int): Sampled frames per detection call in each worker (see detect_video()).
+        output (str): "video" or "timeline".
+        timeline_format (str): "json" or "parquet".
+        output_path (str): Where to write the output. Defaults to a new file in the temp directory.
+        stride (int): Run detection on the first frame and every Nth frame.
+        track (bool): Propagate boxes between sampled frames (tracks restart in every segment).
+        sampling (str): "fixed" or "motion".
+        cancel_event (threading.Event): Once set, segments that have not started are cancelled,
+            running segments stop at their next frame and the error message is
+            "Video processing cancelled".
+        min_frames (int): Smallest segment worth its own worker.
+
+    Returns:
+        tuple: (output_path, method, error_msg, stats), like detect_video(). stats also has
+            'workers', 'stitch' (the tool that joined the segments) and 'shards', the range,
+            frames, detections and time of every segment.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    if output not in ("video", "timeline"):
+        return None, None, f"Invalid output type: {output}. Expected 'video' or 'timeline'", None
+    try:
+        fps, width, height, total_frames = video_properties(video_path)
+    except Exception as e:
+        return None, None, str(e), None
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    shards = plan_shards(total_frames, workers, keyframes(video_path, fps), min_frames)
+    workers = len(shards)
+    print(f"Processing video: {total_frames} frames in {len(shards)} segments on {workers} worker processes")
+
+    if output_path is None:
+        suffix = ".mp4" if output == "video" else f".{timeline_format}"
+        prefix = "detected_video_" if output == "video" else "detected_timeline_"
+        with tempfile.NamedTemporaryFile(prefix=prefix, suffix=suffix, delete=False) as f:
+            output_path = f.name
+    options = {
+        'preferred_method': preferred_method,
+        'batch_size': batch_size,
+        'output': output,
+        'timeline_format': "json",
+        'stride': stride if stride is not None else VIDEO_DETECTION_STRIDE,
+        'track': track,
+        'sampling': sampling,
+    }
+
+    workdir = tempfile.mkdtemp(prefix="video_shards_")
+    extension = ".mp4" if output == "video" else ".json"
+    segment_paths = [os.path.join(workdir, f"segment_{i:04d}{extension}") for i in range(len(shards))]
+    results = [None] * len(shards)
+    metrics = get_metrics()
+    # Passed to the workers when they start, so running segments can be stopped early
+    stop_event = multiprocessing.Event()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker,
+                               initargs=(preferred_method, workers, stop_event))
+    try:
+        try:
+            futures = {pool.submit(_run_shard, video_path, first, last, path, options): i
+                       for i, ((first, last), path) in enumerate(zip(shards, segment_paths))}
+            pending, done_frames = set(futures), 0
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                if cancel_event is not None and cancel_event.is_set():
+                    metrics.inc('video_jobs_total', outcome="cancelled")
+                    return None, None, "Video processing cancelled", None
+                for future in finished:
+                    i = futures[future]
+                    _, method, error_msg, stats = future.result()
+                    if error_msg:
+                        first, last = shards[i]
+                        metrics.inc('video_jobs_total', outcome="error")
+                        return None, method, f"Segment {first}-{last}: {error_msg}", None
+                    results[i] = (method, stats)
+                    done_frames += stats['processed_frames']
+                    if progress_callback:
+                        progress_callback(done_frames, total_frames)
+        finally:
+            if all(r is not None for r in results):
+                pool.shutdown()
+            else:
+                # Cancelled or failed: stop the running segments and do not wait for them
+                stop_event.set()
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        stitch = None
+        if output == "video":
+            stitch = stitch_videos(segment_paths, output_path, fps, (width, height))
+        else:
+            _merge_timelines(segment_paths, output_path, timeline_format, total_frames)
+
+        elapsed = time.perf_counter() - start
+        stats = merge_stats([s for _, s in results], elapsed, workers)
+        stats['stitch'] = stitch
+        method_used = next((m for m, _ in reversed(results) if m), None)
+
+        metrics.inc('video_jobs_total', outcome="ok")
+        metrics.inc('video_shards_total', len(shards))
+        metrics.observe('video_job_seconds', elapsed)
+        log_event('video_sharded', source=os.path.basename(video_path), method=method_used, workers=workers,
+                  frames=stats['processed_frames'], processing_fps=round(stats['processing_fps'], 2),
+                  seconds=round(elapsed, 3))
+        return output_path, method_used, None, stats
+
+    except Exception as e:
+        metrics.inc('video_jobs_total', outcome="error")
+        return None, None, f"Video processing error: {str(e)}", None
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    """Command line interface for sharded video detection"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect snakes in a long video with several worker processes")
+    parser.add_argument('video_path', help="Path to the input video")
+    parser.add_argument('--workers', type=int, default=VIDEO_SHARD_WORKERS,
+                        help="Worker processes (0 = one per CPU core)")
+    parser.add_argument('--method', default="auto", choices=["auto", "api", "local", "race"], help="Detection method")
+    parser.add_argument('--batch-size', type=int, default=None, help="Sampled frames per forward pass in each worker")
+    parser.add_argument('--timeline', choices=["json", "parquet"], default=None,
+                        help="Only write per-frame detections in this format instead of an annotated video")
+    parser.add_argument('--output', default=None, help="Output file path")
+    parser.add_argument('--stride', type=int, default=None, help="Run detection on every Nth frame")
+    parser.add_argument('--sampling', choices=["fixed", "motion"], default=VIDEO_SAMPLING,
+                        help="Fixed stride, or skip inference while the scene is static")
+    parser.add_argument('--track', action='store_true',
+                        help="Propagate boxes between sampled frames with track IDs")
+    parser.add_argument('--min-frames', type=int, default=VIDEO_SHARD_MIN_FRAMES,
+                        help="Smallest segment worth its own worker")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video_path):
+        print(f"Error: Video file not found: {args.video_path}")
+        sys.exit(1)
+
+    def progress(current, total):
+        print(f"\rProgress: {current}/{total} frames ({current / total * 100:.1f}%)", end='')
+
+    output_path, method, error_msg, stats = detect_video_sharded(
+        args.video_path, progress, args.method, args.workers, args.batch_size,
+        output="timeline" if args.timeline else "video", timeline_format=args.timeline or "json",
+        output_path=args.output, stride=args.stride, track=args.track, sampling=args.sampling,
+        min_frames=args.min_frames,
+    )
+    if error_msg:
+        print(f"\n\nError: {error_msg}")
+        sys.exit(1)
+
+    print(f"\n\nDetection completed using {method}")
+    print(f"Total detections: {stats['detections']}")
+    print(f"Processing speed: {stats['processing_fps']:.1f} frames/s on {stats['workers']} workers "
+          f"({stats['inference_frames']} frames inferred)")
+    for shard in stats['shards']:
+        print(f"  frames {shard['start_frame']:>8}-{shard['end_frame']:<8} {shard['detections']:>6} detections "
+              f"{shard['elapsed_seconds']:8.1f}s")
+    print(f"Output saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
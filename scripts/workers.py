@@ -0,0 +1,42 @@
+# scripts/workers.py
+# This script holds the setup shared by the process pools of detect_images.py and video_shards.py.
+# Each worker process loads the model once and gets its share of the CPU threads, so several
+# workers do not oversubscribe the cores with torch/OpenCV threads.
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def init_worker(method, workers, verbose=False):
+    """
+    Loads the model once per worker process and splits the CPU threads between workers.
+
+    Args:
+        method (str): Detection method of the pool - the local model is only preloaded
+            for "auto", "local" and "race".
+        workers (int): Number of worker processes in the pool.
+        verbose (bool): Keep the detection messages printed inside the worker.
+    """
+    if not verbose:
+        # Per-item progress messages from detect() would bury the progress line of the pool
+        sys.stdout = open(os.devnull, 'w')
+
+    cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    try:
+        import torch
+        torch.set_num_threads(cpu_threads)
+    except ImportError:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except ImportError:
+        pass
+
+    if method in ("auto", "local", "race"):
+        from detect_local import get_local_model
+        try:
+            get_local_model()
+        except Exception as e:
+            print(f"Worker {os.getpid()} could not preload the local model: {e}")